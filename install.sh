@@ -71,6 +71,15 @@ mkdir -p $INSTALL_DIR/config $INSTALL_DIR/logs $INSTALL_DIR/results $INSTALL_DIR
 cp -r src/* $INSTALL_DIR/
 chmod +x $INSTALL_DIR/*.py
 
+# Compile le décodage des trames WiFi avec mypyc (optionnel, falcon-scan utilise le module Python sinon)
+echo -e "${GREEN}[*] Compilation du décodeur de trames WiFi...${NC}"
+if $VENV_DIR/bin/pip install mypy > /dev/null 2>&1 && (cd $INSTALL_DIR && $VENV_DIR/bin/mypyc wifi_frames.py > /dev/null 2>&1); then
+    rm -rf $INSTALL_DIR/build
+    echo -e "${GREEN}[+] Décodeur compilé${NC}"
+else
+    echo -e "${YELLOW}[!] Compilation impossible, utilisation du module Python${NC}"
+fi
+
 # Crée les liens symboliques dans /usr/local/bin
 echo -e "${GREEN}[*] Création des liens symboliques...${NC}"
 for script in falcon-scan falcon-vision falcon-mavlink falcon-safe; do
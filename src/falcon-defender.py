@@ -4,58 +4,441 @@
 #
 
 import argparse
+import asyncio
 import cmd
+import codecs
+import concurrent.futures
+import functools
+import heapq
 import json
 import logging
+import logging.handlers
+import mmap
 import os
+import re
+import shlex
+import shutil
 import signal
-import subprocess
 import sys
 import time
 import threading
+from collections import deque
 from datetime import datetime
-import hashlib
 
 try:
     from rich.console import Console
     from rich.panel import Panel
-    from rich.table import Table
-    from rich.progress import Progress
-    from rich.columns import Columns
+    from rich.style import Style
     from rich.text import Text
 except ImportError:
     print("[!] Erreur: Le module rich est requis.")
     print("    Installez-le avec: pip install rich")
     sys.exit(1)
 
+# Répertoire des scripts des modules (installés côte à côte par install.sh)
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Interpréteur de l'environnement virtuel créé par install.sh (paquets des modules)
+VENV_PYTHON = "/opt/falcon-defender/venv/bin/python"
+
+# Répertoires de travail, résolus une seule fois
+FD_HOME = os.path.expanduser("~/.falcon-defender")
+LOGS_DIR = os.path.join(FD_HOME, "logs")
+RESULTS_DIR = os.path.join(FD_HOME, "results")
+DETECTIONS_DIR = os.path.join(FD_HOME, "detections")
+CAPTURES_DIR = os.path.join(FD_HOME, "captures")
+VIDEOS_DIR = os.path.join(FD_HOME, "videos")
+AUDIT_DIR = os.path.join(FD_HOME, "audit")
+FD_DIRS = (LOGS_DIR, RESULTS_DIR, DETECTIONS_DIR, CAPTURES_DIR, VIDEOS_DIR, AUDIT_DIR)
+
+# Empreintes déjà calculées par l'audit, indexées par chemin absolu
+HASH_CACHE_FILE = os.path.join(AUDIT_DIR, "hash_cache.json")
+
+@functools.lru_cache(maxsize=64)
+def ensure_dir(path):
+    """Crée un répertoire s'il n'existe pas (une seule fois par processus)."""
+    os.makedirs(path, exist_ok=True)
+
+@functools.lru_cache(maxsize=64)
+def path_exists(path):
+    """Vérifie l'existence d'un fichier (résultat conservé pour la durée du processus)."""
+    return os.path.exists(path)
+
+@functools.lru_cache(maxsize=128)
+def tokenize(arg):
+    """Découpe une ligne d'arguments comme le ferait un shell (résultat mis en cache)."""
+    return tuple(shlex.split(arg))
+
+def has_option(tokens, *names):
+    """Indique si l'une des options est présente (forme « -o val » ou « --opt=val »)."""
+    return any(token in names or token.split("=", 1)[0] in names for token in tokens)
+
+@functools.lru_cache(maxsize=8)
+def have_tool(tool):
+    """Vérifie qu'un outil est présent dans le PATH, sans lancer de processus."""
+    return shutil.which(tool) is not None
+
 # Configuration du logger
-log_dir = os.path.expanduser("~/.falcon-defender/logs")
-os.makedirs(log_dir, exist_ok=True)
-log_file = os.path.join(log_dir, f"falcon-defender_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+ensure_dir(LOGS_DIR)
+log_file = os.path.join(LOGS_DIR, f"falcon-defender_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Type d'un fichier de résultats, donné par le préfixe de son nom (scan_results_..., etc.)
+RESULT_TYPE_RE = re.compile(r"(scan|vision|mavlink)_")
+
+# Coloration des lignes de journal selon leur niveau (champ levelname de LOG_FORMAT)
+LOG_LEVEL_RE = re.compile(r" - (ERROR|WARNING) - ")
+LOG_LEVEL_STYLES = {"ERROR": "red", "WARNING": "yellow"}
+
+# Intervalle maximal (en secondes) entre deux vidages du tampon de journalisation
+LOG_FLUSH_INTERVAL = 30
+
+# Taille du tampon applicatif du fichier de journalisation
+LOG_BUFFER_SIZE = 65536
+
+class AppendFileHandler(logging.Handler):
+    """
+    Écrit les enregistrements dans un descripteur ouvert en O_APPEND via os.write().
+    Les lignes encodées s'accumulent dans un tampon de 64 Ko, écrit d'un seul appel
+    système lorsqu'il est plein, sur une erreur ou sur flush(). O_APPEND rend chaque
+    écriture atomique en fin de fichier, même si d'autres processus y ajoutent des lignes.
+    """
+    
+    def __init__(self, filename, buffer_size=LOG_BUFFER_SIZE):
+        super().__init__()
+        self.fd = os.open(filename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o640)
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+    
+    def emit(self, record):
+        try:
+            self.buffer += (self.format(record) + "\n").encode('utf-8', errors='replace')
+            if len(self.buffer) >= self.buffer_size or record.levelno >= logging.ERROR:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+    
+    def flush(self):
+        self.acquire()
+        try:
+            if self.fd is not None:
+                # os.write peut n'écrire qu'une partie du tampon
+                view = memoryview(self.buffer)
+                while view:
+                    written = os.write(self.fd, view)
+                    view = view[written:]
+                view.release()
+                self.buffer.clear()
+        finally:
+            self.release()
+    
+    def close(self):
+        self.acquire()
+        try:
+            try:
+                self.flush()
+            finally:
+                if self.fd is not None:
+                    os.close(self.fd)
+                    self.fd = None
+        finally:
+            self.release()
+            super().close()
+
+def flush_logs():
+    """Écrit sur disque les enregistrements en attente (mémoire puis tampon fichier)."""
+    buffered_handler.flush()
+    file_handler.flush()
+
+def schedule_log_flush(interval=LOG_FLUSH_INTERVAL):
+    """Vide périodiquement les tampons de journalisation vers le fichier."""
+    def flush():
+        flush_logs()
+        schedule_log_flush(interval)
+
+    timer = threading.Timer(interval, flush)
+    timer.daemon = True
+    timer.start()
+
+# Les enregistrements sont regroupés en mémoire et écrits par lots:
+# dès que le tampon est plein, sur une erreur, ou au plus tard toutes les 30 secondes.
+# logging.shutdown() (enregistré par le module logging) vide le tout à la sortie.
+file_handler = AppendFileHandler(log_file)
+file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+buffered_handler = logging.handlers.MemoryHandler(
+    capacity=512,
+    flushLevel=logging.ERROR,
+    target=file_handler
+)
+console_handler = logging.StreamHandler()
+console_handler.setLevel(logging.WARNING)
 
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
+    format=LOG_FORMAT,
     handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
+        buffered_handler,
+        console_handler
     ]
 )
+schedule_log_flush()
+
+# Un SIGTERM passe par sys.exit() pour que les journaux en attente soient écrits
+signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
 
 # Crée la console rich pour l'affichage
 console = Console()
 
+# Boucle asyncio partagée: une seule thread lance les modules et multiplexe leurs
+# sorties via un sélecteur (epoll/select), au lieu d'une thread bloquée en lecture par module
+loop = asyncio.SelectorEventLoop()
+
+# Pool de threads persistant, partagé par l'audit et par les appels bloquants de la
+# boucle (run_in_executor): aucune thread n'est créée commande après commande
+worker_pool = concurrent.futures.ThreadPoolExecutor(max_workers=8, thread_name_prefix="falcon-worker")
+loop.set_default_executor(worker_pool)
+
+loop_thread = threading.Thread(target=loop.run_forever, name="falcon-loop", daemon=True)
+loop_thread.start()
+
+# Taille maximale d'une lecture sur le tube de sortie d'un module
+PIPE_READ_SIZE = 1 << 16
+
+class OutputBatcher:
+    """
+    Regroupe les lignes de sortie d'un module pour les afficher par lots,
+    toutes les 50 ms ou toutes les 64 lignes. Utilisé uniquement depuis la boucle partagée.
+    """
+    def __init__(self, prefix, interval=0.05, max_lines=64):
+        self.prefix = prefix
+        self.interval = interval
+        self.max_lines = max_lines
+        self.lines = deque()
+        self.flush_handle = None
+    
+    def add(self, line):
+        """Ajoute une ligne au lot courant."""
+        self.lines.append(line)
+        if len(self.lines) >= self.max_lines:
+            self.flush()
+        elif self.flush_handle is None:
+            self.flush_handle = loop.call_later(self.interval, self.flush)
+    
+    def flush(self):
+        """Affiche le lot courant en un seul appel à la console."""
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        
+        if not self.lines:
+            return
+        
+        # Un seul Text pour tout le lot: seul le préfixe porte le style du module
+        text = Text()
+        for line in self.lines:
+            text.append_text(self.prefix)
+            text.append(f" {line}\n")
+        text.right_crop(1)
+        self.lines.clear()
+        console.print(text)
+
+# Taille maximale d'un fichier haché via une projection mémoire
+MMAP_HASH_LIMIT = 64 << 20
+
 # Fonction utilitaire pour vérifier l'intégrité d'un fichier
+def sha256_file(f, size=None):
+    """Calcule le SHA-256 d'un fichier ouvert en binaire, sans le charger en mémoire."""
+    # Importé au premier audit seulement (chargement d'OpenSSL évité au démarrage)
+    import hashlib
+    
+    if size is None:
+        size = os.fstat(f.fileno()).st_size
+    
+    # Fichiers de taille raisonnable: projetés en mémoire et hachés en un seul appel,
+    # la lecture anticipée étant laissée au noyau (un fichier vide ne peut être projeté)
+    if 0 < size < MMAP_HASH_LIMIT:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return hashlib.sha256(mapped).hexdigest()
+    
+    if hasattr(hashlib, "file_digest"):
+        # Python 3.11+: la boucle de lecture est faite en C
+        return hashlib.file_digest(f, "sha256").hexdigest()
+    
+    # Versions antérieures: un seul tampon de 1 Mo réutilisé pour toutes les lectures
+    digest = hashlib.sha256()
+    buffer = bytearray(1 << 20)
+    view = memoryview(buffer)
+    while True:
+        size = f.readinto(buffer)
+        if not size:
+            break
+        digest.update(view[:size])
+    return digest.hexdigest()
+
+# Cache des empreintes: {chemin absolu: {"mtime_ns", "ctime_ns", "size", "sha256"}}.
+# Chargé au premier usage, protégé par un verrou pour l'audit parallèle et
+# réécrit sur disque une seule fois en fin d'audit.
+hash_cache = None
+hash_cache_dirty = False
+hash_cache_lock = threading.Lock()
+
+def load_hash_cache():
+    """Charge le cache d'empreintes depuis le disque (une seule fois)."""
+    global hash_cache
+    if hash_cache is None:
+        try:
+            with open(HASH_CACHE_FILE, 'r') as f:
+                hash_cache = json.load(f)
+        except (OSError, ValueError):
+            hash_cache = {}
+    return hash_cache
+
+def save_hash_cache():
+    """Écrit le cache d'empreintes sur disque s'il a été modifié."""
+    global hash_cache_dirty
+    with hash_cache_lock:
+        if not hash_cache_dirty:
+            return
+        try:
+            ensure_dir(AUDIT_DIR)
+            tmp_file = f"{HASH_CACHE_FILE}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(hash_cache, f)
+            os.replace(tmp_file, HASH_CACHE_FILE)
+            hash_cache_dirty = False
+        except OSError as e:
+            logging.error(f"Erreur lors de l'enregistrement du cache d'empreintes: {str(e)}")
+
 def check_file_integrity(filepath, expected_hash=None):
+    global hash_cache_dirty
     try:
-        with open(filepath, 'rb') as f:
-            file_hash = hashlib.sha256(f.read()).hexdigest()
+        # Un fichier dont la taille et les dates n'ont pas changé n'est pas relu.
+        # ctime est mis à jour par le noyau à chaque modification (y compris par
+        # utime), ce qui empêche de masquer un changement en restaurant mtime.
+        stat = os.stat(filepath)
+        key = os.path.abspath(filepath)
+        version = {"mtime_ns": stat.st_mtime_ns, "ctime_ns": stat.st_ctime_ns, "size": stat.st_size}
+        with hash_cache_lock:
+            entry = load_hash_cache().get(key)
+        
+        if entry and all(entry.get(field) == value for field, value in version.items()):
+            file_hash = entry["sha256"]
+        else:
+            with open(filepath, 'rb') as f:
+                # Lecture séquentielle annoncée au noyau (lecture anticipée plus large)
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                file_hash = sha256_file(f, stat.st_size)
+                # Ces pages ne resservent pas: le cache reste aux journaux et résultats
+                if hasattr(os, "posix_fadvise"):
+                    os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+            with hash_cache_lock:
+                hash_cache[key] = dict(version, sha256=file_hash)
+                hash_cache_dirty = True
         if expected_hash:
             return file_hash == expected_hash
         return file_hash
     except Exception as e:
         return None
 
+# Ligne de commande d'un module: son script est lancé directement, sans passer
+# par l'enveloppe bash du PATH, avec un interpréteur qui voit les paquets de
+# l'environnement virtuel (l'interpréteur courant s'il tourne dans un venv,
+# sinon celui créé par install.sh). Sans venv, l'enveloppe du PATH l'active.
+# Le résultat est calculé une fois par module; l'exécutable est toujours un
+# chemin absolu, condition pour que subprocess utilise posix_spawn().
+@functools.lru_cache(maxsize=8)
+def module_command(name):
+    script = os.path.join(SCRIPTS_DIR, f"{name}.py")
+    if os.path.exists(script):
+        if sys.prefix != sys.base_prefix:
+            return (sys.executable, script)
+        if os.path.exists(VENV_PYTHON):
+            return (VENV_PYTHON, script)
+        wrapper = shutil.which(name)
+        if wrapper:
+            return (wrapper,)
+        return (sys.executable, script)
+    return (shutil.which(name) or name,)
+
+# Analyse JSON en flux (optionnelle) pour compter les détections sans tout charger.
+# Importée à la première commande 'results' seulement, pour alléger le démarrage.
+@functools.lru_cache(maxsize=1)
+def load_ijson():
+    try:
+        import ijson
+    except ImportError:
+        return None
+    return ijson
+
+# Décodeur JSON en C (optionnel), utilisé à défaut d'ijson
+@functools.lru_cache(maxsize=1)
+def load_orjson():
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+# Fonction utilitaire pour compter les détections d'un fichier de résultats
+def count_detections(path):
+    ijson = load_ijson()
+    if ijson is None:
+        orjson = load_orjson()
+        if orjson is not None:
+            with open(path, 'rb') as f:
+                data = orjson.loads(f.read())
+        else:
+            with open(path, 'r') as f:
+                data = json.load(f)
+        return len(data) if isinstance(data, dict) else 0
+    
+    # Seules les clés de premier niveau sont comptées, les valeurs ne sont pas construites
+    with open(path, 'rb') as f:
+        events = ijson.parse(f)
+        _, event, _ = next(events)
+        if event != 'start_map':
+            return 0
+        return sum(1 for prefix, event, _ in events if prefix == '' and event == 'map_key')
+
+# Les valeurs calculées à partir d'un fichier sont conservées tant que sa version
+# (date de modification en ns et taille) ne change pas
+@functools.lru_cache(maxsize=512)
+def cached_detection_count(path, mtime_ns, size):
+    """Nombre de détections d'une version donnée d'un fichier de résultats."""
+    return count_detections(path)
+
+@functools.lru_cache(maxsize=16)
+def cached_log_tail(path, mtime_ns, size, lines):
+    """Dernières lignes d'une version donnée d'un fichier journal."""
+    return tail_lines(path, lines)
+
+def tail_lines(path, count, block_size=8192):
+    """
+    Retourne les `count` dernières lignes d'un fichier en le lisant depuis la fin,
+    par blocs de 8 Ko: seuls les derniers octets utiles sont lus, quelle que soit
+    la taille du fichier.
+    """
+    if count <= 0:
+        return ()
+    
+    blocks = []
+    newlines = 0
+    with open(path, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        # count + 1 sauts de ligne garantissent que la plus ancienne ligne est complète
+        while position > 0 and newlines <= count:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            block = f.read(read_size)
+            newlines += block.count(b"\n")
+            blocks.append(block)
+    
+    data = b"".join(reversed(blocks))
+    return tuple(line.decode('utf-8', errors='replace') for line in data.splitlines(keepends=True)[-count:])
+
 # Bannière stylisée
 BANNER = '''
 ███████╗ █████╗ ██╗      ██████╗  ██████╗ ███╗   ██╗    ██████╗ ███████╗███████╗███╗   ██╗██████╗ ███████╗██████╗ 
@@ -96,6 +479,54 @@ class FalconDefenderCLI(cmd.Cmd):
     # État des modules
     active_modules = {}
     
+    # Protège les codes de sortie relevés depuis la boucle partagée
+    modules_lock = threading.Lock()
+    
+    # Dernier tableau d'état affiché et signature des modules qu'il décrit
+    status_table = None
+    status_signature = None
+    
+    # Panneau d'aide générale, construit une seule fois
+    HELP_PANEL = Panel("""
+Commandes disponibles:
+---------------------
+scan        Détection RF/WiFi des drones
+vision      Détection visuelle par IA
+mavlink     Analyse du protocole MAVLink
+safe        Neutralisation sécurisée (usage restreint)
+status      Affiche l'état des modules actifs
+stop        Arrête un module spécifique
+stopall     Arrête tous les modules actifs
+results     Affiche les résultats récents
+logs        Affiche les journaux récents
+help        Affiche cette aide
+exit, quit  Quitter le programme
+
+Pour plus d'informations sur une commande spécifique, tapez 'help <commande>'
+""", title="Aide Falcon-Defender", border_style="blue")
+    
+    # Colonnes des tableaux, avec des styles analysés une seule fois
+    STATUS_COLUMNS = (
+        ("Module", Style.parse("cyan")),
+        ("PID", Style.parse("green")),
+        ("Démarré", Style.parse("yellow")),
+        ("Options", Style.parse("magenta"))
+    )
+    RESULTS_COLUMNS = (
+        ("Type", Style.parse("cyan")),
+        ("Fichier", Style.parse("blue")),
+        ("Date", Style.parse("magenta")),
+        ("Détections", Style.parse("green"))
+    )
+    
+    # Préfixes des sorties de modules, construits une seule fois
+    MODULE_PREFIXES = {
+        "scan": Text("[SCAN]", style="cyan"),
+        "vision": Text("[VISION]", style="magenta"),
+        "mavlink": Text("[MAVLINK]", style="blue"),
+        "safe": Text("[SAFE]", style="red")
+    }
+    
     def preloop(self):
         """Initialisation avant la boucle de commande."""
         # Affiche la bannière avec un style amélioré
@@ -118,41 +549,27 @@ class FalconDefenderCLI(cmd.Cmd):
     
     def initialize_directories(self):
         """Crée les répertoires nécessaires s'ils n'existent pas."""
-        dirs = [
-            "~/.falcon-defender/logs",
-            "~/.falcon-defender/results",
-            "~/.falcon-defender/detections",
-            "~/.falcon-defender/captures",
-            "~/.falcon-defender/videos",
-            "~/.falcon-defender/audit"
-        ]
-        
-        for d in dirs:
-            path = os.path.expanduser(d)
-            if not os.path.exists(path):
-                try:
-                    os.makedirs(path)
-                    logging.info(f"Répertoire créé: {path}")
-                except Exception as e:
-                    logging.error(f"Erreur lors de la création du répertoire {path}: {str(e)}")
+        for path in FD_DIRS:
+            try:
+                ensure_dir(path)
+            except Exception as e:
+                logging.error(f"Erreur lors de la création du répertoire {path}: {str(e)}")
     
     def check_dependencies(self):
         """Vérifie que les dépendances requises sont installées."""
         try:
             # Vérifie aircrack-ng
-            aircrack = subprocess.run(["which", "aircrack-ng"], capture_output=True, text=True)
-            if aircrack.returncode != 0:
+            if not have_tool("aircrack-ng"):
                 console.print("[bold red]AVERTISSEMENT: aircrack-ng non trouvé, certaines fonctionnalités de scan RF seront limitées[/bold red]")
             
             # Vérifie HackRF
-            hackrf = subprocess.run(["which", "hackrf_info"], capture_output=True, text=True)
-            if hackrf.returncode != 0:
+            if not have_tool("hackrf_info"):
                 console.print("[bold yellow]REMARQUE: HackRF non trouvé, certaines fonctionnalités de scan RF avancées seront désactivées[/bold yellow]")
             
             # Vérifie le modèle YOLOv8
             install_dir = "/opt/falcon-defender"
-            if not os.path.exists(os.path.join(install_dir, "models", "yolov8n.pt")) and \
-               not os.path.exists(os.path.join(install_dir, "models", "yolov8n-drone.pt")):
+            if not path_exists(os.path.join(install_dir, "models", "yolov8n.pt")) and \
+               not path_exists(os.path.join(install_dir, "models", "yolov8n-drone.pt")):
                 console.print("[bold yellow]REMARQUE: Modèle YOLOv8 non trouvé, la détection visuelle sera limitée[/bold yellow]")
                 
         except Exception as e:
@@ -165,6 +582,7 @@ class FalconDefenderCLI(cmd.Cmd):
     def do_exit(self, arg):
         """Quitter le programme."""
         self.stop_all_modules()
+        worker_pool.shutdown(wait=False, cancel_futures=True)
         console.print("[bold green]Au revoir ![/bold green]")
         return True
     
@@ -184,19 +602,23 @@ class FalconDefenderCLI(cmd.Cmd):
             
         console.print("[bold yellow]Arrêt des modules actifs...[/bold yellow]")
         
-        for name, process_info in list(self.active_modules.items()):
-            process = process_info.get("process")
-            if process:
-                try:
-                    process.terminate()
-                    process.wait(timeout=2)
+        # Demande l'arrêt de tous les modules avant d'attendre: la durée totale
+        # est bornée par le module le plus lent, pas par la somme des attentes
+        modules = list(self.active_modules.items())
+        for name, process_info in modules:
+            loop.call_soon_threadsafe(self.send_signal, process_info["process"], signal.SIGTERM)
+        
+        deadline = time.monotonic() + 2
+        for name, process_info in modules:
+            try:
+                if process_info["exited"].wait(max(0, deadline - time.monotonic())):
                     console.print(f"[green]Module {name} arrêté[/green]")
-                except Exception as e:
-                    logging.error(f"Erreur lors de l'arrêt du module {name}: {str(e)}")
-                    try:
-                        process.kill()
-                    except:
-                        pass
+                else:
+                    loop.call_soon_threadsafe(self.send_signal, process_info["process"], signal.SIGKILL)
+                    console.print(f"[yellow]Module {name} tué de force[/yellow]")
+                process_info["task"].cancel()
+            except Exception as e:
+                logging.error(f"Erreur lors de l'arrêt du module {name}: {str(e)}")
         
         self.active_modules = {}
     
@@ -206,18 +628,36 @@ class FalconDefenderCLI(cmd.Cmd):
             console.print("[yellow]Aucun module actif actuellement[/yellow]")
             return
         
+        # Le code de sortie est relevé par la boucle à la fin du module: l'état
+        # se lit en mémoire, sans interroger les processus
+        with self.modules_lock:
+            signature = tuple(
+                (name, info["process"].pid, info["exit_code"] is None)
+                for name, info in self.active_modules.items()
+            )
+        
+        # Le tableau n'est reconstruit que si un module a démarré, s'est arrêté ou terminé
+        if self.status_table is None or signature != self.status_signature:
+            self.status_table = self.build_status_table(signature)
+            self.status_signature = signature
+        
+        console.print(self.status_table)
+    
+    def build_status_table(self, states):
+        """Construit le tableau d'état des modules actifs à partir de (nom, pid, en cours)."""
+        from rich.table import Table
+        
         table = Table(title="Modules actifs")
-        table.add_column("Module", style="cyan")
-        table.add_column("PID", style="green")
-        table.add_column("Démarré", style="yellow")
-        table.add_column("Options", style="magenta")
+        for header, style in self.STATUS_COLUMNS:
+            table.add_column(header, style=style)
         
-        for name, info in self.active_modules.items():
-            if "process" in info and info["process"].poll() is None:
+        for name, pid, running in states:
+            info = self.active_modules[name]
+            if running:
                 # Le processus est toujours en cours d'exécution
                 table.add_row(
                     name,
-                    str(info["process"].pid),
+                    str(pid),
                     info["start_time"].strftime("%H:%M:%S"),
                     info.get("options", "")
                 )
@@ -230,7 +670,7 @@ class FalconDefenderCLI(cmd.Cmd):
                     info.get("options", "")
                 )
         
-        console.print(table)
+        return table
     
     def do_help(self, arg):
         """Affiche l'aide pour les commandes."""
@@ -239,24 +679,7 @@ class FalconDefenderCLI(cmd.Cmd):
             super().do_help(arg)
         else:
             # Aide générale
-            help_text = """
-Commandes disponibles:
----------------------
-scan        Détection RF/WiFi des drones
-vision      Détection visuelle par IA
-mavlink     Analyse du protocole MAVLink
-safe        Neutralisation sécurisée (usage restreint)
-status      Affiche l'état des modules actifs
-stop        Arrête un module spécifique
-stopall     Arrête tous les modules actifs
-results     Affiche les résultats récents
-logs        Affiche les journaux récents
-help        Affiche cette aide
-exit, quit  Quitter le programme
-
-Pour plus d'informations sur une commande spécifique, tapez 'help <commande>'
-"""
-            console.print(Panel(help_text, title="Aide Falcon-Defender", border_style="blue"))
+            console.print(self.HELP_PANEL)
     
     def do_scan(self, arg):
         """
@@ -270,34 +693,24 @@ Pour plus d'informations sur une commande spécifique, tapez 'help <commande>'
         
         Exemple: scan -i wlan0 -t 300
         """
-        if not arg or "-i" not in arg:
+        tokens = self.split_args(arg)
+        if tokens is None:
+            return
+        if not has_option(tokens, "-i", "--interface"):
             console.print("[bold red]Erreur: L'interface réseau est requise (-i <interface>)[/bold red]")
             self.do_help("scan")
             return
         
         # Exécute falcon-scan avec les arguments fournis
         try:
-            cmd = ["falcon-scan"]
-            cmd.extend(arg.split())
+            cmd = ("falcon-scan", *tokens)
             
             console.print(f"[bold green]Démarrage de la détection RF/WiFi: {' '.join(cmd)}[/bold green]")
             
-            process = self.safe_subprocess(cmd)
-            if process is None:
+            # Lance le module et pompe sa sortie sur la boucle partagée
+            if not self.start_module("scan", cmd, arg):
                 return
             
-            # Enregistre le processus
-            self.active_modules["scan"] = {
-                "process": process,
-                "start_time": datetime.now(),
-                "options": arg
-            }
-            
-            # Lance un thread pour lire la sortie
-            thread = threading.Thread(target=self.read_process_output, args=(process, "[cyan][SCAN][/cyan]"))
-            thread.daemon = True
-            thread.start()
-            
             console.print("[bold green]Module de scan démarré en arrière-plan.[/bold green]")
             console.print("[bold green]Utilisez 'status' pour voir l'état, 'stop scan' pour arrêter.[/bold green]")
             
@@ -316,30 +729,20 @@ Pour plus d'informations sur une commande spécifique, tapez 'help <commande>'
         
         Exemple: vision --source 0 --display
         """
+        tokens = self.split_args(arg)
+        if tokens is None:
+            return
+        
         # Exécute falcon-vision avec les arguments fournis
         try:
-            cmd = ["falcon-vision"]
-            if arg:
-                cmd.extend(arg.split())
+            cmd = ("falcon-vision", *tokens)
             
             console.print(f"[bold green]Démarrage de la détection visuelle: {' '.join(cmd)}[/bold green]")
             
-            process = self.safe_subprocess(cmd)
-            if process is None:
+            # Lance le module et pompe sa sortie sur la boucle partagée
+            if not self.start_module("vision", cmd, arg):
                 return
             
-            # Enregistre le processus
-            self.active_modules["vision"] = {
-                "process": process,
-                "start_time": datetime.now(),
-                "options": arg
-            }
-            
-            # Lance un thread pour lire la sortie
-            thread = threading.Thread(target=self.read_process_output, args=(process, "[magenta][VISION][/magenta]"))
-            thread.daemon = True
-            thread.start()
-            
             console.print("[bold green]Module de vision démarré en arrière-plan.[/bold green]")
             console.print("[bold green]Utilisez 'status' pour voir l'état, 'stop vision' pour arrêter.[/bold green]")
             
@@ -358,30 +761,20 @@ Pour plus d'informations sur une commande spécifique, tapez 'help <commande>'
         
         Exemple: mavlink --port 14550
         """
+        tokens = self.split_args(arg)
+        if tokens is None:
+            return
+        
         # Exécute falcon-mavlink avec les arguments fournis
         try:
-            cmd = ["falcon-mavlink"]
-            if arg:
-                cmd.extend(arg.split())
+            cmd = ("falcon-mavlink", *tokens)
             
             console.print(f"[bold green]Démarrage de la surveillance MAVLink: {' '.join(cmd)}[/bold green]")
             
-            process = self.safe_subprocess(cmd)
-            if process is None:
+            # Lance le module et pompe sa sortie sur la boucle partagée
+            if not self.start_module("mavlink", cmd, arg):
                 return
             
-            # Enregistre le processus
-            self.active_modules["mavlink"] = {
-                "process": process,
-                "start_time": datetime.now(),
-                "options": arg
-            }
-            
-            # Lance un thread pour lire la sortie
-            thread = threading.Thread(target=self.read_process_output, args=(process, "[blue][MAVLINK][/blue]"))
-            thread.daemon = True
-            thread.start()
-            
             console.print("[bold green]Module MAVLink démarré en arrière-plan.[/bold green]")
             console.print("[bold green]Utilisez 'status' pour voir l'état, 'stop mavlink' pour arrêter.[/bold green]")
             
@@ -401,7 +794,10 @@ Pour plus d'informations sur une commande spécifique, tapez 'help <commande>'
         
         AVERTISSEMENT: L'utilisation sans autorisation peut être illégale.
         """
-        if not arg or "--connect" not in arg:
+        tokens = self.split_args(arg)
+        if tokens is None:
+            return
+        if not has_option(tokens, "--connect"):
             console.print("[bold red]Erreur: La connexion au drone est requise (--connect <connexion>)[/bold red]")
             self.do_help("safe")
             return
@@ -416,27 +812,17 @@ avec le fonctionnement d'un drone. Cette action peut être illégale sans autori
 Êtes-vous sûr de vouloir continuer? (oui/non): """
         
         console.print(Panel(warning, style="bold red"))
-        response = input()
-        
-        if response.lower() not in ["oui", "o", "yes", "y"]:
-            console.print("[yellow]Opération annulée[/yellow]")
-            return
         
         # Exécute falcon-safe avec les arguments fournis
         try:
-            cmd = ["falcon-safe"]
-            cmd.extend(arg.split())
+            cmd = ("falcon-safe", *tokens)
             
-            console.print(f"[bold red]Exécution de la contre-mesure: {' '.join(cmd)}[/bold red]")
-            
-            process = self.safe_subprocess(cmd)
-            if process is None:
+            # La confirmation et l'exécution se déroulent sur la boucle partagée
+            returncode = self.run_in_loop(self.run_countermeasure(cmd))
+            if returncode is None:
                 return
             
-            # Pour ce module, on attend la fin plutôt que de le lancer en arrière-plan
-            self.read_process_output(process, "[red][SAFE][/red]")
-            
-            if process.wait() == 0:
+            if returncode == 0:
                 console.print("[bold green]Contre-mesure exécutée avec succès.[/bold green]")
             else:
                 console.print("[bold red]Échec de l'exécution de la contre-mesure.[/bold red]")
@@ -463,23 +849,16 @@ avec le fonctionnement d'un drone. Cette action peut être illégale sans autori
             return
         
         process_info = self.active_modules[module]
-        process = process_info.get("process")
         
-        if process:
-            try:
-                process.terminate()
-                process.wait(timeout=2)
+        try:
+            if self.stop_module(process_info):
                 console.print(f"[bold green]Module {module} arrêté[/bold green]")
-                del self.active_modules[module]
-            except Exception as e:
-                logging.error(f"Erreur lors de l'arrêt du module {module}: {str(e)}")
-                console.print(f"[bold red]Erreur lors de l'arrêt du module {module}: {str(e)}[/bold red]")
-                try:
-                    process.kill()
-                    console.print(f"[bold yellow]Module {module} tué de force[/bold yellow]")
-                    del self.active_modules[module]
-                except:
-                    console.print(f"[bold red]Impossible d'arrêter le module {module}[/bold red]")
+            else:
+                console.print(f"[bold yellow]Module {module} tué de force[/bold yellow]")
+            del self.active_modules[module]
+        except Exception as e:
+            logging.error(f"Erreur lors de l'arrêt du module {module}: {str(e)}")
+            console.print(f"[bold red]Impossible d'arrêter le module {module}: {str(e)}[/bold red]")
     
     def do_stopall(self, arg):
         """Arrête tous les modules actifs."""
@@ -495,61 +874,59 @@ avec le fonctionnement d'un drone. Cette action peut être illégale sans autori
         
         Exemple: results scan
         """
-        results_dir = os.path.expanduser("~/.falcon-defender/results")
-        
-        if not os.path.exists(results_dir):
+        result_files = []
+        try:
+            # Un seul parcours du répertoire: nom, chemin et date viennent de l'entrée
+            with os.scandir(RESULTS_DIR) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    
+                    file = entry.name
+                    match = RESULT_TYPE_RE.match(file)
+                    result_type = match.group(1) if match else None
+                    
+                    # Filtre par type si spécifié
+                    if arg and arg.strip() and result_type != arg.strip():
+                        continue
+                    
+                    stat = entry.stat(follow_symlinks=False)
+                    result_files.append({
+                        "file": file,
+                        "type": result_type,
+                        "path": entry.path,
+                        "time": stat.st_mtime,
+                        "version": (stat.st_mtime_ns, stat.st_size)
+                    })
+        except FileNotFoundError:
             console.print("[bold yellow]Aucun résultat trouvé[/bold yellow]")
             return
         
-        result_files = []
-        for file in os.listdir(results_dir):
-            if file.endswith(".json"):
-                result_type = None
-                if "scan" in file:
-                    result_type = "scan"
-                elif "vision" in file:
-                    result_type = "vision"
-                elif "mavlink" in file:
-                    result_type = "mavlink"
-                
-                # Filtre par type si spécifié
-                if arg and arg.strip() and result_type != arg.strip():
-                    continue
-                
-                result_files.append({
-                    "file": file,
-                    "type": result_type,
-                    "path": os.path.join(results_dir, file),
-                    "time": datetime.fromtimestamp(os.path.getmtime(os.path.join(results_dir, file)))
-                })
-        
         if not result_files:
             console.print(f"[bold yellow]Aucun résultat {arg if arg else ''} trouvé[/bold yellow]")
             return
         
-        # Trie par date (plus récent en premier)
-        result_files.sort(key=lambda x: x["time"], reverse=True)
+        # Sélectionne les 10 plus récents sans trier toute la liste
+        recent_files = heapq.nlargest(10, result_files, key=lambda x: x["time"])
+        
+        from rich.table import Table
         
         # Affiche les 10 fichiers les plus récents
         table = Table(title="Résultats récents")
-        table.add_column("Type", style="cyan")
-        table.add_column("Fichier", style="blue")
-        table.add_column("Date", style="magenta")
-        table.add_column("Détections", style="green")
+        for header, style in self.RESULTS_COLUMNS:
+            table.add_column(header, style=style)
         
-        for result in result_files[:10]:
+        for result in recent_files:
             # Lit le fichier JSON pour compter les détections
             try:
-                with open(result["path"], 'r') as f:
-                    data = json.load(f)
-                    count = len(data) if isinstance(data, dict) else 0
+                count = cached_detection_count(result["path"], *result["version"])
             except:
                 count = "N/A"
             
             table.add_row(
                 result["type"] or "Inconnu",
                 result["file"],
-                result["time"].strftime("%Y-%m-%d %H:%M:%S"),
+                datetime.fromtimestamp(result["time"]).strftime("%Y-%m-%d %H:%M:%S"),
                 str(count)
             )
         
@@ -565,40 +942,43 @@ avec le fonctionnement d'un drone. Cette action peut être illégale sans autori
         
         Exemple: logs 50
         """
-        logs_dir = os.path.expanduser("~/.falcon-defender/logs")
-        
-        if not os.path.exists(logs_dir):
-            console.print("[bold yellow]Aucun journal trouvé[/bold yellow]")
-            return
-        
         # Nombre de lignes à afficher
         lines = 20
         if arg and arg.strip().isdigit():
             lines = int(arg.strip())
         
+        # Écrit les enregistrements encore en mémoire pour que le journal de la
+        # session courante soit à jour
+        flush_logs()
+        
         # Trouve le fichier journal le plus récent
         log_files = []
-        for file in os.listdir(logs_dir):
-            if file.endswith(".log"):
-                log_files.append({
-                    "file": file,
-                    "path": os.path.join(logs_dir, file),
-                    "time": datetime.fromtimestamp(os.path.getmtime(os.path.join(logs_dir, file)))
-                })
+        try:
+            with os.scandir(LOGS_DIR) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".log"):
+                        stat = entry.stat(follow_symlinks=False)
+                        log_files.append({
+                            "file": entry.name,
+                            "path": entry.path,
+                            "time": stat.st_mtime,
+                            "version": (stat.st_mtime_ns, stat.st_size)
+                        })
+        except FileNotFoundError:
+            console.print("[bold yellow]Aucun journal trouvé[/bold yellow]")
+            return
         
         if not log_files:
             console.print("[bold yellow]Aucun journal trouvé[/bold yellow]")
             return
         
-        # Trie par date (plus récent en premier)
-        log_files.sort(key=lambda x: x["time"], reverse=True)
-        latest_log = log_files[0]
+        # Le plus récent suffit: un seul parcours, sans tri
+        latest_log = max(log_files, key=lambda x: x["time"])
         
         # Affiche les dernières lignes du journal
         try:
-            with open(latest_log["path"], 'r') as f:
-                log_lines = f.readlines()
-                
+            log_lines = cached_log_tail(latest_log["path"], *latest_log["version"], lines)
+            
             # Si le fichier a moins de lignes que demandé
             if len(log_lines) < lines:
                 lines = len(log_lines)
@@ -606,13 +986,10 @@ avec le fonctionnement d'un drone. Cette action peut être illégale sans autori
             console.print(Panel(f"Affichage des {lines} dernières lignes du journal: {latest_log['file']}", style="blue"))
             
             # Affiche les dernières lignes avec coloration selon le niveau
-            for line in log_lines[-lines:]:
-                if "ERROR" in line:
-                    console.print(f"[red]{line.strip()}[/red]")
-                elif "WARNING" in line:
-                    console.print(f"[yellow]{line.strip()}[/yellow]")
-                else:
-                    console.print(line.strip())
+            for line in log_lines:
+                match = LOG_LEVEL_RE.search(line)
+                style = LOG_LEVEL_STYLES[match.group(1)] if match else None
+                console.print(line.strip(), style=style, markup=False)
                     
         except Exception as e:
             console.print(f"[bold red]Erreur lors de la lecture du journal: {str(e)}[/bold red]")
@@ -628,16 +1005,133 @@ avec le fonctionnement d'un drone. Cette action peut être illégale sans autori
             'src/falcon-mavlink.py',
             'src/exploitation.py'
         ]
-        for f in critical_files:
-            hash_val = check_file_integrity(f)
+        # Les fichiers sont indépendants: hashlib relâche le GIL pendant le calcul,
+        # les lectures et les hachages se recouvrent donc d'un fichier à l'autre
+        hashes = list(worker_pool.map(check_file_integrity, critical_files))
+        
+        save_hash_cache()
+        
+        for f, hash_val in zip(critical_files, hashes):
             if hash_val:
                 console.print(f"[green]Fichier {f} : OK (SHA256: {hash_val[:12]}...)[/green]")
             else:
                 console.print(f"[red]Fichier {f} : INACCESSIBLE ou CORROMPU[/red]")
         console.print("[bold green]Audit terminé.[/bold green]")
 
+    # Exécution des modules sur la boucle partagée
+    def split_args(self, arg):
+        """Découpe les arguments d'une commande; affiche l'erreur et retourne None si invalides."""
+        try:
+            return tokenize(arg)
+        except ValueError as e:
+            console.print(f"[bold red]Erreur: arguments invalides ({str(e)})[/bold red]")
+            return None
+
+    def run_in_loop(self, coro, timeout=None):
+        """Exécute une coroutine sur la boucle partagée et attend son résultat."""
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except KeyboardInterrupt:
+            future.cancel()
+            raise
+
+    def start_module(self, name, cmd, options):
+        """Lance un module en arrière-plan et enregistre son processus."""
+        process = self.run_in_loop(self.safe_subprocess(cmd))
+        if process is None:
+            return False
+        
+        # Enregistre le processus et la tâche qui lit sa sortie
+        info = {
+            "process": process,
+            "exit_code": None,
+            "exited": threading.Event(),
+            "task": asyncio.run_coroutine_threadsafe(self.read_process_output(process, self.MODULE_PREFIXES[name]), loop),
+            "start_time": datetime.now(),
+            "options": options
+        }
+        self.active_modules[name] = info
+        
+        # Dès que l'observateur de processus enfants de la boucle a récolté le module
+        # (ThreadedChildWatcher: la boucle tourne hors du thread principal, un thread
+        # bloqué dans waitpid() par module), son code de sortie est noté et
+        # l'événement levé: aucune attente active ni interrogation par la suite
+        def on_exit(future):
+            with self.modules_lock:
+                info["exit_code"] = process.returncode
+            info["exited"].set()
+        
+        asyncio.run_coroutine_threadsafe(process.wait(), loop).add_done_callback(on_exit)
+        return True
+
+    def send_signal(self, process, sig):
+        """Envoie un signal à un processus de module s'il est encore en vie."""
+        try:
+            process.send_signal(sig)
+        except ProcessLookupError:
+            pass
+
+    def stop_module(self, process_info, timeout=2):
+        """Arrête un module, et le tue s'il ne s'est pas terminé à temps.
+        Retourne False si le processus a dû être tué."""
+        process = process_info["process"]
+        exited = process_info["exited"]
+        
+        loop.call_soon_threadsafe(self.send_signal, process, signal.SIGTERM)
+        stopped = exited.wait(timeout)
+        if not stopped:
+            loop.call_soon_threadsafe(self.send_signal, process, signal.SIGKILL)
+            exited.wait(timeout)
+        
+        process_info["task"].cancel()
+        return stopped
+
     # Sécurisation de l'exécution des modules
-    def safe_subprocess(self, cmd, **kwargs):
+    async def read_confirmation(self):
+        """Lit la réponse de l'opérateur sans bloquer la boucle partagée."""
+        fd = sys.stdin.fileno()
+        answer = loop.create_future()
+        
+        def on_readable():
+            if not answer.done():
+                answer.set_result(sys.stdin.readline())
+        
+        # Hors terminal, des lignes peuvent déjà attendre dans le tampon de sys.stdin
+        # sans que le descripteur soit signalé lisible: lecture dans l'exécuteur
+        if not sys.stdin.isatty():
+            return await loop.run_in_executor(None, sys.stdin.readline)
+        
+        try:
+            loop.add_reader(fd, on_readable)
+        except (OSError, ValueError):
+            return await loop.run_in_executor(None, sys.stdin.readline)
+        try:
+            return await answer
+        finally:
+            loop.remove_reader(fd)
+
+    async def run_countermeasure(self, cmd):
+        """
+        Demande confirmation puis exécute falcon-safe au premier plan.
+        Retourne le code de sortie, ou None si la contre-mesure n'a pas été lancée.
+        """
+        response = await self.read_confirmation()
+        if response.strip().lower() not in ["oui", "o", "yes", "y"]:
+            console.print("[yellow]Opération annulée[/yellow]")
+            return None
+        
+        console.print(f"[bold red]Exécution de la contre-mesure: {' '.join(cmd)}[/bold red]")
+        
+        process = await self.safe_subprocess(cmd)
+        if process is None:
+            return None
+        
+        # Pour ce module, on attend la fin plutôt que de le lancer en arrière-plan
+        await self.stream_process_output(process)
+        return await process.wait()
+
+    async def safe_subprocess(self, cmd, **kwargs):
         """Exécute une commande de manière sécurisée."""
         try:
             # Vérifie que la commande est autorisée
@@ -646,31 +1140,66 @@ avec le fonctionnement d'un drone. Cette action peut être illégale sans autori
                 raise PermissionError("Commande non autorisée.")
             
             # Force stdout et stderr à être des pipes
-            kwargs['stdout'] = subprocess.PIPE
-            kwargs['stderr'] = subprocess.STDOUT
-            kwargs['universal_newlines'] = True
-            kwargs['bufsize'] = 1
+            kwargs['stdout'] = asyncio.subprocess.PIPE
+            kwargs['stderr'] = asyncio.subprocess.STDOUT
             
-            process = subprocess.Popen(cmd, **kwargs)
-            if process is None:
-                raise RuntimeError("Échec de la création du processus")
-            return process
+            # Les descripteurs Python sont non héritables par défaut (PEP 446):
+            # sans close_fds, subprocess lance le module via posix_spawn()
+            # au lieu de fork() + exec()
+            kwargs.setdefault('close_fds', False)
+            
+            return await asyncio.create_subprocess_exec(*module_command(cmd[0]), *cmd[1:], **kwargs)
             
         except Exception as e:
             console.print(f"[bold red]Erreur lors de l'exécution de la commande: {str(e)}[/bold red]")
             return None
 
-    def read_process_output(self, process, prefix):
+    async def read_process_output(self, process, prefix):
         """Lit la sortie d'un processus de manière sécurisée."""
         if process is None or process.stdout is None:
             return
             
+        batcher = OutputBatcher(prefix)
+        pending = b""
+        try:
+            # Lit tout ce qui est disponible (jusqu'à PIPE_READ_SIZE octets) et découpe les lignes localement
+            while True:
+                chunk = await process.stdout.read(PIPE_READ_SIZE)
+                if not chunk:
+                    break
+                data = pending + chunk
+                end = data.rfind(b"\n")
+                if end < 0:
+                    pending = data
+                    continue
+                
+                # Un seul décodage pour toutes les lignes complètes du bloc
+                # (un saut de ligne ne coupe jamais un caractère UTF-8)
+                pending = data[end + 1:]
+                for line in data[:end].decode('utf-8', errors='replace').split("\n"):
+                    batcher.add(line.strip())
+            
+            if pending:
+                batcher.add(pending.decode('utf-8', errors='replace').strip())
+        except (AttributeError, IOError):
+            pass
+        finally:
+            batcher.flush()
+
+    async def stream_process_output(self, process, chunk_size=4096):
+        """Recopie la sortie brute d'un processus au premier plan, bloc par bloc."""
+        if process is None or process.stdout is None:
+            return
+        
+        # Décodeur incrémental: un caractère multi-octets peut chevaucher deux blocs
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
         try:
             while True:
-                line = process.stdout.readline()
-                if not line:
+                chunk = await process.stdout.read(chunk_size)
+                if not chunk:
                     break
-                console.print(f"{prefix} {line.strip()}")
+                console.out(decoder.decode(chunk), end='', highlight=False)
+            console.out(decoder.decode(b"", final=True), end='', highlight=False)
         except (AttributeError, IOError):
             pass
 
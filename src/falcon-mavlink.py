@@ -4,16 +4,32 @@
 #
 
 import argparse
+import ctypes
+import errno
+import functools
+import importlib.util
 import json
 import logging
+import logging.handlers
 import os
+import selectors
 import signal
 import socket
 import struct
 import sys
 import threading
 import time
-from datetime import datetime
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from math import radians, cos, sin, asin, sqrt, hypot, pi
+
+try:
+    import numpy as np
+except ImportError:
+    print("[!] Erreur: Le module numpy est requis.")
+    print("    Installez-le avec: pip install numpy")
+    sys.exit(1)
 
 try:
     from pymavlink import mavutil
@@ -23,24 +39,108 @@ except ImportError:
     print("    Installez-le avec: pip install pymavlink")
     sys.exit(1)
 
+# Décodeur C de pymavlink (mavnative), disponible si pymavlink a été compilé avec MAVNATIVE_BUILD=1
+# (seule sa présence compte: pymavlink le charge lui-même)
+USE_NATIVE = importlib.util.find_spec("pymavlink.mavnative") is not None
+
+# Sérialisation rapide des résultats (optionnelle)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Compilation JIT du calcul des zones d'exclusion (optionnelle)
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+# Lecture des zones d'exclusion (optionnelle)
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
 # Configuration du logger
 log_dir = os.path.expanduser("~/.falcon-defender/logs")
 os.makedirs(log_dir, exist_ok=True)
 log_file = os.path.join(log_dir, f"falcon-mavlink_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
 
+# Les messages sont regroupés en mémoire et écrits par lots (immédiatement à partir de WARNING)
+# pour ne pas bloquer le traitement des messages sur les écritures
+LOG_BUFFER_CAPACITY = 512
+
+log_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+log_targets = [logging.FileHandler(log_file), logging.StreamHandler()]
+for log_target in log_targets:
+    log_target.setFormatter(log_formatter)
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
+        logging.handlers.MemoryHandler(LOG_BUFFER_CAPACITY, flushLevel=logging.WARNING, target=log_target)
+        for log_target in log_targets
     ]
 )
 
+# Écrit les messages en attente
+def flush_logs():
+    for handler in logging.getLogger().handlers:
+        handler.flush()
+
 # Variables globales
 detected_drones = {}
-messages_stats = {}
+messages_stats = Counter()
 stop_monitoring = False
+shutdown_event = threading.Event()  # Réveille les threads en attente à l'arrêt
+
+# État d'un drone (hors télémétrie fréquente, rangée dans drone_table): les champs
+# optionnels restent à None tant que le message correspondant n'a pas été reçu
+@dataclass(slots=True)
+class DroneState:
+    system_id: int
+    component_id: int
+    address: tuple | None
+    first_seen: int
+    message_types: int = 0  # Masque de bits, voir message_bit()
+    status: dict = field(default_factory=dict)
+    attitude: dict | None = None
+    battery: dict | None = None
+    battery_alert: bool = False
+    command_ack: dict | None = None
+    geofence: dict | None = None
+    geofence_alert: dict | None = None
+
+# Horodatage: les instants sont mesurés avec time.monotonic_ns() et ne sont convertis
+# en date qu'à l'enregistrement des résultats, à partir de cette référence
+START_WALL = datetime.now()
+START_MONOTONIC_NS = time.monotonic_ns()
+
+# Télémétrie des drones en colonnes (SoA): une ligne par drone, retrouvée via drone_rows.
+# armed vaut -1 tant qu'aucun HEARTBEAT n'a été reçu, position_update 0 sans position
+MAX_DRONES = 256
+DRONE_FIELDS = [("last_seen", "i8"), ("armed", "i1"), ("position_update", "i8"),
+                ("lat", "i4"), ("lon", "i4"), ("alt", "i4"), ("relative_alt", "i4"),
+                ("vx", "i2"), ("vy", "i2"), ("vz", "i2"), ("hdg", "u2")]
+POSITION_FIELDS = ("lat", "lon", "alt", "relative_alt", "vx", "vy", "vz", "hdg")
+drone_table = np.zeros(MAX_DRONES, dtype=DRONE_FIELDS)
+drone_rows = {}
+free_rows = list(range(MAX_DRONES - 1, -1, -1))
+
+# Protège detected_drones, drone_rows, free_rows et l'agrandissement de drone_table:
+# le thread de réception enregistre les drones, l'affichage retire ceux perdus de vue
+drones_lock = threading.Lock()
+
+# Zones d'exclusion
+GEOFENCE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "geofence_zones.yml")
+EARTH_RADIUS = 6371000  # Rayon de la Terre en mètres
+GEOFENCE_CHECK_INTERVAL = 5  # Secondes entre deux vérifications de la date du fichier
+EQUIRECT_MAX_RADIUS = 10000  # Rayon (m) en dessous duquel l'approximation équirectangulaire suffit
+
+# Zones précalculées en colonnes (SoA): "zones" garde (nom, type, rayon, type de réponse)
+# et les tableaux numpy lat/lon en radians, cos(lat) et rayon servent au calcul vectorisé;
+# "large" liste les zones trop grandes pour l'approximation équirectangulaire
+geofence_cache = {"mtime": None, "checked": None, "zones": [], "lat": None, "lon": None, "cos_lat": None, "radius": None, "large": None}
 
 # Chargement des signatures MAVLink depuis le fichier de configuration
 def load_mavlink_signatures():
@@ -67,229 +167,579 @@ def load_mavlink_signatures():
         logging.error(f"Erreur lors du chargement des signatures MAVLink: {str(e)}")
         return {"mavlink_signatures": []}
 
-# Fonction pour convertir les coordonnées en format lisible
+# Fonction pour convertir les coordonnées en format lisible (degE7 -> degrés et minutes décimales)
+COORD_SCALE = 1e-7
+
 def format_coordinates(lat, lon):
-    lat_direction = "N" if lat >= 0 else "S"
-    lon_direction = "E" if lon >= 0 else "W"
+    lat_deg, lat_min = divmod(abs(lat) * COORD_SCALE, 1.0)
+    lon_deg, lon_min = divmod(abs(lon) * COORD_SCALE, 1.0)
+    
+    return f"{int(lat_deg)}°{lat_min * 60:.6f}'{'NS'[lat < 0]}, {int(lon_deg)}°{lon_min * 60:.6f}'{'EW'[lon < 0]}"
+
+# Attribue une ligne de la table de télémétrie à un nouveau drone (la table double si elle est pleine)
+def allocate_drone_row(drone_id):
+    global drone_table
+    
+    if not free_rows:
+        size = len(drone_table)
+        drone_table = np.resize(drone_table, size * 2)
+        free_rows.extend(range(size * 2 - 1, size - 1, -1))
+    
+    row = free_rows.pop()
+    drone_table[row] = 0
+    drone_table[row]["armed"] = -1
+    drone_rows[drone_id] = row
+    return row
+
+# Libère la ligne d'un drone perdu de vue
+def release_drone_row(drone_id):
+    row = drone_rows.pop(drone_id, None)
+    if row is not None:
+        free_rows.append(row)
+
+# Convertit un instant time.monotonic_ns() en date
+def wall_time(monotonic_ns):
+    return START_WALL + timedelta(microseconds=(int(monotonic_ns) - START_MONOTONIC_NS) // 1000)
+
+# Reconstitue la fiche complète d'un drone à partir de son état et de la table de télémétrie
+def export_drone(drone_id):
+    drone = detected_drones[drone_id]
+    entry = drone_table[drone_rows[drone_id]]
+    
+    record = {
+        "system_id": drone.system_id,
+        "component_id": drone.component_id,
+        "address": drone.address,
+        "first_seen": wall_time(drone.first_seen),
+        "last_seen": wall_time(entry["last_seen"]),
+        "message_types": [message_names.get(key, key) for index, key in enumerate(message_bit_keys) if drone.message_types >> index & 1],
+        "position": {},
+        "status": dict(drone.status),
+        "messages": {}
+    }
+    
+    if entry["armed"] >= 0:
+        record["status"]["armed"] = record["messages"]["armed"] = bool(entry["armed"])
     
-    lat = abs(lat / 10000000.0)
-    lon = abs(lon / 10000000.0)
+    if entry["position_update"]:
+        record["position"] = {field: int(entry[field]) for field in POSITION_FIELDS}
+        record["position"]["last_update"] = wall_time(entry["position_update"]).isoformat()
     
-    lat_deg = int(lat)
-    lat_min = (lat - lat_deg) * 60
+    for key in ("attitude", "battery", "command_ack"):
+        value = getattr(drone, key)
+        if value is not None:
+            record[key] = dict(value, last_update=wall_time(value["last_update"]).isoformat())
     
-    lon_deg = int(lon)
-    lon_min = (lon - lon_deg) * 60
+    if drone.battery_alert:
+        record["battery_alert"] = True
     
-    return f"{lat_deg}°{lat_min:.6f}'{lat_direction}, {lon_deg}°{lon_min:.6f}'{lon_direction}"
+    if drone.geofence is not None:
+        record["geofence"] = drone.geofence
+    
+    if drone.geofence_alert is not None:
+        record["geofence_alert"] = dict(drone.geofence_alert, time=wall_time(drone.geofence_alert["time"]).isoformat())
+    
+    return record
 
-# Fonction pour vérifier si un drone est dans une zone d'exclusion
-def check_geofence(lat, lon):
+# Chargement des zones d'exclusion: le fichier n'est relu que si sa date a changé,
+# et sa date n'est vérifiée qu'une fois toutes les GEOFENCE_CHECK_INTERVAL secondes
+def load_geofence_zones():
+    now = time.monotonic()
+    if geofence_cache["checked"] is not None and now - geofence_cache["checked"] < GEOFENCE_CHECK_INTERVAL:
+        return geofence_cache["zones"]
+    geofence_cache["checked"] = now
+    
     try:
-        import yaml
+        mtime = os.stat(GEOFENCE_FILE).st_mtime_ns
+    except OSError:
+        geofence_cache.update(mtime=None, zones=[])
+        return geofence_cache["zones"]
+    
+    if mtime == geofence_cache["mtime"]:
+        return geofence_cache["zones"]
+    
+    zones = []
+    coords = []
+    if yaml is None:
+        logging.error("Le module yaml est requis pour les zones d'exclusion (pip install pyyaml)")
+    else:
+        with open(GEOFENCE_FILE, 'r') as f:
+            geofence_data = yaml.safe_load(f) or {}
         
-        # Chemin vers le fichier de configuration des zones d'exclusion
-        config_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config")
-        geofence_file = os.path.join(config_dir, "geofence_zones.yml")
+        for zone_type, entries in geofence_data.items():
+            for zone in entries:
+                name, zone_lat, zone_lon, radius = zone[:4]
+                response_type = zone[4] if len(zone) > 4 else "passive"
+                zones.append((name, zone_type, radius, response_type))
+                coords.append((zone_lat, zone_lon, radius))
+        
+        logging.info(f"Chargement de {len(zones)} zones d'exclusion")
+    
+    table = np.array(coords, dtype=np.float64).reshape(-1, 3)
+    zone_lat = np.radians(table[:, 0])
+    geofence_cache.update(mtime=mtime, zones=zones, lat=zone_lat, lon=np.radians(table[:, 1]),
+                          cos_lat=np.cos(zone_lat), radius=table[:, 2],
+                          large=np.flatnonzero(table[:, 2] >= EQUIRECT_MAX_RADIUS))
+    return zones
+
+# Version compilée (numba) du calcul de distance: parcourt les zones dans l'ordre du fichier
+# et s'arrête à la première qui contient le point; retourne (indice, distance) ou (-1, 0.0)
+if njit is not None:
+    @njit(cache=True, fastmath=True, boundscheck=False)
+    def geofence_hit(lat_rad, lon_rad, zone_lat, zone_lon, cos_zone_lat, zone_radius):
+        cos_lat = cos(lat_rad)
+        for i in range(zone_lat.size):
+            dlat = zone_lat[i] - lat_rad
+            dlon = (zone_lon[i] - lon_rad + pi) % (2 * pi) - pi
+            
+            if zone_radius[i] < EQUIRECT_MAX_RADIUS:
+                distance = EARTH_RADIUS * hypot(dlon * cos_zone_lat[i], dlat)
+            else:
+                a = sin(dlat * 0.5)**2 + cos_lat * cos_zone_lat[i] * sin(dlon * 0.5)**2
+                distance = EARTH_RADIUS * 2 * asin(sqrt(min(a, 1.0)))
+            
+            if distance <= zone_radius[i]:
+                return i, distance
         
-        if not os.path.exists(geofence_file):
+        return -1, 0.0
+else:
+    geofence_hit = None
+
+# Fonction pour vérifier si un drone est dans une zone d'exclusion
+def check_geofence(lat, lon):
+    try:
+        zones = load_geofence_zones()
+        if not zones:
             return None
         
-        with open(geofence_file, 'r') as f:
-            geofence_data = yaml.safe_load(f)
+        # Convertit les coordonnées en radians
+        lat_rad = radians(lat / 10000000.0)
+        lon_rad = radians(lon / 10000000.0)
+        
+        if geofence_hit is not None:
+            index, distance = geofence_hit(lat_rad, lon_rad, geofence_cache["lat"], geofence_cache["lon"],
+                                           geofence_cache["cos_lat"], geofence_cache["radius"])
+            if index < 0:
+                return None
+        else:
+            # Distance à toutes les zones en une seule passe: approximation équirectangulaire
+            # (erreur < 0.1% sous 10 km, cos(lat) de la zone au lieu de celui du point milieu)
+            dlat = geofence_cache["lat"] - lat_rad
+            dlon = (geofence_cache["lon"] - lon_rad + np.pi) % (2 * np.pi) - np.pi
+            distances = EARTH_RADIUS * np.hypot(dlon * geofence_cache["cos_lat"], dlat)
             
-        # Convertit les coordonnées en degrés décimaux
-        lat_deg = lat / 10000000.0
-        lon_deg = lon / 10000000.0
+            # Formule de Haversine pour les grandes zones
+            large = geofence_cache["large"]
+            if large.size:
+                a = np.sin(dlat[large] * 0.5)**2 + cos(lat_rad) * geofence_cache["cos_lat"][large] * np.sin(dlon[large] * 0.5)**2
+                distances[large] = EARTH_RADIUS * 2 * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+            
+            # Première zone qui contient le drone, dans l'ordre du fichier
+            hits = distances <= geofence_cache["radius"]
+            if not hits.any():
+                return None
+            
+            index = int(np.argmax(hits))
+            distance = distances[index]
         
-        # Vérifie chaque zone d'exclusion
-        for zone_type, zones in geofence_data.items():
-            for zone in zones:
-                name, zone_lat, zone_lon, radius = zone[:4]
-                
-                # Calcul approximatif de la distance (formule de Haversine simplifiée)
-                from math import radians, sin, cos, sqrt, atan2
-                
-                R = 6371000  # Rayon de la Terre en mètres
-                
-                dlat = radians(zone_lat - lat_deg)
-                dlon = radians(zone_lon - lon_deg)
-                
-                a = sin(dlat/2)**2 + cos(radians(lat_deg)) * cos(radians(zone_lat)) * sin(dlon/2)**2
-                c = 2 * atan2(sqrt(a), sqrt(1-a))
-                
-                distance = R * c
-                
-                if distance <= radius:
-                    # Ajoute des informations supplémentaires si disponibles
-                    response_type = "passive"
-                    if len(zone) > 4:
-                        response_type = zone[4]
-                    
-                    return {
-                        "zone_name": name,
-                        "zone_type": zone_type,
-                        "distance": distance,
-                        "radius": radius,
-                        "response_type": response_type
-                    }
-                    
-        return None
+        name, zone_type, radius, response_type = zones[index]
+        return {
+            "zone_name": name,
+            "zone_type": zone_type,
+            "distance": float(distance),
+            "radius": radius,
+            "response_type": response_type
+        }
         
     except Exception as e:
         logging.error(f"Erreur lors de la vérification des zones d'exclusion: {str(e)}")
         return None
 
-# Traitement des messages MAVLink reçus
-def process_mavlink_message(msg, source_addr=None):
-    global detected_drones, messages_stats
+# Message HEARTBEAT: état et armement du drone
+def handle_heartbeat(drone_id, drone, entry, msg, now_ns):
+    drone.status["type"] = msg.type
+    drone.status["autopilot"] = msg.autopilot
+    drone.status["base_mode"] = msg.base_mode
+    drone.status["custom_mode"] = msg.custom_mode
+    drone.status["system_status"] = msg.system_status
     
-    if stop_monitoring:
-        return
+    # Détermine si le drone est armé
+    is_armed = int(bool(msg.base_mode & mavlink.MAV_MODE_FLAG_SAFETY_ARMED))
     
-    # Incrémente les statistiques pour ce type de message
-    msg_type = msg.get_type()
-    if msg_type not in messages_stats:
-        messages_stats[msg_type] = 1
+    # Journalise les changements d'état importants
+    if entry["armed"] != is_armed:
+        status_str = "ARMÉ" if is_armed else "DÉSARMÉ"
+        logging.warning(f"Drone {drone_id} est maintenant {status_str}")
+    
+    entry["armed"] = is_armed
+
+# Message GLOBAL_POSITION_INT: position et zones d'exclusion
+def handle_global_position(drone_id, drone, entry, msg, now_ns):
+    entry["lat"] = msg.lat
+    entry["lon"] = msg.lon
+    entry["alt"] = msg.alt
+    entry["relative_alt"] = msg.relative_alt
+    entry["vx"] = msg.vx
+    entry["vy"] = msg.vy
+    entry["vz"] = msg.vz
+    entry["hdg"] = msg.hdg
+    entry["position_update"] = now_ns
+    
+    # Vérifie si le drone est dans une zone d'exclusion
+    geofence_result = check_geofence(msg.lat, msg.lon)
+    
+    if geofence_result:
+        drone.geofence = geofence_result
+        
+        # Si c'est la première détection dans une zone ou une nouvelle zone
+        if drone.geofence_alert is None or geofence_result["zone_name"] != drone.geofence_alert["zone_name"]:
+            logging.warning(f"ALERTE ZONE RESTREINTE - Drone {drone_id} détecté dans une zone restreinte: {geofence_result['zone_name']} ({geofence_result['zone_type']}), "
+                            f"Distance du centre: {geofence_result['distance']:.1f}m (rayon: {geofence_result['radius']}m)")
+            
+            if geofence_result["response_type"] == "automatic":
+                logging.warning(f"La zone {geofence_result['zone_name']} autorise une réponse automatique (utiliser falcon-safe.py)")
+            
+            drone.geofence_alert = {
+                "zone_name": geofence_result["zone_name"],
+                "time": now_ns
+            }
     else:
-        messages_stats[msg_type] += 1
+        # Si le drone était dans une zone et en est sorti
+        if drone.geofence_alert is not None:
+            logging.info(f"Drone {drone_id} a quitté la zone restreinte: {drone.geofence_alert['zone_name']}")
+            
+            drone.geofence_alert = None
+        drone.geofence = None
+
+# Message ATTITUDE: attitude
+def handle_attitude(drone_id, drone, entry, msg, now_ns):
+    drone.attitude = {
+        "roll": msg.roll,
+        "pitch": msg.pitch,
+        "yaw": msg.yaw,
+        "rollspeed": msg.rollspeed,
+        "pitchspeed": msg.pitchspeed,
+        "yawspeed": msg.yawspeed,
+        "last_update": now_ns
+    }
+
+# Message BATTERY_STATUS: état de la batterie
+def handle_battery_status(drone_id, drone, entry, msg, now_ns):
+    drone.battery = {
+        "voltage": msg.voltages[0] if len(msg.voltages) > 0 else 0,
+        "current": msg.current_battery,
+        "remaining": msg.battery_remaining,
+        "last_update": now_ns
+    }
     
-    # Génère un ID unique pour ce drone
-    system_id = msg.get_srcSystem() if hasattr(msg, 'get_srcSystem') else 0
-    component_id = msg.get_srcComponent() if hasattr(msg, 'get_srcComponent') else 0
+    # Alerte batterie faible
+    if msg.battery_remaining < 20 and not drone.battery_alert:
+        logging.warning(f"BATTERIE FAIBLE - Drone {drone_id} a une batterie faible: {msg.battery_remaining}%")
+        drone.battery_alert = True
+
+# Message COMMAND_ACK: acquittement de commande
+def handle_command_ack(drone_id, drone, entry, msg, now_ns):
+    drone.command_ack = {
+        "command": msg.command,
+        "result": msg.result,
+        "last_update": now_ns
+    }
     
+    # Log des commandes importantes
+    logging.info(f"Drone {drone_id} a reçu la commande {msg.command} avec résultat {msg.result}")
+
+# Traitement spécifique par identifiant numérique de message
+MESSAGE_HANDLERS = {
+    mavlink.MAVLINK_MSG_ID_HEARTBEAT: handle_heartbeat,
+    mavlink.MAVLINK_MSG_ID_GLOBAL_POSITION_INT: handle_global_position,
+    mavlink.MAVLINK_MSG_ID_ATTITUDE: handle_attitude,
+    mavlink.MAVLINK_MSG_ID_BATTERY_STATUS: handle_battery_status,
+    mavlink.MAVLINK_MSG_ID_COMMAND_ACK: handle_command_ack,
+}
+
+# Nom des types de messages par identifiant numérique
+message_names = {}
+
+# Bit attribué à chaque type de message, dans l'ordre de première apparition: les types
+# reçus par un drone tiennent dans un entier (quelques dizaines de bits) plutôt qu'un ensemble
+message_bits = {}
+message_bit_keys = []
+
+def message_bit(msg_key):
+    bit = message_bits.get(msg_key)
+    if bit is None:
+        bit = message_bits[msg_key] = 1 << len(message_bit_keys)
+        message_bit_keys.append(msg_key)
+    return bit
+
+# Clé d'un message pour les statistiques: son identifiant numérique, ou son nom pour
+# les messages invalides ou inconnus (qui partagent un identifiant négatif)
+def message_key(msg, msg_id):
+    if msg_id < 0:
+        return msg.get_type()
+    if msg_id not in message_names:
+        message_names[msg_id] = msg.get_type()
+    return msg_id
+
+# Somme de contrôle factice: crc reste à 0 et n'est jamais calculée
+class NoCrc:
+    crc = 0
+    
+    def __init__(self, buf=None):
+        pass
+    
+    def accumulate(self, buf):
+        pass
+    
+    def accumulate_str(self, buf):
+        pass
+
+# Désactive le calcul et la vérification du CRC des trames reçues (--no-crc). Réservé aux
+# flux locaux de confiance (boucle locale, SITL): une trame corrompue serait décodée telle quelle
+def disable_crc_check():
+    for dialect in {mavlink, mavutil.mavlink}:
+        if dialect is not None:
+            dialect.MAVLINK_IGNORE_CRC = 1
+            dialect.x25crc = NoCrc
+
+# Génère un ID unique pour un drone (mis en cache: le triplet est stable d'un message à l'autre)
+@functools.lru_cache(maxsize=4096)
+def make_drone_id(system_id, component_id, source_addr):
     # Inclut l'adresse source si disponible
     drone_id = f"MAV_{system_id}_{component_id}"
     if source_addr:
         drone_id += f"_{source_addr[0]}_{source_addr[1]}"
+    return drone_id
+
+# Enregistre un message d'un drone: statistiques, découverte et dernière activité
+def register_message(system_id, component_id, msg_key, source_addr):
+    # Incrémente les statistiques pour ce type de message
+    messages_stats[msg_key] += 1
+    
+    drone_id = make_drone_id(system_id, component_id, source_addr)
     
     # Si c'est la première fois qu'on voit ce drone, l'ajoute à la liste
-    current_time = datetime.now()
-    if drone_id not in detected_drones:
-        detected_drones[drone_id] = {
-            "system_id": system_id,
-            "component_id": component_id,
-            "address": source_addr,
-            "first_seen": current_time,
-            "last_seen": current_time,
-            "message_types": set([msg_type]),
-            "position": {},
-            "status": {},
-            "messages": {}
-        }
+    with drones_lock:
+        now_ns = time.monotonic_ns()
+        row = drone_rows.get(drone_id)
+        if row is None:
+            row = allocate_drone_row(drone_id)
+            drone = detected_drones[drone_id] = DroneState(system_id, component_id, source_addr, now_ns, message_bit(msg_key))
+            
+            logging.warning(f"Nouveau drone MAVLink détecté - ID: {system_id}, Composant: {component_id}, Addr: {source_addr}")
+        else:
+            # Met à jour les informations du drone
+            drone = detected_drones[drone_id]
+            drone.message_types |= message_bit(msg_key)
         
-        logging.info(f"Nouveau drone MAVLink détecté - ID: {system_id}, Composant: {component_id}, Addr: {source_addr}")
-        print(f"\n[+] DRONE MAVLINK DÉTECTÉ")
-        print(f"    ID: {system_id}")
-        print(f"    Composant: {component_id}")
-        print(f"    Adresse: {source_addr}")
-    else:
-        # Met à jour les informations du drone
-        detected_drones[drone_id]["last_seen"] = current_time
-        detected_drones[drone_id]["message_types"].add(msg_type)
+        entry = drone_table[row]
+        entry["last_seen"] = now_ns
+    return drone_id, drone, entry, now_ns
+
+# Traitement des messages MAVLink reçus
+def process_mavlink_message(msg, source_addr=None):
+    if stop_monitoring:
+        return
+    
+    # Lecture directe de l'en-tête (présent sur tous les messages pymavlink, y compris BAD_DATA)
+    header = msg._header
+    msg_id = header.msgId
+    
+    drone_id, drone, entry, now_ns = register_message(header.srcSystem, header.srcComponent, message_key(msg, msg_id), source_addr)
     
     # Traite les types de messages spécifiques pour extraire des informations
+    handler = MESSAGE_HANDLERS.get(msg_id)
+    if handler:
+        handler(drone_id, drone, entry, msg, now_ns)
+
+# En-têtes MAVLink v1 et v2, lus sans décoder la trame
+MAV1_HEADER = struct.Struct("<BBBBBB")  # magic, len, seq, sysid, compid, msgid
+MAV2_HEADER = struct.Struct("<BBBBBBBHB")  # magic, len, incompat, compat, seq, sysid, compid, msgid (24 bits)
+MAV_CRC_SIZE = 2
+MAV_SIGNATURE_SIZE = 13
+
+# Vérifie la somme de contrôle X.25 d'une trame (en-tête sans l'octet magique, charge utile et crc_extra)
+def frame_crc_ok(data, offset, header_size, length, msgid):
+    if mavlink.MAVLINK_IGNORE_CRC:
+        return True
+    crc = mavlink.x25crc(data[offset + 1:offset + header_size + length])
+    crc.accumulate(bytes((mavlink.mavlink_map[msgid].crc_extra,)))
+    end = offset + header_size + length
+    return crc.crc == data[end] | data[end + 1] << 8
+
+# Découpe un datagramme, dans l'ordre de ses trames, en segments à décoder (bytes) et en trames
+# comptées à partir de leur seul en-tête (tuples (sysid, compid, msgid)): types sans traitement
+# spécifique dont le CRC est valide. Les trames invalides passent par le décodeur, comme avant
+def prefilter_datagram(data):
+    offset = 0
+    size = len(data)
+    segments = []
+    kept_start = None  # Début de la suite de trames à décoder en cours
     
-    # Message HEARTBEAT
-    if msg_type == "HEARTBEAT":
-        detected_drones[drone_id]["status"]["type"] = msg.type
-        detected_drones[drone_id]["status"]["autopilot"] = msg.autopilot
-        detected_drones[drone_id]["status"]["base_mode"] = msg.base_mode
-        detected_drones[drone_id]["status"]["custom_mode"] = msg.custom_mode
-        detected_drones[drone_id]["status"]["system_status"] = msg.system_status
-        
-        # Détermine si le drone est armé
-        is_armed = bool(msg.base_mode & mavlink.MAV_MODE_FLAG_SAFETY_ARMED)
-        detected_drones[drone_id]["status"]["armed"] = is_armed
-        
-        # Journalise les changements d'état importants
-        if "armed" not in detected_drones[drone_id].get("messages", {}) or detected_drones[drone_id]["messages"].get("armed") != is_armed:
-            status_str = "ARMÉ" if is_armed else "DÉSARMÉ"
-            logging.warning(f"Drone {drone_id} est maintenant {status_str}")
-            print(f"[!] Drone {drone_id} est maintenant {status_str}")
-        
-        detected_drones[drone_id]["messages"]["armed"] = is_armed
-    
-    # Message GLOBAL_POSITION_INT
-    elif msg_type == "GLOBAL_POSITION_INT":
-        detected_drones[drone_id]["position"]["lat"] = msg.lat
-        detected_drones[drone_id]["position"]["lon"] = msg.lon
-        detected_drones[drone_id]["position"]["alt"] = msg.alt
-        detected_drones[drone_id]["position"]["relative_alt"] = msg.relative_alt
-        detected_drones[drone_id]["position"]["vx"] = msg.vx
-        detected_drones[drone_id]["position"]["vy"] = msg.vy
-        detected_drones[drone_id]["position"]["vz"] = msg.vz
-        detected_drones[drone_id]["position"]["hdg"] = msg.hdg
-        detected_drones[drone_id]["position"]["last_update"] = current_time.isoformat()
-        
-        # Vérifie si le drone est dans une zone d'exclusion
-        if "lat" in detected_drones[drone_id]["position"] and "lon" in detected_drones[drone_id]["position"]:
-            geofence_result = check_geofence(msg.lat, msg.lon)
-            
-            if geofence_result:
-                detected_drones[drone_id]["geofence"] = geofence_result
-                
-                # Si c'est la première détection dans une zone ou une nouvelle zone
-                if "geofence_alert" not in detected_drones[drone_id] or detected_drones[drone_id]["geofence"]["zone_name"] != detected_drones[drone_id]["geofence_alert"]["zone_name"]:
-                    logging.warning(f"Drone {drone_id} détecté dans une zone restreinte: {geofence_result['zone_name']} ({geofence_result['zone_type']})")
-                    print(f"\n[!] ALERTE ZONE RESTREINTE")
-                    print(f"    Drone: {drone_id}")
-                    print(f"    Zone: {geofence_result['zone_name']} ({geofence_result['zone_type']})")
-                    print(f"    Distance du centre: {geofence_result['distance']:.1f}m (rayon: {geofence_result['radius']}m)")
-                    
-                    if geofence_result["response_type"] == "automatic":
-                        print(f"    [!] Cette zone autorise une réponse automatique (utiliser falcon-safe.py)")
-                    
-                    detected_drones[drone_id]["geofence_alert"] = {
-                        "zone_name": geofence_result["zone_name"],
-                        "time": current_time.isoformat()
-                    }
-            else:
-                # Si le drone était dans une zone et en est sorti
-                if "geofence_alert" in detected_drones[drone_id]:
-                    logging.info(f"Drone {drone_id} a quitté la zone restreinte: {detected_drones[drone_id]['geofence_alert']['zone_name']}")
-                    print(f"[+] Drone {drone_id} a quitté la zone restreinte")
-                    
-                    detected_drones[drone_id].pop("geofence_alert", None)
-                detected_drones[drone_id].pop("geofence", None)
-                
-    # Message ATTITUDE
-    elif msg_type == "ATTITUDE":
-        detected_drones[drone_id]["attitude"] = {
-            "roll": msg.roll,
-            "pitch": msg.pitch,
-            "yaw": msg.yaw,
-            "rollspeed": msg.rollspeed,
-            "pitchspeed": msg.pitchspeed,
-            "yawspeed": msg.yawspeed,
-            "last_update": current_time.isoformat()
-        }
+    while offset < size:
+        magic = data[offset]
+        if magic == mavlink.PROTOCOL_MARKER_V2 and offset + MAV2_HEADER.size <= size:
+            _, length, incompat_flags, _, _, system_id, component_id, msgid_low, msgid_high = MAV2_HEADER.unpack_from(data, offset)
+            msgid = msgid_low | msgid_high << 16
+            header_size = MAV2_HEADER.size
+            frame_size = header_size + length + MAV_CRC_SIZE
+            if incompat_flags & mavlink.MAVLINK_IFLAG_SIGNED:
+                frame_size += MAV_SIGNATURE_SIZE
+        elif magic == mavlink.PROTOCOL_MARKER_V1 and offset + MAV1_HEADER.size <= size:
+            _, length, _, system_id, component_id, msgid = MAV1_HEADER.unpack_from(data, offset)
+            header_size = MAV1_HEADER.size
+            frame_size = header_size + length + MAV_CRC_SIZE
+        else:
+            # Données non alignées sur une trame: le décodeur s'en charge
+            if kept_start is None:
+                kept_start = offset
+            offset = size
+            break
+        
+        if (offset + frame_size > size or msgid in MESSAGE_HANDLERS or msgid not in mavlink.mavlink_map
+                or not frame_crc_ok(data, offset, header_size, length, msgid)):
+            if kept_start is None:
+                kept_start = offset
+        else:
+            if kept_start is not None:
+                segments.append(data[kept_start:offset])
+                kept_start = None
+            segments.append((system_id, component_id, msgid))
+        
+        offset += frame_size
     
-    # Message BATTERY_STATUS
-    elif msg_type == "BATTERY_STATUS":
-        detected_drones[drone_id]["battery"] = {
-            "voltage": msg.voltages[0] if len(msg.voltages) > 0 else 0,
-            "current": msg.current_battery,
-            "remaining": msg.battery_remaining,
-            "last_update": current_time.isoformat()
-        }
+    if kept_start is not None:
+        segments.append(data[kept_start:])
+    return segments
+
+# Enregistre une trame comptée à partir de son seul en-tête
+def register_header(system_id, component_id, msgid, source_addr):
+    if stop_monitoring:
+        return
+    if msgid not in message_names:
+        message_names[msgid] = mavlink.mavlink_map[msgid].msgname
+    register_message(system_id, component_id, msgid, source_addr)
+
+# Réception groupée des datagrammes UDP: recvmmsg (Linux) lit jusqu'à RECV_BATCH paquets par appel système
+RECV_BATCH = 64
+RECV_SIZE = 2048  # Une trame MAVLink v2 fait au plus 280 octets
+RECV_BUFFER = 8 << 20  # Tampon noyau de réception (SO_RCVBUF) pour absorber les rafales
+SOCKADDR_SIZE = 16  # sizeof(struct sockaddr_in)
+
+class Iovec(ctypes.Structure):
+    _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+class Msghdr(ctypes.Structure):
+    _fields_ = [("msg_name", ctypes.c_void_p), ("msg_namelen", ctypes.c_uint32),
+                ("msg_iov", ctypes.POINTER(Iovec)), ("msg_iovlen", ctypes.c_size_t),
+                ("msg_control", ctypes.c_void_p), ("msg_controllen", ctypes.c_size_t),
+                ("msg_flags", ctypes.c_int)]
+
+class Mmsghdr(ctypes.Structure):
+    _fields_ = [("msg_hdr", Msghdr), ("msg_len", ctypes.c_uint)]
+
+try:
+    libc = ctypes.CDLL(None, use_errno=True)
+    recvmmsg = libc.recvmmsg
+    recvmmsg.argtypes = [ctypes.c_int, ctypes.POINTER(Mmsghdr), ctypes.c_uint, ctypes.c_int, ctypes.c_void_p]
+    recvmmsg.restype = ctypes.c_int
+except (OSError, AttributeError):
+    recvmmsg = None
+
+class UdpBatchReceiver:
+    def __init__(self, sock, batch=RECV_BATCH, size=RECV_SIZE):
+        if recvmmsg is None:
+            batch = 1
         
-        # Alerte batterie faible
-        if msg.battery_remaining < 20 and "battery_alert" not in detected_drones[drone_id]:
-            logging.warning(f"Drone {drone_id} a une batterie faible: {msg.battery_remaining}%")
-            print(f"[!] BATTERIE FAIBLE: Drone {drone_id} - {msg.battery_remaining}%")
-            detected_drones[drone_id]["battery_alert"] = True
-    
-    # Message COMMAND_ACK
-    elif msg_type == "COMMAND_ACK":
-        detected_drones[drone_id]["command_ack"] = {
-            "command": msg.command,
-            "result": msg.result,
-            "last_update": current_time.isoformat()
-        }
+        self.sock = sock
+        self.batch = batch
+        self.size = size
+        
+        # Tampons réutilisés d'un appel à l'autre: données, adresses sources et en-têtes
+        self.data = ctypes.create_string_buffer(batch * size)
+        self.addrs = ctypes.create_string_buffer(batch * SOCKADDR_SIZE)
+        self.iovecs = (Iovec * batch)()
+        self.headers = (Mmsghdr * batch)()
+        self.data_view = memoryview(self.data)
+        self.addr_view = memoryview(self.addrs)
+        self.addr_cache = {}
+        
+        base = ctypes.addressof(self.data)
+        addr_base = ctypes.addressof(self.addrs)
+        for i in range(batch):
+            self.iovecs[i].iov_base = base + i * size
+            self.iovecs[i].iov_len = size
+            header = self.headers[i].msg_hdr
+            header.msg_name = addr_base + i * SOCKADDR_SIZE
+            header.msg_iov = ctypes.pointer(self.iovecs[i])
+            header.msg_iovlen = 1
+    
+    # Lit les datagrammes en attente et retourne une liste de (données, (ip, port))
+    def receive(self):
+        if recvmmsg is None:
+            try:
+                return [self.sock.recvfrom(self.size)]
+            except BlockingIOError:
+                return []
+        
+        for i in range(self.batch):
+            self.headers[i].msg_hdr.msg_namelen = SOCKADDR_SIZE
+        
+        count = recvmmsg(self.sock.fileno(), self.headers, self.batch, socket.MSG_DONTWAIT, None)
+        if count < 0:
+            err = ctypes.get_errno()
+            if err in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return []
+            raise OSError(err, os.strerror(err))
         
-        # Log des commandes importantes
-        logging.info(f"Drone {drone_id} a reçu la commande {msg.command} avec résultat {msg.result}")
+        packets = []
+        for i in range(count):
+            offset = i * self.size
+            data = bytes(self.data_view[offset:offset + self.headers[i].msg_len])
+            
+            raw_addr = bytes(self.addr_view[i * SOCKADDR_SIZE:i * SOCKADDR_SIZE + 8])
+            addr = self.addr_cache.get(raw_addr)
+            if addr is None:
+                addr = (socket.inet_ntoa(raw_addr[4:8]), struct.unpack_from("!H", raw_addr, 2)[0])
+                self.addr_cache[raw_addr] = addr
+            
+            packets.append((data, addr))
+        
+        return packets
+
+# File des datagrammes reçus (le plus ancien est écrasé si elle déborde): le thread de
+# réception ne fait que lire le socket et remplir la file, process_packets décode et traite
+PACKET_QUEUE_SIZE = 8192
+packet_queue = deque(maxlen=PACKET_QUEUE_SIZE)
+packets_ready = threading.Event()
+
+# Thread de traitement des datagrammes mis en file par listen_udp
+def process_packets():
+    # Décodeur MAVLink seul, sans connexion associée (utilisé par ce seul thread)
+    parser = mavlink.MAVLink(None, use_native=USE_NATIVE)
+    
+    while not stop_monitoring:
+        if not packets_ready.wait(1.0):
+            continue
+        packets_ready.clear()
+        
+        while not stop_monitoring:
+            try:
+                data, addr = packet_queue.popleft()
+            except IndexError:
+                break
+            
+            try:
+                # Décode les messages MAVLink du datagramme qui ont un traitement spécifique,
+                # dans l'ordre des trames
+                for segment in prefilter_datagram(data):
+                    if isinstance(segment, tuple):
+                        register_header(*segment, addr)
+                    else:
+                        for msg in parser.parse_buffer(segment) or ():
+                            process_mavlink_message(msg, addr)
+            except Exception as e:
+                logging.error(f"Erreur lors du traitement des données: {str(e)}")
 
 # Fonction pour écouter les paquets UDP MAVLink
 def listen_udp(host, port):
@@ -297,30 +747,45 @@ def listen_udp(host, port):
     
     try:
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECV_BUFFER)
         sock.bind((host, port))
-        sock.settimeout(1.0)  # Timeout pour permettre l'arrêt propre
+        sock.setblocking(False)
+        
+        # Le noyau plafonne SO_RCVBUF à net.core.rmem_max (et Linux renvoie le double de la valeur accordée)
+        rcvbuf = sock.getsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF) // 2
+        if rcvbuf < RECV_BUFFER:
+            logging.warning(f"Tampon de réception limité à {rcvbuf} octets (augmentez net.core.rmem_max)")
         
         logging.info(f"Écoute MAVLink sur UDP {host}:{port}")
         print(f"[*] Écoute des paquets MAVLink sur UDP {host}:{port}...")
         
-        # Crée une connexion MAVLink pour le décodage
-        mav = mavutil.mavlink_connection('udpin:0.0.0.0:0', input=False)
+        worker = threading.Thread(target=process_packets, name="mavlink-worker")
+        worker.daemon = True
+        worker.start()
+        
+        receiver = UdpBatchReceiver(sock)
+        selector = selectors.DefaultSelector()
+        selector.register(sock, selectors.EVENT_READ)
         
         while not stop_monitoring:
             try:
-                data, addr = sock.recvfrom(1024)
-                
-                # Décode le message MAVLink
-                mav.buf = data
-                msg = mav.recv_msg()
+                # Attente d'au plus 1 seconde pour permettre l'arrêt propre
+                if not selector.select(1.0):
+                    continue
                 
-                if msg:
-                    process_mavlink_message(msg, addr)
-            except socket.timeout:
-                continue
+                # Vide la file du socket jusqu'à EAGAIN (lot incomplet)
+                while True:
+                    packets = receiver.receive()
+                    if packets:
+                        packet_queue.extend(packets)
+                        packets_ready.set()
+                    
+                    if len(packets) < receiver.batch:
+                        break
             except Exception as e:
                 logging.error(f"Erreur lors de la réception des données: {str(e)}")
-                
+        
+        selector.close()
         sock.close()
         
     except Exception as e:
@@ -333,7 +798,7 @@ def connect_mavlink_stream(connection_string):
     
     try:
         # Initialise la connexion MAVLink
-        mav_conn = mavutil.mavlink_connection(connection_string)
+        mav_conn = mavutil.mavlink_connection(connection_string, use_native=USE_NATIVE)
         logging.info(f"Connexion MAVLink établie: {connection_string}")
         print(f"[*] Connexion MAVLink établie: {connection_string}")
         
@@ -358,58 +823,68 @@ def connect_mavlink_stream(connection_string):
 def display_stats():
     global detected_drones, messages_stats, stop_monitoring
     
-    while not stop_monitoring:
-        time.sleep(10)
+    while not shutdown_event.wait(10):
+        flush_logs()
         
         if not detected_drones:
             continue
             
-        current_time = datetime.now()
         print("\n*** RÉCAPITULATIF DES DRONES MAVLINK DÉTECTÉS ***")
         print("-" * 80)
         print(f"{'ID':<20} {'SYSTÈME':<10} {'COMPOSANT':<10} {'ÉTAT':<10} {'DERNIÈRE ACTIVITÉ':<15}")
         print("-" * 80)
         
-        drones_to_remove = []
-        for drone_id, drone in detected_drones.items():
-            time_diff = (current_time - drone["last_seen"]).total_seconds()
-            
-            # Si le drone n'a pas été vu depuis plus de 60 secondes, on le retire de la liste
+        # Âge de tous les drones en une seule passe sur la table (copie des lignes sous le verrou)
+        with drones_lock:
+            drone_ids = list(drone_rows)
+            rows = np.fromiter((drone_rows[drone_id] for drone_id in drone_ids), dtype=np.intp, count=len(drone_ids))
+            entries = drone_table[rows]
+            drones = [detected_drones[drone_id] for drone_id in drone_ids]
+        ages = (time.monotonic_ns() - entries["last_seen"]) / 1e9
+        
+        # Si un drone n'a pas été vu depuis plus de 60 secondes, on le retire de la liste
+        drones_to_remove = [drone_ids[i] for i in np.flatnonzero(ages > 60)]
+        
+        for drone_id, drone, entry, time_diff in zip(drone_ids, drones, entries, ages):
             if time_diff > 60:
-                drones_to_remove.append(drone_id)
                 continue
-                
+            
             time_since = f"{int(time_diff)}s"
-            state = "ARMÉ" if drone.get("status", {}).get("armed", False) else "DÉSARMÉ"
+            state = "ARMÉ" if entry["armed"] == 1 else "DÉSARMÉ"
             
             # Affiche des informations de base
-            print(f"{drone_id:<20} {drone['system_id']:<10} {drone['component_id']:<10} {state:<10} {time_since:<15}")
+            print(f"{drone_id:<20} {drone.system_id:<10} {drone.component_id:<10} {state:<10} {time_since:<15}")
             
             # Affiche la position si disponible
-            if "position" in drone and "lat" in drone["position"] and "lon" in drone["position"]:
-                lat = drone["position"]["lat"]
-                lon = drone["position"]["lon"]
-                alt = drone["position"]["relative_alt"] / 1000.0  # Conversion en mètres
+            if entry["position_update"]:
+                alt = entry["relative_alt"] / 1000.0  # Conversion en mètres
                 
-                coords = format_coordinates(lat, lon)
+                coords = format_coordinates(int(entry["lat"]), int(entry["lon"]))
                 print(f"    Position: {coords}, Altitude: {alt:.1f}m")
             
             # Affiche l'alerte de zone géographique si applicable
-            if "geofence" in drone:
-                zone_name = drone["geofence"]["zone_name"]
-                zone_type = drone["geofence"]["zone_type"]
-                distance = drone["geofence"]["distance"]
+            if drone.geofence is not None:
+                zone_name = drone.geofence["zone_name"]
+                zone_type = drone.geofence["zone_type"]
+                distance = drone.geofence["distance"]
                 
                 print(f"    [!] Dans zone restreinte: {zone_name} ({zone_type}), Distance: {distance:.1f}m")
         
         print("-" * 80)
-        print(f"Types de messages: {', '.join(sorted(messages_stats.keys()))}")
+        print(f"Types de messages: {', '.join(sorted(message_names.get(key, key) for key in list(messages_stats)))}")
         print("-" * 80)
         
-        # Supprime les drones qui n'ont pas été vus récemment
-        for drone_id in drones_to_remove:
-            logging.info(f"Drone perdu de vue: {drone_id}")
-            del detected_drones[drone_id]
+        # Supprime les drones qui n'ont pas été vus récemment (sauf s'ils ont réémis depuis le relevé)
+        with drones_lock:
+            now_ns = time.monotonic_ns()
+            for drone_id in drones_to_remove:
+                row = drone_rows.get(drone_id)
+                if row is None or now_ns - drone_table["last_seen"][row] <= 60e9:
+                    continue
+                
+                logging.info(f"Drone perdu de vue: {drone_id}")
+                del detected_drones[drone_id]
+                release_drone_row(drone_id)
 
 # Gestion du signal d'interruption
 def signal_handler(sig, frame):
@@ -417,6 +892,8 @@ def signal_handler(sig, frame):
     
     print("\n[*] Arrêt de la surveillance MAVLink...")
     stop_monitoring = True
+    shutdown_event.set()
+    packets_ready.set()
     
     # Enregistre les résultats dans un fichier
     if detected_drones:
@@ -424,20 +901,23 @@ def signal_handler(sig, frame):
         os.makedirs(results_dir, exist_ok=True)
         results_file = os.path.join(results_dir, f"mavlink_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
         
-        # Convertit les ensembles en listes pour la sérialisation JSON
-        for drone_id in detected_drones:
-            if "message_types" in detected_drones[drone_id]:
-                detected_drones[drone_id]["message_types"] = list(detected_drones[drone_id]["message_types"])
+        # Reconstitue les fiches (télémétrie de la table, ensembles convertis en listes)
+        with drones_lock:
+            results = {drone_id: export_drone(drone_id) for drone_id in list(detected_drones)}
         
-        with open(results_file, 'w') as f:
-            json.dump(detected_drones, f, indent=2, default=str)
+        if orjson is not None:
+            with open(results_file, 'wb') as f:
+                f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2, default=str))
+        else:
+            with open(results_file, 'w') as f:
+                json.dump(results, f, indent=2, default=str)
         
         print(f"[*] Résultats enregistrés dans: {results_file}")
     
     sys.exit(0)
 
 # Fonction principale
-def main():
+def main(argv=None):
     global mavlink_signatures
     
     # Configuration des arguments de la ligne de commande
@@ -445,18 +925,29 @@ def main():
     parser.add_argument('--port', type=int, default=14550, help='Port UDP à écouter (par défaut: 14550)')
     parser.add_argument('--host', default='0.0.0.0', help='Adresse IP à écouter (par défaut: 0.0.0.0)')
     parser.add_argument('--connect', help='Connexion directe à un flux MAVLink (ex: udp:192.168.1.1:14550, tcp:localhost:5760)')
+    parser.add_argument('--no-crc', action='store_true', help='Ne pas vérifier le CRC des trames (flux local de confiance: boucle locale, SITL)')
     parser.add_argument('--capture', action='store_true', help='Capturer les paquets MAVLink dans un fichier')
     parser.add_argument('-v', '--verbose', action='store_true', help='Mode verbeux')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Configuration du niveau de logging
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
     
+    # Compile le calcul des zones d'exclusion dès le démarrage plutôt qu'au premier message
+    if geofence_hit is not None:
+        geofence_hit(0.0, 0.0, np.zeros(1), np.zeros(1), np.ones(1), np.zeros(1))
+    
+    if args.no_crc:
+        disable_crc_check()
+        logging.warning("Vérification CRC désactivée: à réserver aux flux locaux de confiance")
+    
     # Charge les signatures MAVLink
     mavlink_signatures = load_mavlink_signatures()
     
+    logging.debug(f"Décodeur MAVLink: {'natif (mavnative)' if USE_NATIVE else 'Python'}")
+    
     if not mavlink_signatures.get("mavlink_signatures"):
         logging.warning("Aucune signature MAVLink chargée. Les détections seront limitées.")
     else:
@@ -8,6 +8,7 @@
 #
 
 import argparse
+import atexit
 import json
 import logging
 import os
@@ -24,20 +25,39 @@ except ImportError:
     print("    Installez-le avec: pip install pymavlink")
     sys.exit(1)
 
-# Configuration du logger
-log_dir = os.path.expanduser("~/.falcon-defender/logs")
-os.makedirs(log_dir, exist_ok=True)
-log_file = os.path.join(log_dir, f"falcon-safe_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from logfile import LogFileHandler
+
+# Configuration du logger: le répertoire est créé par install.sh, le fichier n'est ouvert
+# qu'à la première écriture et le répertoire recréé seulement s'il manque à ce moment-là
+LOG_DIR = os.environ.get('FALCON_LOG_DIR') or os.path.expanduser("~/.falcon-defender/logs")
+log_file = os.path.join(LOG_DIR, f"falcon-safe_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
 
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler(log_file),
+        LogFileHandler(log_file, delay=True),
         logging.StreamHandler()
     ]
 )
 
+# Journal d'audit: fichier ouvert une fois en ajout, tamponné, vidé et synchronisé sur disque à la sortie
+AUDIT_BUFFER_SIZE = 1 << 16
+audit_handle = None
+audit_path = None
+
+# Utilisateur et machine figés au démarrage (évite deux appels système par entrée d'audit)
+try:
+    AUDIT_USER = os.getlogin()
+except OSError:
+    AUDIT_USER = os.environ.get("USER", "inconnu")
+AUDIT_HOST = platform.uname().node
+
 # Vérification d'autorisation
 def check_authorization(key_file=None):
     """
@@ -72,11 +92,69 @@ def check_authorization(key_file=None):
     # Fonction factice pour les tests - NE PAS UTILISER EN PRODUCTION
     return True
 
-# Fonction pour envoyer une commande RTL (Return to Launch)
-def send_rtl_command(connection_string, drone_sysid=1, drone_compid=1, wait_ack=True):
+# Attente de l'accusé de réception d'une commande
+def wait_command_ack(mav_conn, command, label, timeout=3):
     """
-    Envoie une commande RTL (Return to Launch) à un drone.
+    Attend le COMMAND_ACK correspondant à la commande envoyée.
+    Un seul recv_match filtre le type et la commande jusqu'à l'échéance.
+    """
+    msg = mav_conn.recv_match(type='COMMAND_ACK', blocking=True, timeout=timeout,
+                              condition=f'COMMAND_ACK.command == {command}')
+    
+    if msg is None:
+        logging.warning(f"Pas d'accusé de réception reçu pour la commande {label}")
+        print("[!] Pas d'accusé de réception reçu mais la commande a peut-être été exécutée")
+        return False
+    
+    if msg.result == 0:  # MAV_RESULT_ACCEPTED
+        logging.info(f"Commande {label} acceptée")
+        print(f"[+] Commande {label} acceptée!")
+    else:
+        logging.warning(f"Commande {label} rejetée, code: {msg.result}")
+        print(f"[!] Commande {label} rejetée, code: {msg.result}")
+    
+    return True
+
+# Envoi du passage en mode RTL (le code de mode dépend du firmware du drone)
+def send_mode_rtl(mav_conn, target_system, target_component, command, params):
+    mav_conn.set_mode_rtl()
+
+# Envoi d'une commande COMMAND_LONG
+def send_command_long(mav_conn, target_system, target_component, command, params):
+    mav_conn.mav.command_long_send(
+        target_system,
+        target_component,
+        command,
+        0,  # Confirmation
+        *params
+    )
+
+# Envoi du désarmement après un compte à rebours
+def send_disarm_countdown(mav_conn, target_system, target_component, command, params):
+    print(f"[!] Cette commande peut être dangereuse si le drone est en vol!")
+    
+    # Petite pause pour laisser le temps à l'opérateur d'annuler
+    for i in range(5, 0, -1):
+        print(f"[*] Désarmement dans {i} secondes... (Ctrl+C pour annuler)")
+        time.sleep(1)
+    
+    send_command_long(mav_conn, target_system, target_component, command, params)
+
+# Commandes disponibles: action -> (commande MAVLink, libellé, paramètres 1 à 7, fonction d'envoi, commande dangereuse)
+MAV_COMMANDS = {
+    'rtl': (mavutil.mavlink.MAV_CMD_NAV_RETURN_TO_LAUNCH, "RTL", (0,) * 7, send_mode_rtl, False),
+    'land': (mavutil.mavlink.MAV_CMD_NAV_LAND, "d'atterrissage", (0,) * 7, send_command_long, False),
+    'disarm': (mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM, "de désarmement", (0,) * 7, send_disarm_countdown, True),  # param1 = 0: désarmer
+}
+
+# Fonction générique d'envoi d'une commande à un drone
+def send_mav_command(connection_string, action, drone_sysid=1, drone_compid=1, wait_ack=True):
+    """
+    Se connecte au drone, envoie la commande de MAV_COMMANDS[action]
+    et attend éventuellement son accusé de réception.
     """
+    command, label, params, send, dangerous = MAV_COMMANDS[action]
+    
     logging.info(f"Tentative de connexion à {connection_string}")
     print(f"[*] Tentative de connexion à {connection_string}...")
     
@@ -93,108 +171,39 @@ def send_rtl_command(connection_string, drone_sysid=1, drone_compid=1, wait_ack=
         target_system = drone_sysid if drone_sysid != 1 else mav_conn.target_system
         target_component = drone_compid if drone_compid != 1 else mav_conn.target_component
         
-        # Envoie la commande RTL
-        logging.warning(f"Envoi de la commande RTL au drone {target_system}/{target_component}")
-        print(f"[!] Envoi de la commande RTL au drone {target_system}/{target_component}...")
+        # Envoie la commande
+        logging.warning(f"Envoi de la commande {label} au drone {target_system}/{target_component}")
+        warning = "ATTENTION: " if dangerous else ""
+        print(f"[!] {warning}Envoi de la commande {label} au drone {target_system}/{target_component}...")
         
-        # Utilise MODE_RTL (code mission dépend du firmware du drone)
-        mav_conn.set_mode_rtl()
+        send(mav_conn, target_system, target_component, command, params)
         
         # Si attente d'acknowledgement
         if wait_ack:
-            # Attend 3 secondes pour l'accusé de réception
-            ack_received = False
-            start_time = time.time()
-            
-            while time.time() - start_time < 3:
-                msg = mav_conn.recv_match(type='COMMAND_ACK', blocking=True, timeout=1)
-                if msg and msg.command == 20:  # MAV_CMD_NAV_RETURN_TO_LAUNCH
-                    ack_received = True
-                    if msg.result == 0:  # MAV_RESULT_ACCEPTED
-                        logging.info("Commande RTL acceptée")
-                        print("[+] Commande RTL acceptée!")
-                    else:
-                        logging.warning(f"Commande RTL rejetée, code: {msg.result}")
-                        print(f"[!] Commande RTL rejetée, code: {msg.result}")
-                    break
-            
-            if not ack_received:
-                logging.warning("Pas d'accusé de réception reçu pour la commande RTL")
-                print("[!] Pas d'accusé de réception reçu mais la commande a peut-être été exécutée")
+            wait_command_ack(mav_conn, command, label)
         
         # Ferme la connexion
         mav_conn.close()
         return True
         
     except Exception as e:
-        logging.error(f"Erreur lors de l'envoi de la commande RTL: {str(e)}")
+        logging.error(f"Erreur lors de l'envoi de la commande {label}: {str(e)}")
         print(f"[!] Erreur: {str(e)}")
         return False
 
+# Fonction pour envoyer une commande RTL (Return to Launch)
+def send_rtl_command(connection_string, drone_sysid=1, drone_compid=1, wait_ack=True):
+    """
+    Envoie une commande RTL (Return to Launch) à un drone.
+    """
+    return send_mav_command(connection_string, 'rtl', drone_sysid, drone_compid, wait_ack)
+
 # Fonction pour forcer l'atterrissage
 def send_land_command(connection_string, drone_sysid=1, drone_compid=1, wait_ack=True):
     """
     Envoie une commande d'atterrissage à un drone.
     """
-    logging.info(f"Tentative de connexion à {connection_string}")
-    print(f"[*] Tentative de connexion à {connection_string}...")
-    
-    try:
-        # Établit la connexion MAVLink
-        mav_conn = mavutil.mavlink_connection(connection_string)
-        
-        # Attend le heartbeat pour confirmer la connexion
-        mav_conn.wait_heartbeat()
-        logging.info(f"Connexion établie, heartbeat reçu (système: {mav_conn.target_system}, composant: {mav_conn.target_component})")
-        print(f"[+] Connexion établie! Système ID: {mav_conn.target_system}, Composant ID: {mav_conn.target_component}")
-        
-        # Utilise le système/composant du drone cible si spécifié
-        target_system = drone_sysid if drone_sysid != 1 else mav_conn.target_system
-        target_component = drone_compid if drone_compid != 1 else mav_conn.target_component
-        
-        # Envoie la commande LAND
-        logging.warning(f"Envoi de la commande d'atterrissage au drone {target_system}/{target_component}")
-        print(f"[!] Envoi de la commande d'atterrissage au drone {target_system}/{target_component}...")
-        
-        # Commande LAND
-        mav_conn.mav.command_long_send(
-            target_system,
-            target_component,
-            mavutil.mavlink.MAV_CMD_NAV_LAND,
-            0,  # Confirmation
-            0, 0, 0, 0, 0, 0, 0  # Paramètres non utilisés
-        )
-        
-        # Si attente d'acknowledgement
-        if wait_ack:
-            # Attend 3 secondes pour l'accusé de réception
-            ack_received = False
-            start_time = time.time()
-            
-            while time.time() - start_time < 3:
-                msg = mav_conn.recv_match(type='COMMAND_ACK', blocking=True, timeout=1)
-                if msg and msg.command == mavutil.mavlink.MAV_CMD_NAV_LAND:
-                    ack_received = True
-                    if msg.result == 0:  # MAV_RESULT_ACCEPTED
-                        logging.info("Commande d'atterrissage acceptée")
-                        print("[+] Commande d'atterrissage acceptée!")
-                    else:
-                        logging.warning(f"Commande d'atterrissage rejetée, code: {msg.result}")
-                        print(f"[!] Commande d'atterrissage rejetée, code: {msg.result}")
-                    break
-            
-            if not ack_received:
-                logging.warning("Pas d'accusé de réception reçu pour la commande d'atterrissage")
-                print("[!] Pas d'accusé de réception reçu mais la commande a peut-être été exécutée")
-        
-        # Ferme la connexion
-        mav_conn.close()
-        return True
-        
-    except Exception as e:
-        logging.error(f"Erreur lors de l'envoi de la commande d'atterrissage: {str(e)}")
-        print(f"[!] Erreur: {str(e)}")
-        return False
+    return send_mav_command(connection_string, 'land', drone_sysid, drone_compid, wait_ack)
 
 # Fonction pour désarmer le drone
 def send_disarm_command(connection_string, drone_sysid=1, drone_compid=1, wait_ack=True):
@@ -202,72 +211,34 @@ def send_disarm_command(connection_string, drone_sysid=1, drone_compid=1, wait_a
     Envoie une commande de désarmement à un drone.
     ATTENTION: Cela peut être dangereux si le drone est en vol!
     """
-    logging.info(f"Tentative de connexion à {connection_string}")
-    print(f"[*] Tentative de connexion à {connection_string}...")
+    return send_mav_command(connection_string, 'disarm', drone_sysid, drone_compid, wait_ack)
+
+# Retourne le fichier d'audit ouvert (rouvert si le mois a changé)
+def get_audit_handle(audit_file):
+    global audit_handle, audit_path
+    
+    if audit_handle is None or audit_path != audit_file:
+        close_audit_handle()
+        audit_handle = open(audit_file, 'ab', buffering=AUDIT_BUFFER_SIZE)
+        audit_path = audit_file
+    
+    return audit_handle
+
+# Vide le tampon du journal d'audit, le synchronise sur disque et le ferme
+def close_audit_handle():
+    global audit_handle
+    
+    if audit_handle is None:
+        return
     
     try:
-        # Établit la connexion MAVLink
-        mav_conn = mavutil.mavlink_connection(connection_string)
-        
-        # Attend le heartbeat pour confirmer la connexion
-        mav_conn.wait_heartbeat()
-        logging.info(f"Connexion établie, heartbeat reçu (système: {mav_conn.target_system}, composant: {mav_conn.target_component})")
-        print(f"[+] Connexion établie! Système ID: {mav_conn.target_system}, Composant ID: {mav_conn.target_component}")
-        
-        # Utilise le système/composant du drone cible si spécifié
-        target_system = drone_sysid if drone_sysid != 1 else mav_conn.target_system
-        target_component = drone_compid if drone_compid != 1 else mav_conn.target_component
-        
-        # Envoie la commande DISARM
-        logging.warning(f"Envoi de la commande de désarmement au drone {target_system}/{target_component}")
-        print(f"[!] ATTENTION: Envoi de la commande de désarmement au drone {target_system}/{target_component}...")
-        print(f"[!] Cette commande peut être dangereuse si le drone est en vol!")
-        
-        # Petite pause pour laisser le temps à l'opérateur d'annuler
-        for i in range(5, 0, -1):
-            print(f"[*] Désarmement dans {i} secondes... (Ctrl+C pour annuler)")
-            time.sleep(1)
-        
-        # Commande DISARM
-        mav_conn.mav.command_long_send(
-            target_system,
-            target_component,
-            mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM,
-            0,  # Confirmation
-            0,  # 0 = désarmer
-            0, 0, 0, 0, 0, 0  # Paramètres non utilisés
-        )
-        
-        # Si attente d'acknowledgement
-        if wait_ack:
-            # Attend 3 secondes pour l'accusé de réception
-            ack_received = False
-            start_time = time.time()
-            
-            while time.time() - start_time < 3:
-                msg = mav_conn.recv_match(type='COMMAND_ACK', blocking=True, timeout=1)
-                if msg and msg.command == mavutil.mavlink.MAV_CMD_COMPONENT_ARM_DISARM:
-                    ack_received = True
-                    if msg.result == 0:  # MAV_RESULT_ACCEPTED
-                        logging.info("Commande de désarmement acceptée")
-                        print("[+] Commande de désarmement acceptée!")
-                    else:
-                        logging.warning(f"Commande de désarmement rejetée, code: {msg.result}")
-                        print(f"[!] Commande de désarmement rejetée, code: {msg.result}")
-                    break
-            
-            if not ack_received:
-                logging.warning("Pas d'accusé de réception reçu pour la commande de désarmement")
-                print("[!] Pas d'accusé de réception reçu mais la commande a peut-être été exécutée")
-        
-        # Ferme la connexion
-        mav_conn.close()
-        return True
-        
-    except Exception as e:
-        logging.error(f"Erreur lors de l'envoi de la commande de désarmement: {str(e)}")
-        print(f"[!] Erreur: {str(e)}")
-        return False
+        audit_handle.flush()
+        os.fsync(audit_handle.fileno())
+    finally:
+        audit_handle.close()
+        audit_handle = None
+
+atexit.register(close_audit_handle)
 
 # Fonction pour sauvegarder les actions dans un journal d'audit
 def save_audit_log(action, connection_string, result, key_file=None):
@@ -281,8 +252,8 @@ def save_audit_log(action, connection_string, result, key_file=None):
         audit_file = os.path.join(audit_dir, f"audit_{datetime.now().strftime('%Y%m')}.log")
         
         timestamp = datetime.now().isoformat()
-        username = os.getlogin()
-        hostname = platform.uname().node
+        username = AUDIT_USER
+        hostname = AUDIT_HOST
         ip = connection_string.split(':')[1] if ':' in connection_string else connection_string
         
         entry = {
@@ -295,8 +266,12 @@ def save_audit_log(action, connection_string, result, key_file=None):
             "result": result
         }
         
-        with open(audit_file, 'a') as f:
-            f.write(json.dumps(entry) + "\n")
+        if orjson is not None:
+            payload = orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE)
+        else:
+            payload = (json.dumps(entry) + "\n").encode()
+        
+        get_audit_handle(audit_file).write(payload)
             
         logging.info(f"Action enregistrée dans le journal d'audit: {audit_file}")
         
@@ -304,7 +279,7 @@ def save_audit_log(action, connection_string, result, key_file=None):
         logging.error(f"Erreur lors de l'enregistrement dans le journal d'audit: {str(e)}")
 
 # Fonction principale
-def main():
+def main(argv=None):
     # Affiche l'avertissement
     print("\n" + "!" * 80)
     print("AVERTISSEMENT: Ce module est conçu pour être utilisé uniquement dans un cadre légal")
@@ -323,7 +298,7 @@ def main():
     parser.add_argument('--no-ack', action='store_true', help='Ne pas attendre d\'accusé de réception')
     parser.add_argument('-v', '--verbose', action='store_true', help='Mode verbeux')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Configuration du niveau de logging
     if args.verbose:
@@ -344,19 +319,13 @@ def main():
         return False
     
     # Exécute l'action demandée
-    result = False
-    
-    if args.action == 'rtl':
-        print("\n[*] Tentative d'envoi d'une commande de retour à la base (RTL)...")
-        result = send_rtl_command(args.connect, args.sysid, args.compid, not args.no_ack)
-    
-    elif args.action == 'land':
-        print("\n[*] Tentative d'envoi d'une commande d'atterrissage...")
-        result = send_land_command(args.connect, args.sysid, args.compid, not args.no_ack)
-    
-    elif args.action == 'disarm':
-        print("\n[*] Tentative d'envoi d'une commande de désarmement...")
-        result = send_disarm_command(args.connect, args.sysid, args.compid, not args.no_ack)
+    descriptions = {
+        'rtl': "de retour à la base (RTL)",
+        'land': "d'atterrissage",
+        'disarm': "de désarmement"
+    }
+    print(f"\n[*] Tentative d'envoi d'une commande {descriptions[args.action]}...")
+    result = send_mav_command(args.connect, args.action, args.sysid, args.compid, not args.no_ack)
     
     # Enregistre l'action dans le journal d'audit
     save_audit_log(args.action, args.connect, result, args.key)
@@ -4,43 +4,153 @@
 #
 
 import argparse
+import ctypes
+import fcntl
 import logging
+import mmap
 import os
+import select
 import signal
+import socket
+import struct
+import subprocess
 import sys
 import threading
 import time
-from datetime import datetime
+from collections import deque
+from datetime import datetime, timedelta
 import json
 
 try:
-    from scapy.layers.dot11 import Dot11, Dot11Beacon, Dot11Elt, Dot11ProbeResp
-    from scapy.layers.radiotap import RadioTap
-    from scapy.sendrecv import sniff
-    from scapy.packet import Packet
-    from scapy.fields import *
+    import numpy as np
 except ImportError:
-    print("[!] Erreur: Le module scapy est requis.")
-    print("    Installez-le avec: pip install scapy")
+    print("[!] Erreur: Le module numpy est requis.")
+    print("    Installez-le avec: pip install numpy")
     sys.exit(1)
 
-# Configuration du logger
-log_dir = os.path.expanduser("~/.falcon-defender/logs")
-os.makedirs(log_dir, exist_ok=True)
-log_file = os.path.join(log_dir, f"falcon-scan_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Décodage des trames brutes (compilable avec mypyc)
+from wifi_frames import parse_ies, parse_radiotap_frame, parse_radiotap_header
+
+# Recherche des motifs de signature en une seule passe (optionnelle)
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Configuration nl80211 directe de l'interface (optionnelle, Linux)
+try:
+    from pyroute2 import IW, IPRoute
+    from pyroute2.netlink import NLM_F_ACK, NLM_F_REQUEST
+    from pyroute2.netlink.nl80211 import IFTYPE_NAMES, NL80211_NAMES, nl80211cmd
+except ImportError:
+    IW = None
+
+from logfile import LogFileHandler
+
+# Configuration du logger: le répertoire est créé par install.sh, le fichier n'est ouvert
+# qu'à la première écriture et le répertoire recréé seulement s'il manque à ce moment-là
+LOG_DIR = os.environ.get('FALCON_LOG_DIR') or os.path.expanduser("~/.falcon-defender/logs")
+log_file = os.path.join(LOG_DIR, f"falcon-scan_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
 
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler(log_file),
+        LogFileHandler(log_file, delay=True),
         logging.StreamHandler()
     ]
 )
 
 # Variables globales
-detected_drones = {}
 stop_scanning = False
+scan_stopped = threading.Event()  # Réveille les threads en attente à l'arrêt
+
+# Horodatage: les instants sont mesurés avec time.monotonic() et ne sont convertis
+# en date qu'à l'enregistrement des résultats, à partir de cette référence
+START_WALL = datetime.now()
+START_MONOTONIC = time.monotonic()
+
+# Drones détectés en colonnes (SoA): une ligne par drone, retrouvée via drone_rows
+# (clé: BSSID en entier 48 bits). name_idx est l'indice de la signature
+MAX_DRONES = 256
+DRONE_FIELDS = [("bssid", "u8"), ("ssid", "S32"), ("name_idx", "u2"), ("channel", "u1"),
+                ("signal", "i1"), ("first_seen", "f8"), ("last_seen", "f8")]
+drone_table = np.zeros(MAX_DRONES, dtype=DRONE_FIELDS)
+drone_rows = {}
+free_rows = list(range(MAX_DRONES - 1, -1, -1))
+
+# Détections transmises par le thread de capture au thread d'affichage (append/popleft atomiques),
+# seul ce dernier modifie drone_table
+detection_events = deque(maxlen=65536)
+EVENT_DRAIN_INTERVAL = 0.5
+DISPLAY_INTERVAL = 10
+
+# Erreurs d'analyse dans le thread de capture: au plus un message par intervalle, avec le nombre d'erreurs
+PACKET_ERROR_LOG_INTERVAL = 10
+packet_errors = 0
+last_packet_error_log = float("-inf")
+
+# Automate Aho-Corasick des motifs SSID (valeur: indice de la signature)
+ssid_automaton = None
+
+# OUI des signatures: préfixes 24 bits triés (recherche dichotomique) et indice de signature associé,
+# plus les OUI de forme non standard comparés en texte
+oui_prefixes = np.zeros(0, dtype=np.uint32)
+oui_indices = np.zeros(0, dtype=np.intp)
+oui_others = []
+
+# Capture par anneau mmap AF_PACKET (TPACKET_V3): le noyau remplit des blocs de trames lus sans appel système
+SOL_PACKET = 263
+PACKET_RX_RING = 5
+PACKET_VERSION = 10
+TPACKET_V3 = 2
+ETH_P_ALL = 0x0003
+ARPHRD_IEEE80211_RADIOTAP = 803
+TP_STATUS_KERNEL = 0
+TP_STATUS_USER = 1
+SO_ATTACH_FILTER = 26
+
+RING_BLOCK_SIZE = 1 << 18
+RING_BLOCK_COUNT = 32
+RING_FRAME_SIZE = 2048
+RING_BLOCK_TIMEOUT = 100  # ms avant que le noyau rende un bloc partiellement rempli
+RING_POLL_TIMEOUT = 1000  # ms
+
+# Filtre BPF classique: ne laisse passer que les beacons (0x80) et probe responses (0x50).
+# it_len (petit-boutiste) est relu à chaque trame pour trouver le frame control 802.11
+BEACON_BPF = (
+    (0x30, 0, 0, 3),        # ldb [3]
+    (0x64, 0, 0, 8),        # lsh #8
+    (0x07, 0, 0, 0),        # tax
+    (0x30, 0, 0, 2),        # ldb [2]
+    (0x4c, 0, 0, 0),        # or x
+    (0x07, 0, 0, 0),        # tax          X = it_len
+    (0x50, 0, 0, 0),        # ldb [x + 0]  frame control
+    (0x54, 0, 0, 0xfc),     # and #0xfc    type + sous-type
+    (0x15, 1, 0, 0x80),     # jeq #0x80    beacon
+    (0x15, 0, 1, 0x50),     # jeq #0x50    probe response
+    (0x06, 0, 0, 0x40000),  # ret #262144  trame acceptée
+    (0x06, 0, 0, 0),        # ret #0       trame ignorée
+)
+# Même filtre pour scapy (compilé par tcpdump)
+BEACON_FILTER = "type mgt and (subtype beacon or subtype probe-resp)"
+
+# tpacket_block_desc: block_status, num_pkts, offset_to_first_pkt (à partir de l'octet 8)
+BLOCK_HEADER = struct.Struct("<III")
+# tpacket3_hdr: tp_next_offset, tp_snaplen, tp_mac
+FRAME_HEADER = struct.Struct("<I8xI8xH")
+
+# Saut de canal par ioctl Wireless Extensions (un seul socket, pas de processus par saut)
+SIOCSIWFREQ = 0x8B04
+IW_FREQ_FIXED = 0x01
+IWREQ_FREQ = struct.Struct("16sihBB8x")  # struct iwreq: ifr_name, iw_freq {m, e, i, flags}
+HOP_CHANNELS = tuple(range(1, 14))
+HOP_INTERVAL = 0.25
 
 # Chargement des signatures de drones depuis le fichier de configuration
 def load_drone_signatures():
@@ -51,25 +161,225 @@ def load_drone_signatures():
         
         if not os.path.exists(config_file):
             logging.warning(f"Fichier de signatures introuvable: {config_file}")
-            return {
+            return normalize_signatures({
                 "wifi_signatures": [
                     {"name": "DJI Phantom", "ssid_patterns": ["DJI-", "Phantom"], "oui": ["60:60:1F", "34:D2:62"]},
                     {"name": "Parrot AR", "ssid_patterns": ["ardrone", "Parrot"], "oui": ["90:03:B7", "00:26:7E"]},
                     {"name": "Skydio", "ssid_patterns": ["skydio", "Skydio-"], "oui": ["F0:F0:02"]}
                 ]
-            }
+            })
             
+        if orjson is not None:
+            with open(config_file, 'rb') as f:
+                return normalize_signatures(orjson.loads(f.read()))
+        
         with open(config_file, 'r') as f:
-            return json.load(f)
+            return normalize_signatures(json.load(f))
             
     except Exception as e:
         logging.error(f"Erreur lors du chargement des signatures: {str(e)}")
         return {"wifi_signatures": []}
 
-# Fonction de détection des drones via WiFi
-def detect_drone_wifi(pkt):
-    global detected_drones
+# Met les motifs SSID et les OUI en minuscules une fois pour toutes au chargement
+def normalize_signatures(signatures):
+    signatures["wifi_signatures"] = [
+        {
+            **drone,
+            "ssid_patterns": [pattern.lower() for pattern in drone["ssid_patterns"]],
+            "oui": [oui.lower() for oui in drone["oui"]]
+        }
+        for drone in signatures.get("wifi_signatures", [])
+    ]
+    return signatures
+
+# Construit un automate Aho-Corasick à partir de couples (motif, indice de signature)
+def build_automaton(words):
+    automaton = ahocorasick.Automaton()
+    for word, index in words:
+        # Pour un motif présent dans plusieurs signatures, la première l'emporte
+        if word and word not in automaton:
+            automaton.add_word(word, index)
+    
+    if len(automaton) == 0:
+        return None
+    
+    automaton.make_automaton()
+    return automaton
+
+# Compile les motifs SSID en automate et les OUI en table triée de préfixes 24 bits
+def build_signature_index(signatures):
+    global ssid_automaton, oui_prefixes, oui_indices, oui_others
+    
+    wifi_signatures = signatures["wifi_signatures"]
+    
+    if ahocorasick is not None:
+        ssid_automaton = build_automaton((pattern, index) for index, drone in enumerate(wifi_signatures) for pattern in drone["ssid_patterns"])
+    
+    # OUI standards (aa:bb:cc) en entiers; les autres formes restent des préfixes texte
+    prefixes = []
+    indices = []
+    oui_others = []
+    for index, drone in enumerate(wifi_signatures):
+        for oui in drone["oui"]:
+            try:
+                prefix = int(oui.replace(":", ""), 16) if len(oui) == 8 and oui[2] == oui[5] == ":" else None
+            except ValueError:
+                prefix = None
+            
+            if prefix is None:
+                oui_others.append((oui, index))
+            else:
+                prefixes.append(prefix)
+                indices.append(index)
+    
+    # Tri par préfixe puis par indice: pour un OUI partagé, la première signature l'emporte
+    prefixes = np.array(prefixes, dtype=np.uint32)
+    indices = np.array(indices, dtype=np.intp)
+    order = np.lexsort((indices, prefixes))
+    oui_prefixes, first = np.unique(prefixes[order], return_index=True)
+    oui_indices = indices[order][first]
+
+# Retourne l'indice de la signature dont un OUI préfixe le BSSID (entier 48 bits)
+def match_oui(bssid):
+    match = None
+    
+    if len(oui_prefixes):
+        prefix = bssid >> 24
+        position = np.searchsorted(oui_prefixes, prefix)
+        if position < len(oui_prefixes) and oui_prefixes[position] == prefix:
+            match = int(oui_indices[position])
+    
+    if oui_others:
+        text = format_bssid(bssid)
+        for oui, index in oui_others:
+            if (match is None or index < match) and text.startswith(oui):
+                match = index
+    
+    return match
+
+# Retourne l'indice de la signature correspondant au SSID ou au BSSID (la première dans l'ordre du fichier)
+def match_drone_signature(ssid, bssid):
+    wifi_signatures = drone_signatures["wifi_signatures"]
+    
+    # Signatures déjà en minuscules (normalize_signatures): seul le paquet est converti, une fois
+    ssid = ssid.lower()
+    match = match_oui(bssid)
+    
+    if ahocorasick is not None:
+        if ssid_automaton is not None:
+            for _, index in ssid_automaton.iter(ssid):
+                if match is None or index < match:
+                    match = index
+        return match
+    
+    for index, drone in enumerate(wifi_signatures[:match]):
+        if any(pattern in ssid for pattern in drone["ssid_patterns"]):
+            return index
+    
+    return match
+
+# Publie une détection si le SSID ou le BSSID (entier 48 bits) correspond à une signature (thread de capture)
+def detect_drone(ssid, bssid, channel, signal_strength):
+    name_idx = match_drone_signature(ssid, bssid)
+    if name_idx is None:
+        return
+    
+    detection_events.append((time.monotonic(), bssid, name_idx, ssid, channel, signal_strength))
+
+# Attribue une ligne de drone_table à un nouveau drone (la table double de taille si elle est pleine)
+def allocate_drone_row(drone_id):
+    global drone_table
+    
+    if not free_rows:
+        size = len(drone_table)
+        drone_table = np.resize(drone_table, size * 2)
+        free_rows.extend(range(size * 2 - 1, size - 1, -1))
+    
+    row = free_rows.pop()
+    drone_table[row] = 0
+    drone_rows[drone_id] = row
+    return row
+
+# Libère la ligne d'un drone perdu de vue
+def release_drone_row(drone_id):
+    row = drone_rows.pop(drone_id, None)
+    if row is not None:
+        free_rows.append(row)
+
+# Convertit un instant time.monotonic() en date
+def wall_time(monotonic):
+    return START_WALL + timedelta(seconds=float(monotonic) - START_MONOTONIC)
+
+# Formate un BSSID stocké sur 48 bits (aa:bb:cc:dd:ee:ff)
+def format_bssid(value):
+    return int(value).to_bytes(6, "big").hex(":")
+
+# Reconstitue la fiche d'un drone à partir de sa ligne dans drone_table
+def export_drone(row):
+    entry = drone_table[row]
+    return {
+        "type": drone_signatures["wifi_signatures"][entry["name_idx"]]["name"],
+        "ssid": entry["ssid"].decode('utf-8', errors='ignore'),
+        "bssid": format_bssid(entry["bssid"]),
+        "channel": int(entry["channel"]),
+        "signal": int(entry["signal"]),
+        "first_seen": wall_time(entry["first_seen"]),
+        "last_seen": wall_time(entry["last_seen"])
+    }
+
+# Applique les détections en attente à drone_table (thread d'affichage)
+def drain_detection_events():
+    while detection_events:
+        now, bssid, name_idx, ssid, channel, signal_strength = detection_events.popleft()
+        
+        row = drone_rows.get(bssid)
+        if row is None:
+            entry = drone_table[allocate_drone_row(bssid)]
+            entry["bssid"] = bssid
+            entry["ssid"] = ssid.encode('utf-8')[:32]
+            entry["name_idx"] = name_idx
+            entry["channel"] = channel
+            entry["signal"] = signal_strength
+            entry["first_seen"] = now
+            entry["last_seen"] = now
+            
+            name = drone_signatures["wifi_signatures"][name_idx]["name"]
+            bssid = format_bssid(bssid)
+            logging.warning(f"Drone détecté - Type: {name}, SSID: {ssid}, BSSID: {bssid}, Canal: {channel}, Signal: {signal_strength} dBm")
+            print(f"\n[!] DRONE DÉTECTÉ\n    Type: {name}\n    SSID: {ssid}\n    BSSID: {bssid}\n    Canal: {channel}\n    Signal: {signal_strength} dBm\n")
+        else:
+            entry = drone_table[row]
+            entry["last_seen"] = now
+            entry["signal"] = signal_strength
+
+# Journalise une erreur d'analyse de paquet sans inonder le terminal (thread de capture)
+def log_packet_error(error):
+    global packet_errors, last_packet_error_log
+    
+    packet_errors += 1
+    now = time.monotonic()
+    if now - last_packet_error_log < PACKET_ERROR_LOG_INTERVAL:
+        return
+    
+    logging.error(f"Erreur lors de l'analyse du paquet: {str(error)} ({packet_errors} erreur(s) depuis le dernier message)")
+    packet_errors = 0
+    last_packet_error_log = now
+
+# Importe scapy à la demande: seule la capture de repli en a besoin (plusieurs centaines de ms de chargement)
+def load_scapy():
+    global Dot11, Dot11Beacon, Dot11Elt, Dot11ProbeResp, RadioTap, sniff, Scapy_Exception
     
+    try:
+        from scapy.error import Scapy_Exception
+        from scapy.layers.dot11 import Dot11, Dot11Beacon, Dot11Elt, Dot11ProbeResp, RadioTap
+        from scapy.sendrecv import sniff
+    except ImportError:
+        print("[!] Erreur: Le module scapy est requis.")
+        print("    Installez-le avec: pip install scapy")
+        sys.exit(1)
+
+# Fonction de détection des drones via WiFi (rappel scapy, utilisé si l'anneau mmap est indisponible)
+def detect_drone_wifi(pkt):
     if stop_scanning:
         return
         
@@ -80,72 +390,271 @@ def detect_drone_wifi(pkt):
     # Récupère les informations du paquet
     try:
         if pkt.haslayer(Dot11Elt) and pkt.type == 0:
-            ssid = pkt[Dot11Elt].info.decode('utf-8', errors='ignore')
-            bssid = pkt[Dot11].addr2
-            signal_strength = -(256-ord(pkt[RadioTap].notdecoded[-4:-3])) if pkt.haslayer(RadioTap) else 0
-            channel = int(ord(pkt[Dot11Elt:3].info))
+            # Chaîne d'éléments d'information parcourue une seule fois
+            body = bytes(pkt[Dot11Beacon if pkt.haslayer(Dot11Beacon) else Dot11ProbeResp].payload)
+            ies = parse_ies(memoryview(body), 0, len(body))
+            
+            ssid = bytes(ies.get(0, b"")).decode('utf-8', errors='ignore')
+            bssid = int(pkt[Dot11].addr2.replace(":", ""), 16)
+            # Signal lu dans les octets bruts de l'en-tête radiotap (couche externe de la capture)
+            header = parse_radiotap_header(pkt.original) if isinstance(pkt, RadioTap) and len(pkt.original) >= 8 else None
+            signal_strength = header[2] if header is not None else 0
+            channel = ies[3][0] if ies.get(3) else 0
             
-            # Vérifie si le SSID ou le BSSID correspond à une signature de drone
-            for drone in drone_signatures["wifi_signatures"]:
-                if any(pattern.lower() in ssid.lower() for pattern in drone["ssid_patterns"]) or \
-                   any(oui.lower() in bssid.lower() for oui in drone["oui"]):
-                    
-                    drone_id = f"{bssid}_{ssid}"
-                    if drone_id not in detected_drones:
-                        detected_drones[drone_id] = {
-                            "type": drone["name"],
-                            "ssid": ssid,
-                            "bssid": bssid,
-                            "channel": channel,
-                            "signal": signal_strength,
-                            "first_seen": datetime.now(),
-                            "last_seen": datetime.now()
-                        }
-                        
-                        logging.warning(f"Drone détecté - Type: {drone['name']}, SSID: {ssid}, BSSID: {bssid}, Canal: {channel}, Signal: {signal_strength} dBm")
-                        print(f"\n[!] DRONE DÉTECTÉ\n    Type: {drone['name']}\n    SSID: {ssid}\n    BSSID: {bssid}\n    Canal: {channel}\n    Signal: {signal_strength} dBm\n")
-                    else:
-                        detected_drones[drone_id]["last_seen"] = datetime.now()
-                        detected_drones[drone_id]["signal"] = signal_strength
-                    
-                    break
+            detect_drone(ssid, bssid, channel, signal_strength)
     except Exception as e:
-        logging.error(f"Erreur lors de l'analyse du paquet: {str(e)}")
+        log_packet_error(e)
+
+# Traite une trame lue dans l'anneau mmap
+def detect_drone_frame(frame):
+    try:
+        result = parse_radiotap_frame(frame)
+        if result is not None:
+            detect_drone(*result)
+    except Exception as e:
+        log_packet_error(e)
+
+# Attache BEACON_BPF au socket: le noyau écarte les autres trames avant l'anneau
+def attach_beacon_filter(sock):
+    program = b"".join(struct.pack("HBBI", *instruction) for instruction in BEACON_BPF)
+    buffer = ctypes.create_string_buffer(program)
+    
+    # struct sock_fprog: nombre d'instructions, pointeur vers le programme
+    fprog = struct.pack("HL", len(BEACON_BPF), ctypes.addressof(buffer))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+
+# Lecteur de trames par anneau PACKET_MMAP (TPACKET_V3) sur une interface en mode moniteur
+class RingReceiver:
+    def __init__(self, interface, block_size=RING_BLOCK_SIZE, block_count=RING_BLOCK_COUNT):
+        self.block_size = block_size
+        self.block_count = block_count
+        self.block = 0
+        
+        self.sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+        try:
+            self.sock.setsockopt(SOL_PACKET, PACKET_VERSION, TPACKET_V3)
+            
+            # tpacket_req3: block_size, block_nr, frame_size, frame_nr, retire_blk_tov, sizeof_priv, feature_req_word
+            frame_count = block_size * block_count // RING_FRAME_SIZE
+            request = struct.pack("7I", block_size, block_count, RING_FRAME_SIZE, frame_count, RING_BLOCK_TIMEOUT, 0, 0)
+            self.sock.setsockopt(SOL_PACKET, PACKET_RX_RING, request)
+            attach_beacon_filter(self.sock)
+            self.sock.bind((interface, ETH_P_ALL))
+            
+            link_type = self.sock.getsockname()[3]
+            if link_type != ARPHRD_IEEE80211_RADIOTAP:
+                raise OSError(f"l'interface {interface} ne fournit pas d'en-têtes radiotap (type {link_type})")
+            
+            self.ring = mmap.mmap(self.sock.fileno(), block_size * block_count, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
+        except Exception:
+            self.sock.close()
+            raise
+        
+        self.view = memoryview(self.ring)
+        self.poller = select.poll()
+        self.poller.register(self.sock, select.POLLIN | select.POLLERR)
+    
+    # Passe chaque trame des blocs remplis par le noyau à callback, puis rend les blocs au noyau
+    def receive(self, callback, timeout=RING_POLL_TIMEOUT):
+        view = self.view
+        offset = self.block * self.block_size
+        status, count, frame = BLOCK_HEADER.unpack_from(view, offset + 8)
+        
+        if not status & TP_STATUS_USER:
+            self.poller.poll(timeout)
+            return
+        
+        while status & TP_STATUS_USER:
+            frame += offset
+            for _ in range(count):
+                next_offset, snaplen, mac = FRAME_HEADER.unpack_from(view, frame)
+                callback(view[frame + mac:frame + mac + snaplen])
+                frame += next_offset
+            
+            struct.pack_into("<I", view, offset + 8, TP_STATUS_KERNEL)
+            self.block = (self.block + 1) % self.block_count
+            offset = self.block * self.block_size
+            status, count, frame = BLOCK_HEADER.unpack_from(view, offset + 8)
+    
+    def close(self):
+        self.view.release()
+        self.ring.close()
+        self.sock.close()
+
+# Fréquence centrale (MHz) d'un canal WiFi
+def channel_to_freq(channel):
+    if channel == 14:
+        return 2484
+    if channel < 14:
+        return 2407 + channel * 5
+    return 5000 + channel * 5
+
+# Interface passée en mode moniteur par nl80211: (indice, type d'origine), restauré par restore_interface
+monitor_restore = None
+
+# Change le type nl80211 d'une interface (qui doit être arrêtée pendant le changement)
+def set_interface_type(ip, iw, index, iftype):
+    ip.link('set', index=index, state='down')
+    iw.set_interface_type(index, iftype)
+    ip.link('set', index=index, state='up')
+
+# Passe l'interface en mode moniteur et retourne le nom de l'interface de capture
+def set_monitor_mode(interface):
+    global monitor_restore
+    
+    if IW is None:
+        subprocess.run(["sudo", "airmon-ng", "start", interface], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return f"{interface}mon"
+    
+    # nl80211: l'interface change de type sans être renommée, son type d'origine est conservé
+    ip = IPRoute()
+    iw = IW()
+    try:
+        index = ip.link_lookup(ifname=interface)[0]
+        iftype = iw.get_interface_by_ifindex(index)[0].get_attr('NL80211_ATTR_IFTYPE')
+        if iftype != IFTYPE_NAMES['monitor']:
+            set_interface_type(ip, iw, index, 'monitor')
+            monitor_restore = (index, iftype)
+    finally:
+        iw.close()
+        ip.close()
+    
+    return interface
+
+# Rend à l'interface son mode d'origine (type nl80211 conservé, ou airmon-ng stop en repli)
+def restore_interface(interface):
+    if monitor_restore is None:
+        if IW is None and "mon" in interface and not interface.startswith("mon"):
+            subprocess.run(["sudo", "airmon-ng", "stop", interface], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+    
+    index, iftype = monitor_restore
+    ip = IPRoute()
+    iw = IW()
+    try:
+        set_interface_type(ip, iw, index, iftype)
+    finally:
+        iw.close()
+        ip.close()
+
+# Règle le canal de l'interface
+def set_channel(interface, channel):
+    if IW is None:
+        subprocess.run(["sudo", "iwconfig", interface, "channel", str(channel)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return
+    
+    iw = IW()
+    try:
+        set_channel_nl80211(iw, socket.if_nametoindex(interface), channel)
+    finally:
+        iw.close()
+
+# Règle le canal par une requête nl80211 sur une connexion IW déjà ouverte
+def set_channel_nl80211(iw, index, channel):
+    msg = nl80211cmd()
+    msg['cmd'] = NL80211_NAMES['NL80211_CMD_SET_WIPHY']
+    msg['attrs'] = [
+        ['NL80211_ATTR_IFINDEX', index],
+        ['NL80211_ATTR_WIPHY_FREQ', channel_to_freq(channel)]
+    ]
+    iw.nlm_request(msg, msg_type=iw.prid, msg_flags=NLM_F_REQUEST | NLM_F_ACK)
+
+# Règle le canal par l'ioctl SIOCSIWFREQ (fréquence = m * 10^e Hz)
+def set_channel_ioctl(sock, interface, channel):
+    request = IWREQ_FREQ.pack(interface.encode(), channel_to_freq(channel) * 100000, 1, 0, IW_FREQ_FIXED)
+    fcntl.ioctl(sock, SIOCSIWFREQ, request)
+
+# Parcourt les canaux à intervalle régulier tant que le scan est actif, depuis un seul thread:
+# ioctl SIOCSIWFREQ, sinon une connexion nl80211 ouverte pour tout le scan. Sans l'un ni l'autre,
+# le saut de canal est abandonné plutôt que de lancer iwconfig à chaque saut
+class ChannelHopper:
+    def __init__(self, interface, channels=HOP_CHANNELS, interval=HOP_INTERVAL):
+        self.interface = interface
+        self.channels = channels
+        self.interval = interval
+        self.thread = threading.Thread(target=self.run, name="channel-hopper", daemon=True)
+    
+    def start(self):
+        self.thread.start()
+    
+    def run(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        iw = None
+        try:
+            index = 0
+            while True:
+                channel = self.channels[index]
+                index = (index + 1) % len(self.channels)
+                
+                if iw is None:
+                    try:
+                        set_channel_ioctl(sock, self.interface, channel)
+                    except OSError as e:
+                        # Pilote sans Wireless Extensions: repli sur nl80211
+                        if IW is None:
+                            logging.warning(f"SIOCSIWFREQ indisponible ({str(e)}) et pyroute2 absent, saut de canal désactivé")
+                            return
+                        logging.debug(f"SIOCSIWFREQ indisponible ({str(e)}), saut de canal via nl80211")
+                        iw = IW()
+                        ifindex = socket.if_nametoindex(self.interface)
+                
+                if iw is not None:
+                    try:
+                        set_channel_nl80211(iw, ifindex, channel)
+                    except Exception as e:
+                        logging.debug(f"Impossible de régler le canal {channel}: {str(e)}")
+                
+                if scan_stopped.wait(self.interval):
+                    return
+        except Exception as e:
+            logging.error(f"Saut de canal interrompu: {str(e)}")
+        finally:
+            if iw is not None:
+                iw.close()
+            sock.close()
 
 # Fonction pour afficher périodiquement la liste des drones détectés
 def display_detected_drones():
-    global detected_drones
-    
+    next_display = time.monotonic() + DISPLAY_INTERVAL
     while not stop_scanning:
-        time.sleep(10)
+        time.sleep(EVENT_DRAIN_INTERVAL)
+        drain_detection_events()
+        
+        if time.monotonic() < next_display:
+            continue
+        next_display += DISPLAY_INTERVAL
         
-        if not detected_drones:
+        if not drone_rows:
             continue
             
-        current_time = datetime.now()
         print("\n*** RÉCAPITULATIF DES DRONES DÉTECTÉS ***")
         print("-" * 80)
         print(f"{'TYPE':<15} {'SSID':<20} {'BSSID':<18} {'SIGNAL':<8} {'DEPUIS':<10}")
         print("-" * 80)
         
-        drones_to_remove = []
-        for drone_id, drone in detected_drones.items():
-            time_diff = (current_time - drone["last_seen"]).total_seconds()
-            
-            # Si le drone n'a pas été vu depuis plus de 60 secondes, on le retire de la liste
-            if time_diff > 60:
-                drones_to_remove.append(drone_id)
-                continue
-                
-            time_since = f"{int(time_diff)}s"
-            print(f"{drone['type']:<15} {drone['ssid']:<20} {drone['bssid']:<18} {drone['signal']:<8} {time_since:<10}")
+        # Âge de tous les drones en une seule passe sur la table
+        drone_ids = list(drone_rows)
+        rows = np.fromiter((drone_rows[drone_id] for drone_id in drone_ids), dtype=np.intp, count=len(drone_ids))
+        ages = time.monotonic() - drone_table["last_seen"][rows]
+        
+        # Si un drone n'a pas été vu depuis plus de 60 secondes, on le retire de la liste
+        stale = ages > 60
+        wifi_signatures = drone_signatures["wifi_signatures"]
+        
+        for i in np.flatnonzero(~stale):
+            entry = drone_table[rows[i]]
+            name = wifi_signatures[entry["name_idx"]]["name"]
+            ssid = entry["ssid"].decode('utf-8', errors='ignore')
+            time_since = f"{int(ages[i])}s"
+            print(f"{name:<15} {ssid:<20} {format_bssid(entry['bssid']):<18} {int(entry['signal']):<8} {time_since:<10}")
         
         print("-" * 80)
         
         # Supprime les drones qui n'ont pas été vus récemment
-        for drone_id in drones_to_remove:
-            logging.info(f"Drone perdu de vue: {detected_drones[drone_id]['type']} ({detected_drones[drone_id]['bssid']})")
-            del detected_drones[drone_id]
+        for i in np.flatnonzero(stale):
+            entry = drone_table[rows[i]]
+            logging.info(f"Drone perdu de vue: {wifi_signatures[entry['name_idx']]['name']} ({format_bssid(entry['bssid'])})")
+            release_drone_row(drone_ids[i])
 
 # Gestion du signal d'interruption
 def signal_handler(sig, frame):
@@ -153,22 +662,32 @@ def signal_handler(sig, frame):
     
     print("\n[*] Arrêt du scan...")
     stop_scanning = True
+    scan_stopped.set()
+    drain_detection_events()
     
     # Enregistre les résultats dans un fichier
-    if detected_drones:
+    if drone_rows:
+        results = {}
+        for row in drone_rows.values():
+            drone = export_drone(row)
+            results[f"{drone['bssid']}_{drone['ssid']}"] = drone
         results_dir = os.path.expanduser("~/.falcon-defender/results")
         os.makedirs(results_dir, exist_ok=True)
         results_file = os.path.join(results_dir, f"scan_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
         
-        with open(results_file, 'w') as f:
-            json.dump(detected_drones, f, indent=2, default=str)
+        if orjson is not None:
+            with open(results_file, 'wb') as f:
+                f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2, default=str))
+        else:
+            with open(results_file, 'w') as f:
+                json.dump(results, f, indent=2, default=str)
         
         print(f"[*] Résultats enregistrés dans: {results_file}")
     
     sys.exit(0)
 
 # Fonction principale
-def main():
+def main(argv=None):
     global drone_signatures, stop_scanning
     
     # Configuration des arguments de la ligne de commande
@@ -178,7 +697,7 @@ def main():
     parser.add_argument('-t', '--time', type=int, default=0, help='Durée du scan en secondes (par défaut: indéfini)')
     parser.add_argument('-v', '--verbose', action='store_true', help='Mode verbeux')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Configuration du niveau de logging
     if args.verbose:
@@ -192,6 +711,7 @@ def main():
         sys.exit(1)
     
     logging.info(f"Chargement de {len(drone_signatures['wifi_signatures'])} signatures de drone")
+    build_signature_index(drone_signatures)
     
     # Vérification de l'interface
     try:
@@ -205,8 +725,11 @@ def main():
     # Mise en mode moniteur si nécessaire
     if "mon" not in args.interface:
         logging.info(f"Mise en mode moniteur de l'interface {args.interface}...")
-        os.system(f"sudo airmon-ng start {args.interface} > /dev/null 2>&1")
-        args.interface = f"{args.interface}mon"
+        try:
+            args.interface = set_monitor_mode(args.interface)
+        except Exception as e:
+            logging.error(f"Impossible de mettre l'interface {args.interface} en mode moniteur: {str(e)}")
+            sys.exit(1)
         
         # Vérification que l'interface monitor existe
         if not os.path.exists(f"/sys/class/net/{args.interface}"):
@@ -216,7 +739,13 @@ def main():
     # Configuration du canal si spécifié
     if args.channel:
         logging.info(f"Réglage du canal WiFi sur {args.channel}...")
-        os.system(f"sudo iwconfig {args.interface} channel {args.channel} > /dev/null 2>&1")
+        try:
+            set_channel(args.interface, args.channel)
+        except Exception as e:
+            logging.error(f"Impossible de régler le canal {args.channel}: {str(e)}")
+    else:
+        logging.info(f"Saut de canal sur les canaux {HOP_CHANNELS[0]} à {HOP_CHANNELS[-1]} toutes les {HOP_INTERVAL}s")
+        ChannelHopper(args.interface).start()
     
     # Configuration du gestionnaire de signal
     signal.signal(signal.SIGINT, signal_handler)
@@ -236,16 +765,36 @@ def main():
         # Arrêt automatique après la durée spécifiée
         threading.Timer(args.time, lambda: signal_handler(signal.SIGINT, None)).start()
     
+    # Anneau mmap par défaut, scapy.sniff en repli (interface sans radiotap, noyau sans TPACKET_V3...)
+    try:
+        receiver = RingReceiver(args.interface)
+    except OSError as e:
+        logging.warning(f"Capture PACKET_MMAP indisponible ({str(e)}), utilisation de scapy")
+        receiver = None
+    
     try:
-        sniff(iface=args.interface, prn=detect_drone_wifi, store=0)
+        if receiver is not None:
+            logging.debug("Capture par anneau PACKET_MMAP (TPACKET_V3)")
+            while not stop_scanning:
+                receiver.receive(detect_drone_frame)
+            receiver.close()
+        else:
+            load_scapy()
+            try:
+                sniff(iface=args.interface, prn=detect_drone_wifi, store=0, filter=BEACON_FILTER)
+            except Scapy_Exception as e:
+                # Filtre non compilable (tcpdump absent): tri des trames en Python
+                logging.warning(f"Filtre BPF indisponible ({str(e)}), capture sans filtre")
+                sniff(iface=args.interface, prn=detect_drone_wifi, store=0)
     except Exception as e:
         logging.error(f"Erreur lors du scan: {str(e)}")
         print(f"[!] Erreur: {str(e)}")
         
         # Restauration de l'interface si nécessaire
-        if "mon" in args.interface and not args.interface.startswith("mon"):
-            original_interface = args.interface.replace("mon", "")
-            os.system(f"sudo airmon-ng stop {args.interface} > /dev/null 2>&1")
+        try:
+            restore_interface(args.interface)
+        except Exception as e:
+            logging.error(f"Impossible de restaurer l'interface {args.interface}: {str(e)}")
         
         sys.exit(1)
 
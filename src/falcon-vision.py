@@ -4,41 +4,99 @@
 #
 
 import argparse
+import atexit
+import functools
 import json
 import logging
+import logging.handlers
 import os
+import queue
 import signal
 import sys
 import threading
 import time
-from datetime import datetime
+from collections import deque
+from datetime import datetime, timedelta
 
 try:
     import cv2
+    import numpy as np
     from ultralytics import YOLO
 except ImportError:
     print("[!] Erreur: Les modules OpenCV et Ultralytics sont requis.")
     print("    Installez-les avec: pip install opencv-python ultralytics")
     sys.exit(1)
 
+try:
+    import torch
+except ImportError:
+    torch = None
+
+try:
+    import liburing
+except ImportError:
+    liburing = None
+
+# Répertoires de travail (le répertoire personnel n'est développé qu'une fois)
+FD_HOME = os.path.expanduser("~/.falcon-defender")
+DETECTIONS_DIR = os.path.join(FD_HOME, "detections")
+VIDEOS_DIR = os.path.join(FD_HOME, "videos")
+RESULTS_DIR = os.path.join(FD_HOME, "results")
+
+# Création idempotente d'un répertoire: un seul appel système par chemin et par processus
+@functools.lru_cache(maxsize=8)
+def ensure_dir(path):
+    os.makedirs(path, exist_ok=True)
+    return path
+
 # Configuration du logger
-log_dir = os.path.expanduser("~/.falcon-defender/logs")
-os.makedirs(log_dir, exist_ok=True)
+log_dir = ensure_dir(os.path.join(FD_HOME, "logs"))
 log_file = os.path.join(log_dir, f"falcon-vision_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log")
 
+# Les enregistrements sont mis en file par le thread qui journalise (QueueHandler, déjà formatés)
+# et écrits dans le fichier et sur la console par le thread du QueueListener
+log_queue = queue.Queue(-1)
+log_listener = logging.handlers.QueueListener(log_queue, logging.FileHandler(log_file), logging.StreamHandler())
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler()
+        logging.handlers.QueueHandler(log_queue)
     ]
 )
 
 # Variables globales
-detected_drones = {}
 stop_processing = False
+gpu_available = False
+verbose = False
 model = None
+frame_preprocessor = None
+half_precision = False
+last_detections = []
+
+# Horodatage: les instants sont mesurés avec time.monotonic() et ne sont convertis
+# en date qu'à l'enregistrement des résultats, à partir de cette référence
+START_WALL = datetime.now()
+START_MONOTONIC = time.monotonic()
+
+# Détections suivies en colonnes (SoA): une ligne par objet, retrouvée via detection_rows
+# (clé: (classe, id de tracking) ou (classe, centre x, centre y) sans tracking). track_id vaut -1 sans tracking
+MAX_DETECTIONS = 256
+DETECTION_FIELDS = [("type", "S16"), ("track_id", "i8"), ("confidence", "f8"), ("first_seen", "f8"),
+                    ("last_seen", "f8"), ("center_x", "i4"), ("center_y", "i4"), ("relative_x", "f8"),
+                    ("relative_y", "f8"), ("size", "i8")]
+detection_table = np.zeros(MAX_DETECTIONS, dtype=DETECTION_FIELDS)
+detection_rows = {}
+free_rows = list(range(MAX_DETECTIONS - 1, -1, -1))
+
+# Lignes des objets vus par la dernière inférence: seules celles-ci sont prolongées sur les images sans mouvement
+visible_rows = np.empty(0, dtype=np.intp)
+
+# Délai (en secondes) sans mise à jour au-delà duquel une détection est oubliée
+DETECTION_TIMEOUT = 5
 
 # Couleurs pour la visualisation
 COLORS = {
@@ -48,191 +106,654 @@ COLORS = {
     "text": (255, 255, 255)    # Blanc pour le texte
 }
 
+# Position d'un objet dans l'image, indexée par colonne (gauche, centre, droite) puis ligne (haut, milieu, bas)
+DIRECTIONS = (("gauche haut", "gauche milieu", "gauche bas"),
+              ("centre haut", "centre milieu", "centre bas"),
+              ("droite haut", "droite milieu", "droite bas"))
+
+# Classes suivies: drones et objets volants
+WATCH_CLASSES = frozenset({"drone", "airplane", "bird", "helicopter", "kite"})
+
+# Taille d'une étiquette de détection (les étiquettes se répètent d'une image à l'autre)
+@functools.lru_cache(maxsize=1024)
+def label_size(label):
+    return cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)[0]
+
+# Modèle spécifique aux drones et moteurs TensorRT exportés à côté de lui
+MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
+DRONE_MODEL_PATH = os.path.join(MODELS_DIR, "yolov8n-drone.pt")
+
+# Taille d'entrée figée dans les moteurs TensorRT et taille de lot maximale (profil dynamique)
+ENGINE_IMGSZ = 640
+ENGINE_BATCH = 8
+
+# Calibration INT8: une image sur CALIB_INTERVAL est conservée, jusqu'à CALIB_FRAMES images
+CALIB_DIR = os.path.join(FD_HOME, "calib")
+CALIB_FRAMES = 300
+CALIB_INTERVAL = 10
+
+# Chemin du moteur TensorRT d'une précision donnée ("int8" ou "fp16")
+def engine_path(pt_path, precision):
+    return f"{os.path.splitext(pt_path)[0]}_{precision}.engine"
+
+# Exporte une seule fois le checkpoint .pt en moteur TensorRT (FP16, ou INT8 calibré sur le jeu data)
+def export_engine(pt_path, precision="fp16", data=None):
+    target = engine_path(pt_path, precision)
+    
+    if not os.path.exists(target):
+        logging.info(f"Export du modèle en moteur TensorRT {precision.upper()}: {target}")
+        print(f"[*] Export du modèle TensorRT {precision.upper()} (quelques minutes)...")
+        options = {"int8": True, "data": data} if precision == "int8" else {"half": True}
+        exported = YOLO(pt_path).export(format="engine", imgsz=ENGINE_IMGSZ, dynamic=True, batch=ENGINE_BATCH, device=0, **options)
+        os.replace(exported, target)
+    
+    return target
+
+# Exporte une seule fois le checkpoint .pt au format OpenVINO (IR FP16) pour l'inférence sur CPU
+def export_openvino(pt_path):
+    target = os.path.splitext(pt_path)[0] + "_openvino_model"
+    
+    if not os.path.isdir(target):
+        logging.info(f"Export du modèle au format OpenVINO: {target}")
+        print("[*] Export du modèle OpenVINO pour le CPU (une seule fois)...")
+        target = YOLO(pt_path).export(format="openvino", half=True, int8=False, dynamic=True, imgsz=ENGINE_IMGSZ)
+    
+    return target
+
+# Exporte le moteur INT8 calibré sur les images collectées par capture_video
+# TensorRT écrit son cache de calibration (.cache) à côté du modèle; il décrit les images précédentes
+# et est donc supprimé avant chaque export pour que la calibration porte sur les nouvelles
+def build_int8_engine():
+    data_file = os.path.join(CALIB_DIR, "calib.yaml")
+    names = [model.names[i] for i in sorted(model.names)]
+    with open(data_file, 'w') as f:
+        json.dump({"path": CALIB_DIR, "train": "images", "val": "images", "names": names}, f)
+    
+    # Une nouvelle calibration remplace l'ancien moteur et son cache
+    for stale in (engine_path(DRONE_MODEL_PATH, "int8"), os.path.splitext(DRONE_MODEL_PATH)[0] + ".cache"):
+        if os.path.exists(stale):
+            os.remove(stale)
+    
+    return export_engine(DRONE_MODEL_PATH, "int8", data_file)
+
 # Vérification et chargement du modèle YOLOv8
 def load_model():
-    # Vérifie si un modèle spécifique pour les drones existe
-    models_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "models")
-    drone_model_path = os.path.join(models_dir, "yolov8n-drone.pt")
-    
     # Si le modèle spécifique n'existe pas, utilise le modèle générique
-    if not os.path.exists(drone_model_path):
-        logging.warning(f"Modèle spécifique pour drones introuvable: {drone_model_path}")
+    if not os.path.exists(DRONE_MODEL_PATH):
+        logging.warning(f"Modèle spécifique pour drones introuvable: {DRONE_MODEL_PATH}")
         logging.info("Utilisation du modèle YOLOv8n générique")
         return YOLO("yolov8n.pt")
     
-    logging.info(f"Chargement du modèle spécifique pour drones: {drone_model_path}")
-    return YOLO(drone_model_path)
+    # Sur GPU, utilise un moteur TensorRT (INT8 calibré s'il existe, sinon FP16) plutôt que le checkpoint PyTorch
+    if torch is not None and torch.cuda.is_available():
+        try:
+            int8_engine = engine_path(DRONE_MODEL_PATH, "int8")
+            engine = int8_engine if os.path.exists(int8_engine) else export_engine(DRONE_MODEL_PATH)
+            logging.info(f"Chargement du moteur TensorRT pour drones: {engine}")
+            return YOLO(engine, task="detect")
+        except Exception as e:
+            logging.warning(f"Moteur TensorRT indisponible, utilisation du modèle PyTorch: {str(e)}")
+    else:
+        # Sans GPU CUDA, le runtime OpenVINO est nettement plus rapide que PyTorch sur CPU x86
+        try:
+            openvino_model = export_openvino(DRONE_MODEL_PATH)
+            logging.info(f"Chargement du modèle OpenVINO pour drones: {openvino_model}")
+            return YOLO(openvino_model, task="detect")
+        except Exception as e:
+            logging.warning(f"Modèle OpenVINO indisponible, utilisation du modèle PyTorch: {str(e)}")
+    
+    logging.info(f"Chargement du modèle spécifique pour drones: {DRONE_MODEL_PATH}")
+    return YOLO(DRONE_MODEL_PATH)
 
-# Traitement de la détection visuelle
-def process_frame(frame, confidence=0.4):
-    global detected_drones, model
+class GpuPreprocessor:
+    """
+    Prépare les lots d'images directement sur le GPU: chaque image BGR est copiée une seule fois
+    dans un tampon CUDA persistant, puis convertie en RGB, redimensionnée avec bandes (letterbox)
+    et normalisée dans un tenseur d'entrée préalloué de forme (lot, 3, ENGINE_IMGSZ, ENGINE_IMGSZ).
     
-    if frame is None or model is None:
-        return frame
+    Les images transitent par deux tampons hôtes en mémoire épinglée, utilisés en alternance: la copie
+    vers le GPU est asynchrone (DMA sur un flux CUDA dédié) et le flux de calcul n'attend que son
+    événement de fin, sans bloquer le thread principal.
+    """
     
-    # Infos sur le frame pour l'affichage
-    height, width = frame.shape[:2]
+    def __init__(self, width, height, batch_size, imgsz=ENGINE_IMGSZ):
+        self.shape = (height, width, 3)
+        self.scale = min(imgsz / width, imgsz / height)
+        self.resized = (round(height * self.scale), round(width * self.scale))
+        self.pad_y = (imgsz - self.resized[0]) // 2
+        self.pad_x = (imgsz - self.resized[1]) // 2
+        
+        shape = (batch_size, height, width, 3)
+        self.host = [torch.empty(shape, dtype=torch.uint8).pin_memory() for _ in range(2)]
+        self.host_arrays = [buffer.numpy() for buffer in self.host]
+        self.frames = [torch.empty(shape, dtype=torch.uint8, device="cuda") for _ in range(2)]
+        self.copy_stream = torch.cuda.Stream()
+        self.copy_done = [torch.cuda.Event(), torch.cuda.Event()]
+        self.current = 0
+        
+        # Tenseur en channels-last (NHWC): les convolutions cuDNN choisissent alors les noyaux NHWC des Tensor Cores
+        self.tensor = torch.full((batch_size, 3, imgsz, imgsz), 114 / 255, dtype=torch.float16, device="cuda")
+        self.tensor = self.tensor.contiguous(memory_format=torch.channels_last)
     
-    # Exécute la détection et le tracking
-    try:
-        results = model.track(frame, persist=True, conf=confidence, verbose=False)
-    except Exception as e:
-        logging.error(f"Erreur lors du tracking: {str(e)}")
+    def prepare(self, frames):
+        count = len(frames)
+        buffer = self.current
+        self.current ^= 1
+        
+        # Le tampon épinglé peut encore être lu par la copie lancée deux lots plus tôt
+        self.copy_done[buffer].synchronize()
+        host = self.host_arrays[buffer]
+        for i, frame in enumerate(frames):
+            np.copyto(host[i], frame)
+        
+        # Copie hôte -> GPU sur le flux dédié, attendue par le flux de calcul via son événement
+        with torch.cuda.stream(self.copy_stream):
+            self.frames[buffer][:count].copy_(self.host[buffer][:count], non_blocking=True)
+            self.copy_done[buffer].record()
+        torch.cuda.current_stream().wait_event(self.copy_done[buffer])
+        
+        # BGR (lot, H, W, 3) -> RGB (lot, 3, H, W) dans [0, 1], redimensionné au centre du tenseur d'entrée
+        rgb = self.frames[buffer][:count].flip(-1).permute(0, 3, 1, 2).to(self.tensor.dtype).div_(255)
+        resized = torch.nn.functional.interpolate(rgb, size=self.resized, mode="bilinear", align_corners=False)
+        height, width = self.resized
+        self.tensor[:count, :, self.pad_y:self.pad_y + height, self.pad_x:self.pad_x + width] = resized
+        
+        return self.tensor[:count]
+    
+    def to_frame(self, xyxy):
+        """Ramène des boîtes (x1, y1, x2, y2) du tenseur d'entrée vers l'image d'origine (tableau NumPy K x 4)"""
+        return (xyxy - (self.pad_x, self.pad_y, self.pad_x, self.pad_y)) / self.scale
+
+# Attribue une ligne de detection_table à une nouvelle détection (la table double de taille si elle est pleine)
+def allocate_detection_row(detection_id):
+    global detection_table
+    
+    if not free_rows:
+        size = len(detection_table)
+        detection_table = np.resize(detection_table, size * 2)
+        free_rows.extend(range(size * 2 - 1, size - 1, -1))
+    
+    row = free_rows.pop()
+    detection_table[row] = 0
+    detection_rows[detection_id] = row
+    return row
+
+# Libère la ligne d'une détection périmée
+def release_detection_row(detection_id):
+    row = detection_rows.pop(detection_id, None)
+    if row is not None:
+        free_rows.append(row)
+
+# Convertit un instant time.monotonic() en date
+def wall_time(monotonic):
+    return START_WALL + timedelta(seconds=float(monotonic) - START_MONOTONIC)
+
+# Reconstitue la fiche d'une détection à partir de sa ligne dans detection_table
+def export_detection(row):
+    entry = detection_table[row]
+    return {
+        "type": entry["type"].decode(),
+        "track_id": int(entry["track_id"]) if entry["track_id"] >= 0 else None,
+        "first_seen": wall_time(entry["first_seen"]),
+        "last_seen": wall_time(entry["last_seen"]),
+        "confidence": float(entry["confidence"]),
+        "position": {
+            "center_x": int(entry["center_x"]),
+            "center_y": int(entry["center_y"]),
+            "relative_x": float(entry["relative_x"]),
+            "relative_y": float(entry["relative_y"]),
+            "size": int(entry["size"])
+        }
+    }
+
+class FrameResizer:
+    """
+    Réduit les images sur le CPU avant l'inférence: le côté le plus long est ramené à ENGINE_IMGSZ,
+    proportions conservées, ce qui allège le letterbox d'Ultralytics et les copies vers le modèle.
+    """
+    
+    def __init__(self, width, height, imgsz=ENGINE_IMGSZ):
+        self.shape = (height, width, 3)
+        self.scale = imgsz / max(width, height)
+        self.size = (round(width * self.scale), round(height * self.scale))
+    
+    def prepare(self, frames):
+        return [cv2.resize(frame, self.size, interpolation=cv2.INTER_LINEAR) for frame in frames]
+    
+    def to_frame(self, xyxy):
+        """Ramène des boîtes (x1, y1, x2, y2) de l'image réduite vers l'image d'origine (tableau NumPy K x 4)"""
+        return xyxy / self.scale
+
+# Détection de mouvement: proportion minimale de pixels de premier plan pour lancer le modèle,
+# qui tourne de toute façon une image sur MOTION_KEEPALIVE pour entretenir le tracker
+MOTION_THRESHOLD = 0.002
+MOTION_KEEPALIVE = 15
+MOTION_LEARNING_RATE = 0.01
+MOTION_CPU_SCALE = 0.25
+
+class MotionGate:
+    """
+    Soustraction de fond MOG2 pour repérer les images sans activité: sur le GPU si OpenCV
+    dispose de CUDA, sinon sur le CPU à partir d'une image réduite.
+    """
+    
+    def __init__(self, threshold=MOTION_THRESHOLD):
+        self.threshold = threshold
+        self.cuda = gpu_available
+        
+        if self.cuda:
+            self.subtractor = cv2.cuda.createBackgroundSubtractorMOG2(detectShadows=False)
+            self.stream = cv2.cuda_Stream()
+            self.gpu_frame = cv2.cuda_GpuMat()
+        else:
+            self.subtractor = cv2.createBackgroundSubtractorMOG2(detectShadows=False)
+    
+    def has_motion(self, frame):
+        if self.cuda:
+            self.gpu_frame.upload(frame, self.stream)
+            mask = self.subtractor.apply(self.gpu_frame, MOTION_LEARNING_RATE, self.stream)
+            self.stream.waitForCompletion()
+            foreground = cv2.cuda.countNonZero(mask)
+            width, height = mask.size()
+        else:
+            small = cv2.resize(frame, None, fx=MOTION_CPU_SCALE, fy=MOTION_CPU_SCALE, interpolation=cv2.INTER_AREA)
+            mask = self.subtractor.apply(small, learningRate=MOTION_LEARNING_RATE)
+            foreground = cv2.countNonZero(mask)
+            height, width = mask.shape[:2]
+        
+        return foreground >= self.threshold * width * height
+
+# Prolonge, lorsqu'une image sans mouvement n'est pas passée au modèle, les seules détections vues par
+# la dernière inférence: un objet que l'inférence d'entretien ne voit plus expire normalement
+def keep_detections_alive():
+    if len(visible_rows):
+        detection_table["last_seen"][visible_rows] = time.monotonic()
+
+# Détection et tracking d'un lot d'images en un seul appel au modèle
+# Le tracker (ByteTrack) est unique et parcourt le lot dans l'ordre: les identifiants restent cohérents
+# moving: indicateur par image; les images sans mouvement ne passent pas par le modèle et reprennent
+# les détections de l'image précédente
+def process_frames(frames, confidence=0.4, annotate=True, moving=None):
+    global last_detections
+    
+    if not frames or model is None:
+        return frames
+    
+    selected = frames if moving is None else [frame for frame, active in zip(frames, moving) if active]
+    results = []
+    preprocessor = None
+    
+    if selected:
+        try:
+            # Prétraitement (GPU ou réduction CPU) si les images ont la taille annoncée par la source
+            if frame_preprocessor is not None and selected[0].shape == frame_preprocessor.shape:
+                preprocessor = frame_preprocessor
+            source = preprocessor.prepare(selected) if preprocessor is not None else selected
+            results = model.track(source, persist=True, conf=confidence, verbose=False, batch=len(selected), half=half_precision)
+        except Exception as e:
+            logging.error(f"Erreur lors du tracking: {str(e)}")
+            return frames
+    
+    # Le dessin n'est fait que si les images sont affichées, enregistrées ou capturées
+    results = iter(results)
+    for i, frame in enumerate(frames):
+        if moving is None or moving[i]:
+            last_detections = detect_objects(frame, next(results), preprocessor)
+        else:
+            keep_detections_alive()
+        
+        if annotate:
+            draw_detections(frame, last_detections)
+    
+    return frames
+
+# Traitement de la détection visuelle d'une image isolée
+def process_frame(frame, confidence=0.4, annotate=True):
+    if frame is None:
         return frame
     
-    # Traite les résultats
-    if results is not None:
-        for result in results:
-            if result is not None and hasattr(result, 'track'):
-                track = result.track
-                if track is not None:
-                    # Traitement du tracking
-                    process_tracking(track)
+    return process_frames([frame], confidence, annotate)[0]
+
+# Met à jour les objets suivis à partir du résultat d'une image et retourne les boîtes à dessiner
+# (x1, y1, x2, y2, étiquette, couleur). preprocessor: coordonnées exprimées dans l'image préparée
+# (tenseur GPU ou image réduite), à ramener vers l'image d'origine
+def detect_objects(frame, result, preprocessor=None):
+    global visible_rows
+    
+    detections = []
+    visible = []
+    
+    # Instant de l'image, lu une seule fois pour les mises à jour et le nettoyage
+    now = time.monotonic()
+    
+    # Infos sur le frame pour la position relative
+    height, width = frame.shape[:2]
+    
+    # Traitement du tracking
+    if result is not None and hasattr(result, 'track') and result.track is not None:
+        process_tracking(result.track)
     
     # Traite les résultats
-    if results is not None and len(results) > 0:
-        # Récupère les boîtes de détection
-        boxes = results[0].boxes
+    if result is not None:
+        # Récupère toutes les boîtes en une seule copie GPU -> CPU: colonnes x1, y1, x2, y2,
+        # [id de tracking,] confiance, classe
+        data = result.boxes.data.cpu().numpy()
+        tracked = data.shape[1] == 7
+        names = result.names
         
-        current_time = datetime.now()
+        # Coordonnées entières des boîtes dans l'image
+        xyxy = data[:, :4]
+        if preprocessor is not None:
+            xyxy = preprocessor.to_frame(xyxy)
+        coords = xyxy.astype(int).tolist()
         
         # Pour chaque détection
-        for box in boxes:
-            # Récupère la classe et la confiance
-            cls = int(box.cls.item())
-            conf = float(box.conf.item())
+        for i, row in enumerate(data):
+            # Récupère le nom de la classe et la confiance
+            class_name = names[int(row[-1])]
+            conf = float(row[-2])
             
-            # Récupère le nom de la classe
-            class_name = results[0].names[cls]
+            # Ne retient que les drones et les objets volants (avion, hélicoptère, oiseau, cerf-volant)
+            if class_name not in WATCH_CLASSES:
+                continue
             
-            # Pour les drones et les objets volants (avion, hélicoptère, oiseau)
-            if class_name in ["drone", "airplane", "bird", "helicopter", "kite"]:
-                # Récupère les coordonnées de la boîte
-                x1, y1, x2, y2 = [int(val) for val in box.xyxy[0].tolist()]
-                
-                # Calcule le centre et la taille
-                center_x = (x1 + x2) // 2
-                center_y = (y1 + y2) // 2
-                size = (x2 - x1) * (y2 - y1)
-                
-                # Calcule la position relative (pour l'estimation de la distance)
-                rel_x = center_x / width - 0.5  # -0.5 à 0.5, 0 = centre
-                rel_y = center_y / height - 0.5  # -0.5 à 0.5, 0 = centre
-                
-                # Récupère l'ID de tracking si disponible
-                track_id = int(box.id.item()) if box.id is not None else None
-                
-                # Crée un ID unique pour cette détection
-                detection_id = f"{class_name}_{track_id if track_id is not None else str(center_x)+'_'+str(center_y)}"
-                
-                # Détermine la couleur en fonction du tracking
-                color = COLORS["tracking"] if track_id is not None else COLORS["detection"]
-                
-                # Dessine la boîte de détection
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                
-                # Ajoute l'étiquette avec la classe et la confiance
-                label = f"{class_name.upper()}: {conf:.2f}"
-                if track_id is not None:
-                    label += f" ID:{track_id}"
-                
-                # Calcule la taille et la position du texte
-                (text_width, text_height), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 2)
-                cv2.rectangle(frame, (x1, y1 - 20), (x1 + text_width, y1), COLORS["text_bg"], -1)
-                cv2.putText(frame, label, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, COLORS["text"], 2)
+            # Récupère les coordonnées de la boîte
+            x1, y1, x2, y2 = coords[i]
+            
+            # Calcule le centre et la taille
+            center_x = (x1 + x2) // 2
+            center_y = (y1 + y2) // 2
+            size = (x2 - x1) * (y2 - y1)
+            
+            # Calcule la position relative (pour l'estimation de la distance)
+            rel_x = center_x / width - 0.5  # -0.5 à 0.5, 0 = centre
+            rel_y = center_y / height - 0.5  # -0.5 à 0.5, 0 = centre
+            
+            # Récupère l'ID de tracking si disponible
+            track_id = int(row[4]) if tracked else None
+            
+            # Crée un ID unique pour cette détection
+            detection_id = (class_name, track_id) if track_id is not None else (class_name, center_x, center_y)
+            
+            # Détermine la couleur en fonction du tracking
+            color = COLORS["tracking"] if track_id is not None else COLORS["detection"]
+            
+            # Étiquette avec la classe et la confiance
+            label = f"{class_name.upper()}: {conf:.2f}"
+            if track_id is not None:
+                label += f" ID:{track_id}"
+            
+            detections.append((x1, y1, x2, y2, label, color))
+            
+            # Ajoute ou met à jour la détection dans la table
+            row = detection_rows.get(detection_id)
+            is_new = row is None
+            if is_new:
+                row = allocate_detection_row(detection_id)
+                entry = detection_table[row]
+                entry["type"] = class_name.encode()
+                entry["track_id"] = track_id if track_id is not None else -1
+                entry["first_seen"] = now
+            else:
+                entry = detection_table[row]
+            
+            entry["last_seen"] = now
+            visible.append(row)
+            entry["confidence"] = conf
+            entry["center_x"] = center_x
+            entry["center_y"] = center_y
+            entry["relative_x"] = rel_x
+            entry["relative_y"] = rel_y
+            entry["size"] = size
+            
+            if is_new:
+                # Log et affichage de la nouvelle détection
+                logging.warning(f"Drone/objet volant détecté - Type: {class_name}, Conf: {conf:.2f}, ID: {track_id}")
                 
-                # Ajoute ou met à jour la détection dans le dictionnaire
-                if detection_id not in detected_drones:
-                    detected_drones[detection_id] = {
-                        "type": class_name,
-                        "track_id": track_id,
-                        "first_seen": current_time,
-                        "last_seen": current_time,
-                        "confidence": conf,
-                        "position": {
-                            "center_x": center_x,
-                            "center_y": center_y,
-                            "relative_x": rel_x,
-                            "relative_y": rel_y,
-                            "size": size
-                        }
-                    }
-                    
-                    # Log et affichage de la nouvelle détection
-                    logging.warning(f"Drone/objet volant détecté - Type: {class_name}, Conf: {conf:.2f}, ID: {track_id}")
-                    direction = ""
-                    if rel_x < -0.3:
-                        direction += "gauche"
-                    elif rel_x > 0.3:
-                        direction += "droite"
-                    else:
-                        direction += "centre"
-                    
-                    if rel_y < -0.3:
-                        direction += " haut"
-                    elif rel_y > 0.3:
-                        direction += " bas"
-                    else:
-                        direction += " milieu"
+                # Détail sur la console en mode verbeux (le journal contient déjà l'alerte)
+                if verbose:
+                    horizontal = (rel_x > 0.3) - (rel_x < -0.3)
+                    vertical = (rel_y > 0.3) - (rel_y < -0.3)
+                    direction = DIRECTIONS[horizontal + 1][vertical + 1]
                     
                     print(f"\n[!] DÉTECTION - {class_name.upper()}")
                     print(f"    Confiance: {conf:.2f}")
                     print(f"    Position: {direction}")
                     print(f"    ID Tracking: {track_id if track_id is not None else 'Non suivi'}")
-                else:
-                    # Mise à jour des informations
-                    detected_drones[detection_id]["last_seen"] = current_time
-                    detected_drones[detection_id]["confidence"] = conf
-                    detected_drones[detection_id]["position"] = {
-                        "center_x": center_x,
-                        "center_y": center_y,
-                        "relative_x": rel_x,
-                        "relative_y": rel_y,
-                        "size": size
-                    }
+    
+    # Nettoie les détections périmées (plus de 5 secondes sans mise à jour) en une seule passe sur la table
+    if detection_rows:
+        detection_ids = list(detection_rows)
+        rows = np.fromiter(detection_rows.values(), dtype=np.intp, count=len(detection_ids))
+        stale = now - detection_table["last_seen"][rows] > DETECTION_TIMEOUT
+        for i in np.flatnonzero(stale):
+            release_detection_row(detection_ids[i])
+    
+    visible_rows = np.array(visible, dtype=np.intp)
+    return detections
+
+# Dessine les boîtes et étiquettes des détections, le titre et le nombre d'objets suivis
+def draw_detections(frame, detections):
+    width = frame.shape[1]
+    
+    for x1, y1, x2, y2, label, color in detections:
+        # Dessine la boîte de détection
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        
+        # Calcule la taille et la position du texte
+        text_width, text_height = label_size(label)
+        cv2.rectangle(frame, (x1, y1 - 20), (x1 + text_width, y1), COLORS["text_bg"], -1)
+        cv2.putText(frame, label, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, COLORS["text"], 2)
     
     # Ajoute un titre et les infos en haut du frame
     cv2.putText(frame, "FALCON-DEFENDER", (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 120, 255), 2)
-    cv2.putText(frame, f"Détections: {len(detected_drones)}", (width - 150, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+    cv2.putText(frame, f"Détections: {len(detection_rows)}", (width - 150, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
     
-    # Nettoie les détections périmées (plus de 5 secondes sans mise à jour)
-    current_time = datetime.now()
-    detections_to_remove = []
-    for detection_id, detection in detected_drones.items():
-        time_diff = (current_time - detection["last_seen"]).total_seconds()
-        if time_diff > 5:
-            detections_to_remove.append(detection_id)
+    return frame
+
+# Captures en attente d'encodage JPEG et d'écriture (au-delà, les nouvelles captures sont ignorées)
+SNAPSHOT_QUEUE_SIZE = 32
+SNAPSHOT_JPEG_QUALITY = 90
+snapshot_queue = queue.Queue(maxsize=SNAPSHOT_QUEUE_SIZE)
+
+# Anneau io_uring du thread d'enregistrement (None: écritures classiques)
+snapshot_ring = None
+
+# Initialise l'anneau io_uring si liburing est installé et que le noyau l'autorise
+def open_snapshot_ring():
+    if liburing is None:
+        return None
     
-    for detection_id in detections_to_remove:
-        del detected_drones[detection_id]
+    try:
+        ring = liburing.Ring()
+        liburing.io_uring_queue_init(SNAPSHOT_QUEUE_SIZE, ring, 0)
+        logging.info("Écriture des captures par io_uring")
+        return ring
+    except Exception as e:
+        logging.warning(f"io_uring indisponible, écriture classique des captures: {str(e)}")
+        return None
+
+# Écrit un lot de captures encodées [(chemin, octets)]: une soumission io_uring pour tout le lot,
+# puis récolte des complétions une à une; les captures non écrites (anneau plein, erreur)
+# sont reprises par une écriture bloquante
+def write_snapshots(encoded):
+    global snapshot_ring
     
-    return frame
+    written = [False] * len(encoded)
+    if snapshot_ring is not None:
+        pending = {}
+        try:
+            for index, (image_file, data) in enumerate(encoded):
+                try:
+                    fd = os.open(image_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                except OSError:
+                    continue
+                sqe = liburing.io_uring_get_sqe(snapshot_ring)
+                if sqe is None:
+                    os.close(fd)
+                    break
+                liburing.io_uring_prep_write(sqe, fd, data, 0)
+                liburing.io_uring_sqe_set_data64(sqe, index)
+                pending[index] = fd
+            
+            if pending:
+                liburing.io_uring_submit(snapshot_ring)
+                cqe = liburing.Cqe()
+                for _ in range(len(pending)):
+                    liburing.io_uring_wait_cqe(snapshot_ring, cqe)
+                    entry = cqe[0]
+                    written[entry.user_data] = entry.res == len(encoded[entry.user_data][1])
+                    liburing.io_uring_cqe_seen(snapshot_ring, entry)
+        except Exception as e:
+            # L'anneau est dans un état inconnu: il est fermé avant les descripteurs
+            # et les captures suivantes passent par l'écriture classique
+            logging.warning(f"Erreur io_uring, écriture classique des captures: {str(e)}")
+            liburing.io_uring_queue_exit(snapshot_ring)
+            snapshot_ring = None
+        finally:
+            for fd in pending.values():
+                os.close(fd)
+    
+    for index, (image_file, data) in enumerate(encoded):
+        if written[index]:
+            continue
+        try:
+            with open(image_file, 'wb') as f:
+                f.write(data)
+            written[index] = True
+        except OSError as e:
+            logging.error(f"Erreur d'écriture de la capture {image_file}: {str(e)}")
+    
+    return written
 
-# Fonction pour enregistrer une capture en cas de détection
+# Thread d'enregistrement des captures: encode et écrit les images hors de la boucle d'inférence.
+# Lors d'une rafale, toutes les captures en attente sont traitées ensemble
+def snapshot_worker():
+    global snapshot_ring
+    
+    snapshot_ring = open_snapshot_ring()
+    while True:
+        batch = [snapshot_queue.get()]
+        while len(batch) < SNAPSHOT_QUEUE_SIZE:
+            try:
+                batch.append(snapshot_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        try:
+            encoded = []
+            for frame, image_file in batch:
+                ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, SNAPSHOT_JPEG_QUALITY])
+                if ok:
+                    encoded.append((image_file, buffer.tobytes()))
+                else:
+                    logging.error(f"Échec de l'encodage JPEG de la capture: {image_file}")
+            
+            for (image_file, _), ok in zip(encoded, write_snapshots(encoded)):
+                if ok:
+                    logging.info(f"Capture sauvegardée: {image_file}")
+                    print(f"[*] Capture sauvegardée: {image_file}")
+                else:
+                    logging.error(f"Échec de l'écriture de la capture: {image_file}")
+        except Exception as e:
+            logging.error(f"Erreur lors de l'enregistrement des captures: {str(e)}")
+        finally:
+            for _ in batch:
+                snapshot_queue.task_done()
+
+# Fonction pour enregistrer une capture en cas de détection (l'image annotée n'est plus modifiée ensuite)
 def save_detection_image(frame):
     if frame is None:
         return
         
-    results_dir = os.path.expanduser("~/.falcon-defender/detections")
-    os.makedirs(results_dir, exist_ok=True)
+    results_dir = ensure_dir(DETECTIONS_DIR)
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     image_file = os.path.join(results_dir, f"detection_{timestamp}.jpg")
     
-    cv2.imwrite(image_file, frame)
-    logging.info(f"Capture sauvegardée: {image_file}")
-    print(f"[*] Capture sauvegardée: {image_file}")
+    try:
+        snapshot_queue.put_nowait((frame, image_file))
+    except queue.Full:
+        logging.warning(f"File des captures pleine, capture ignorée: {image_file}")
+
+# Encodage H.264 matériel (NVENC) via GStreamer pour l'enregistrement vidéo
+NVENC_PIPELINE = "appsrc ! videoconvert ! nvh264enc ! h264parse ! mp4mux ! filesink location={}"
+
+# Ouvre l'enregistreur vidéo: NVENC si un GPU CUDA est présent, sinon encodage logiciel mp4v
+def open_video_writer(video_file, fps, size):
+    if gpu_available:
+        video_writer = cv2.VideoWriter(NVENC_PIPELINE.format(video_file), cv2.CAP_GSTREAMER, 0, fps, size)
+        if video_writer.isOpened():
+            logging.info("Encodage vidéo matériel NVENC (GStreamer)")
+            return video_writer
+        logging.warning("Encodeur NVENC indisponible (OpenCV sans GStreamer ou plugin nvh264enc absent), encodage mp4v")
+    
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    return cv2.VideoWriter(video_file, fourcc, fps, size)
+
+# Décodage H.264 matériel (NVDEC) via GStreamer: flux RTSP (images les plus récentes) et fichiers MP4/MOV
+NVDEC_DECODE = "h264parse ! nvh264dec ! videoconvert ! video/x-raw,format=BGR"
+NVDEC_RTSP_PIPELINE = 'rtspsrc location="{}" latency=0 ! rtph264depay ! ' + NVDEC_DECODE + " ! appsink drop=true max-buffers=1 sync=false"
+NVDEC_FILE_PIPELINE = 'filesrc location="{}" ! qtdemux ! ' + NVDEC_DECODE + " ! appsink max-buffers=4 sync=false"
+
+# Ouvre la source vidéo: NVDEC (GStreamer) pour les flux RTSP et fichiers H.264 si un GPU CUDA est présent,
+# sinon FFmpeg; les webcams (indice entier) gardent le backend par défaut
+def open_video_capture(source):
+    if isinstance(source, int):
+        return cv2.VideoCapture(source)
+    
+    if gpu_available:
+        pipeline = None
+        if source.startswith("rtsp://"):
+            pipeline = NVDEC_RTSP_PIPELINE.format(source)
+        elif source.lower().endswith((".mp4", ".mov")) and os.path.isfile(source):
+            pipeline = NVDEC_FILE_PIPELINE.format(source)
+        
+        if pipeline is not None:
+            cap = cv2.VideoCapture(pipeline, cv2.CAP_GSTREAMER)
+            if cap.isOpened():
+                logging.info("Décodage vidéo matériel NVDEC (GStreamer)")
+                return cap
+            logging.warning("Décodeur NVDEC indisponible (OpenCV sans GStreamer, plugin nvh264dec absent ou flux non H.264), décodage FFmpeg")
+    
+    cap = cv2.VideoCapture(source, cv2.CAP_FFMPEG)
+    if cap.isOpened():
+        return cap
+    
+    # OpenCV compilé sans FFmpeg: backend par défaut
+    return cv2.VideoCapture(source)
+
+# Nombre d'images en attente entre deux étages du pipeline (lecture, inférence, écriture)
+PIPELINE_PREFETCH = 16
+
+# Thread de lecture: décode les images de la source vers read_q, None marque la fin du flux
+def read_frames(cap, read_q, stop_event):
+    while not stop_event.is_set():
+        ret, frame = cap.read()
+        if not ret:
+            break
+        read_q.put(frame)
+    
+    read_q.put(None)
+
+# Thread d'écriture: encode les images annotées de write_q dans la vidéo, jusqu'à None
+def write_frames(video_writer, write_q):
+    while True:
+        frame = write_q.get()
+        if frame is None:
+            break
+        video_writer.write(frame)
 
 # Fonction principale de capture vidéo
-def capture_video(source, confidence, display, record, snapshot):
-    global stop_processing, model
+def capture_video(source, confidence, display, record, snapshot, calibrate=False, batch_size=1, motion_gate=False):
+    global stop_processing, model, frame_preprocessor
     
     try:
         # Initialise la capture vidéo
         if source.isdigit():
             source = int(source)
             
-        cap = cv2.VideoCapture(source)
+        cap = open_video_capture(source)
         
         if not cap.isOpened():
             logging.error(f"Impossible d'ouvrir la source vidéo: {source}")
@@ -251,65 +772,145 @@ def capture_video(source, confidence, display, record, snapshot):
         # Configuration de l'enregistrement vidéo si demandé
         video_writer = None
         if record:
-            results_dir = os.path.expanduser("~/.falcon-defender/videos")
-            os.makedirs(results_dir, exist_ok=True)
+            results_dir = ensure_dir(VIDEOS_DIR)
             
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             video_file = os.path.join(results_dir, f"record_{timestamp}.mp4")
             
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            video_writer = cv2.VideoWriter(video_file, fourcc, fps, (width, height))
+            video_writer = open_video_writer(video_file, fps, (width, height))
             
             logging.info(f"Enregistrement vidéo activé: {video_file}")
             print(f"[*] Enregistrement vidéo: {video_file}")
         
+        # Collecte des images de calibration INT8 si demandé
+        calib_count = 0
+        if calibrate:
+            calib_images = ensure_dir(os.path.join(CALIB_DIR, "images"))
+            print(f"[*] Calibration INT8: collecte de {CALIB_FRAMES} images dans {calib_images}")
+        
         # Boucle principale de traitement vidéo
-        last_snapshot_time = datetime.now()
+        last_snapshot_time = time.monotonic()
+        frame_index = 0
+        
+        # Les images ne sont annotées que si elles sont affichées, enregistrées ou capturées
+        annotate = display or record or snapshot > 0
         
-        while not stop_processing:
-            ret, frame = cap.read()
+        # Prétraitement des lots: sur le GPU dans des tampons CUDA persistants, sinon réduction
+        # sur le CPU des images plus grandes que l'entrée du modèle
+        frame_preprocessor = None
+        if torch is not None and torch.cuda.is_available() and width > 0 and height > 0:
+            frame_preprocessor = GpuPreprocessor(width, height, batch_size)
+            logging.info("Prétraitement des images sur le GPU")
+        elif max(width, height) > ENGINE_IMGSZ:
+            frame_preprocessor = FrameResizer(width, height)
+            logging.info(f"Images réduites à {frame_preprocessor.size[0]}x{frame_preprocessor.size[1]} avant l'inférence")
+        
+        # Pipeline: lecture et écriture dans leurs threads, inférence et tracking (état du tracker)
+        # ainsi que l'affichage (HighGUI) dans le thread principal
+        read_q = queue.Queue(maxsize=PIPELINE_PREFETCH)
+        stop_event = threading.Event()
+        reader = threading.Thread(target=read_frames, args=(cap, read_q, stop_event), daemon=True)
+        reader.start()
+        
+        write_q = None
+        writer = None
+        if video_writer is not None:
+            write_q = queue.Queue(maxsize=PIPELINE_PREFETCH)
+            writer = threading.Thread(target=write_frames, args=(video_writer, write_q), daemon=True)
+            writer.start()
+        
+        # Filtrage des images sans mouvement si demandé
+        gate = MotionGate() if motion_gate else None
+        
+        # Les images sont accumulées par lots de batch_size avant l'inférence, avec leur indicateur de mouvement
+        pending = deque(maxlen=batch_size)
+        pending_moving = deque(maxlen=batch_size)
+        quit_requested = False
+        stream_ended = False
+        
+        while not stop_processing and not quit_requested:
+            frame = read_q.get()
             
-            if not ret:
+            if frame is None:
+                stream_ended = True
                 logging.warning("Fin du flux vidéo ou erreur de lecture")
-                break
-            
-            # Traite le frame avec la détection
-            processed_frame = process_frame(frame, confidence)
-            
-            # Enregistre le frame si l'enregistrement est activé
-            if video_writer is not None:
-                video_writer.write(processed_frame)
-            
-            # Prend des captures périodiques si demandé
-            if snapshot > 0 and detected_drones:
-                current_time = datetime.now()
-                time_diff = (current_time - last_snapshot_time).total_seconds()
+                if not pending:
+                    break
+            else:
+                # Conserve une image brute sur CALIB_INTERVAL, puis exporte et charge le moteur INT8
+                if calibrate and calib_count < CALIB_FRAMES and frame_index % CALIB_INTERVAL == 0:
+                    cv2.imwrite(os.path.join(calib_images, f"calib_{calib_count:04d}.jpg"), frame)
+                    calib_count += 1
+                    if calib_count == CALIB_FRAMES:
+                        model = YOLO(build_int8_engine(), task="detect")
+                        print("[*] Moteur INT8 calibré et chargé")
+                moving = gate is None or gate.has_motion(frame) or frame_index % MOTION_KEEPALIVE == 0
+                frame_index += 1
                 
-                if time_diff >= snapshot:
-                    save_detection_image(processed_frame)
-                    last_snapshot_time = current_time
+                pending.append(frame)
+                pending_moving.append(moving)
+                if len(pending) < batch_size:
+                    continue
             
-            # Affiche le frame si demandé
-            if display:
-                cv2.imshow("Falcon-Defender Vision", processed_frame)
-                
-                # Vérifie les touches
-                key = cv2.waitKey(1) & 0xFF
-                
-                # 'q' pour quitter
-                if key == ord('q'):
-                    break
+            # Traite le lot avec la détection (le dernier lot d'un flux terminé peut être incomplet)
+            processed_frames = process_frames(list(pending), confidence, annotate, list(pending_moving))
+            pending.clear()
+            pending_moving.clear()
+            
+            for processed_frame in processed_frames:
+                # Enregistre le frame si l'enregistrement est activé
+                if write_q is not None:
+                    write_q.put(processed_frame)
                 
-                # 's' pour capture manuelle
-                elif key == ord('s'):
-                    save_detection_image(processed_frame)
+                # Prend des captures périodiques si demandé
+                if snapshot > 0 and detection_rows:
+                    now = time.monotonic()
+                    
+                    if now - last_snapshot_time >= snapshot:
+                        save_detection_image(processed_frame)
+                        last_snapshot_time = now
                 
-                # 'h' pour afficher l'aide
-                elif key == ord('h'):
-                    print("\n*** COMMANDES CLAVIER ***")
-                    print("q - Quitter le programme")
-                    print("s - Prendre une capture d'écran")
-                    print("h - Afficher cette aide")
+                # Affiche le frame si demandé
+                if display:
+                    cv2.imshow("Falcon-Defender Vision", processed_frame)
+                    
+                    # Vérifie les touches
+                    key = cv2.waitKey(1) & 0xFF
+                    
+                    # 'q' pour quitter
+                    if key == ord('q'):
+                        quit_requested = True
+                        break
+                    
+                    # 's' pour capture manuelle
+                    elif key == ord('s'):
+                        save_detection_image(processed_frame)
+                    
+                    # 'h' pour afficher l'aide
+                    elif key == ord('h'):
+                        print("\n*** COMMANDES CLAVIER ***")
+                        print("q - Quitter le programme")
+                        print("s - Prendre une capture d'écran")
+                        print("h - Afficher cette aide")
+            
+            if stream_ended:
+                break
+        
+        # Arrête le thread de lecture (la file est vidée jusqu'à sa marque de fin pour le débloquer)
+        stop_event.set()
+        while not stream_ended and read_q.get() is not None:
+            pass
+        reader.join()
+        
+        # Termine l'écriture des images en attente
+        if writer is not None:
+            write_q.put(None)
+            writer.join()
+        
+        # Flux terminé avant la fin de la collecte: calibre sur les images disponibles
+        if calibrate and 0 < calib_count < CALIB_FRAMES:
+            logging.warning(f"Calibration INT8 sur {calib_count} images seulement")
+            build_int8_engine()
         
         # Nettoyage
         cap.release()
@@ -329,13 +930,14 @@ def signal_handler(sig, frame):
     stop_processing = True
     
     # Enregistre les résultats dans un fichier
-    if detected_drones:
-        results_dir = os.path.expanduser("~/.falcon-defender/results")
-        os.makedirs(results_dir, exist_ok=True)
+    if detection_rows:
+        results_dir = ensure_dir(RESULTS_DIR)
         results_file = os.path.join(results_dir, f"vision_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
         
+        # Clés au format "classe_id" ou "classe_x_y"
+        results = {"_".join(map(str, detection_id)): export_detection(row) for detection_id, row in detection_rows.items()}
         with open(results_file, 'w') as f:
-            json.dump(detected_drones, f, indent=2, default=str)
+            json.dump(results, f, indent=2, default=str)
         
         print(f"[*] Résultats enregistrés dans: {results_file}")
     
@@ -344,8 +946,8 @@ def signal_handler(sig, frame):
     sys.exit(0)
 
 # Fonction principale
-def main():
-    global model
+def main(argv=None):
+    global model, gpu_available, half_precision, verbose
     
     # Configuration des arguments de la ligne de commande
     parser = argparse.ArgumentParser(description='Falcon-Defender - Module de détection visuelle par IA')
@@ -354,13 +956,23 @@ def main():
     parser.add_argument('--display', action='store_true', help='Afficher la vidéo en direct')
     parser.add_argument('--record', action='store_true', help='Enregistrer la vidéo avec les détections')
     parser.add_argument('--snapshot', type=int, default=0, help='Prendre des captures à intervalle régulier (en secondes, 0 pour désactiver)')
+    parser.add_argument('--batch', type=int, default=1, help=f'Nombre d\'images traitées par appel au modèle (1 à {ENGINE_BATCH}, défaut 1 pour une latence minimale)')
+    parser.add_argument('--motion-gate', action='store_true', help='Ne lancer la détection que sur les images en mouvement (soustraction de fond)')
+    parser.add_argument('--calibrate', action='store_true', help='Collecter des images de calibration et exporter un moteur TensorRT INT8')
     parser.add_argument('-v', '--verbose', action='store_true', help='Mode verbeux')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     
     # Configuration du niveau de logging
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
+        verbose = True
+    
+    # PyTorch: matmuls FP32 en TF32 sur les Tensor Cores (Ampere et plus récents) et choix par cuDNN
+    # de l'algorithme de convolution le plus rapide pour la taille d'entrée, fixe pendant toute la session
+    if torch is not None:
+        torch.set_float32_matmul_precision('high')
+        torch.backends.cudnn.benchmark = True
     
     # Vérification de la présence de GPU pour l'accélération
     try:
@@ -372,6 +984,11 @@ def main():
     except:
         logging.info("OpenCV compilé sans support CUDA, utilisation du CPU")
     
+    # La calibration INT8 exporte un moteur TensorRT à partir du modèle spécifique: GPU CUDA requis
+    if args.calibrate and (torch is None or not torch.cuda.is_available() or not os.path.exists(DRONE_MODEL_PATH)):
+        print("[!] Erreur: La calibration INT8 requiert un GPU CUDA et le modèle " + DRONE_MODEL_PATH)
+        sys.exit(1)
+    
     # Charge le modèle YOLOv8
     try:
         model = load_model()
@@ -380,6 +997,12 @@ def main():
         print(f"[!] Erreur lors du chargement du modèle YOLO: {str(e)}")
         sys.exit(1)
     
+    # Modèle PyTorch sur GPU (pas de moteur TensorRT): poids en channels-last et inférence FP16
+    if torch is not None and torch.cuda.is_available() and isinstance(model.model, torch.nn.Module):
+        model.model.to(memory_format=torch.channels_last)
+        half_precision = True
+        logging.info("Modèle PyTorch en channels-last, inférence FP16")
+    
     # Configuration du gestionnaire de signal
     signal.signal(signal.SIGINT, signal_handler)
     
@@ -391,8 +1014,14 @@ def main():
     if args.display:
         print("[*] Fenêtre d'affichage activée (appuyez sur 'q' pour quitter, 's' pour capture, 'h' pour aide)")
     
+    # Enregistrement des captures en arrière-plan
+    threading.Thread(target=snapshot_worker, daemon=True).start()
+    
     # Lance la capture vidéo
-    capture_video(args.source, args.conf, args.display, args.record, args.snapshot)
+    capture_video(args.source, args.conf, args.display, args.record, args.snapshot, args.calibrate, max(1, min(args.batch, ENGINE_BATCH)), args.motion_gate)
+    
+    # Attend l'écriture des captures encore en file
+    snapshot_queue.join()
 
 def process_tracking(track):
     """Traite les informations de tracking d'un objet détecté."""
@@ -0,0 +1,19 @@
+#
+# Falcon-Defender - Journal fichier partagé par les modules
+#
+# Module autonome (hors du paquet utils, dont l'import configure déjà le logger
+# et exige cryptography)
+#
+
+import logging
+import os
+
+class LogFileHandler(logging.FileHandler):
+    """Fichier de journal ouvert à la première écriture, en créant le répertoire s'il n'existe pas"""
+
+    def _open(self):
+        try:
+            return super()._open()
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+            return super()._open()
@@ -3,16 +3,25 @@
 # Falcon-Defender - Module d'alerte
 #
 
+import fcntl
+import hashlib
 import json
 import logging
+import mmap
 import os
-import smtplib
+import queue
 import socket
-import requests
+import struct
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from .encryption import AESEncryptor
 
@@ -22,6 +31,175 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Corps des alertes email, partagés par toutes les instances et remplis avec str.format
+DETECTION_EMAIL_BODY = """
+Alerte Falcon-Defender: Détection de drone
+
+ID: {drone_id}
+Timestamp: {timestamp}
+Type: {drone_type}
+Position: {location}
+
+Ceci est une alerte automatique générée par Falcon-Defender.
+"""
+
+GEOFENCE_EMAIL_BODY = """
+ALERTE Falcon-Defender: Violation de zone interdite
+
+ID: {drone_id}
+Timestamp: {timestamp}
+Type: {drone_type}
+Position: {location}
+Zone: {zone_name} ({zone_type})
+Distance: {distance:.1f}m
+
+Ceci est une alerte automatique générée par Falcon-Defender.
+Action requise: Vérifiez la situation et prenez les mesures appropriées.
+"""
+
+COUNTERMEASURE_EMAIL_BODY = """
+ALERTE URGENTE Falcon-Defender: Contre-mesure activée
+
+ID: {drone_id}
+Timestamp: {timestamp}
+Type: {drone_type}
+Position: {location}
+Action: {action}
+Résultat: {outcome}
+
+Ceci est une alerte automatique générée par Falcon-Defender.
+Une contre-mesure a été activée et requiert une attention immédiate.
+"""
+
+# Charges utiles JSON des alertes API: la structure fixe est pré-sérialisée, seuls les champs variables
+# (horodatage, drone, position, zone, action) sont encodés à chaque alerte
+DETECTION_JSON = b'{"type":"drone_detection","timestamp":"%s","drone":%s,"location":%s,"severity":"info"}'
+GEOFENCE_JSON = b'{"type":"geofence_violation","timestamp":"%s","drone":%s,"location":%s,"geofence":%s,"severity":"warning"}'
+COUNTERMEASURE_JSON = b'{"type":"countermeasure","timestamp":"%s","drone":%s,"action":%s,"result":%s,"location":%s,"severity":"critical"}'
+
+# Sérialise une valeur en JSON (bytes), avec orjson si disponible; les types inhabituels passent par json et str()
+def dumps_json(value):
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except TypeError:
+            pass
+    return json.dumps(value, default=str).encode('utf-8')
+
+# Journal des alertes sur disque: en-tête (signature, nombre total d'alertes écrites) puis enregistrements
+# de taille fixe (empreinte du drone, horodatage, type) écrits en anneau
+ALERT_HISTORY_MAGIC = b"FALCONAH"
+ALERT_HISTORY_HEADER = struct.Struct("=8sQ")
+ALERT_HISTORY_RECORD = struct.Struct("=16sdB7x")  # 32 octets
+ALERT_HISTORY_DTYPE = [("key", "V16"), ("timestamp", "=f8"), ("type", "u1"), ("pad", "V7")]  # Même disposition, pour NumPy
+ALERT_TYPES = {"detection": 1, "geofence": 2, "countermeasure": 3}
+DRONE_KEY_SIZE = 16
+
+# Clé d'un drone dans l'historique: empreinte BLAKE2b de 16 octets de son identifiant
+def drone_key(drone_id):
+    return hashlib.blake2b(str(drone_id).encode('utf-8'), digest_size=DRONE_KEY_SIZE).digest()
+
+class AlertHistoryRing:
+    """
+    Journal circulaire des alertes envoyées, dans un fichier projeté en mémoire (mmap).
+    Taille fixe, ajout en O(1) sans allocation, et historique conservé d'une exécution à l'autre.
+    Le fichier peut être partagé par plusieurs instances ou processus: le curseur est relu dans
+    l'en-tête sous verrou (flock) à chaque accès.
+    """
+    def __init__(self, path, slots):
+        self.slots = slots
+        self.lock = threading.Lock()
+        size = ALERT_HISTORY_HEADER.size + slots * ALERT_HISTORY_RECORD.size
+        
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                resized = os.fstat(self.fd).st_size != size
+                if resized:
+                    os.ftruncate(self.fd, size)
+                self.map = mmap.mmap(self.fd, size)
+                
+                # Fichier nouveau, redimensionné ou invalide: l'historique repart de zéro
+                magic, _ = ALERT_HISTORY_HEADER.unpack_from(self.map, 0)
+                if resized or magic != ALERT_HISTORY_MAGIC:
+                    ALERT_HISTORY_HEADER.pack_into(self.map, 0, ALERT_HISTORY_MAGIC, 0)
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+        except Exception:
+            os.close(self.fd)
+            raise
+    
+    def append(self, key, timestamp, alert_type):
+        """
+        Écrit une alerte dans l'emplacement suivant de l'anneau (le plus ancien est écrasé).
+        """
+        with self.lock:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                _, cursor = ALERT_HISTORY_HEADER.unpack_from(self.map, 0)
+                offset = ALERT_HISTORY_HEADER.size + (cursor % self.slots) * ALERT_HISTORY_RECORD.size
+                ALERT_HISTORY_RECORD.pack_into(self.map, offset, key, timestamp, alert_type)
+                ALERT_HISTORY_HEADER.pack_into(self.map, 0, ALERT_HISTORY_MAGIC, cursor + 1)
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+    
+    def replay(self, since):
+        """
+        Retourne les alertes [(clé, horodatage)] postérieures à since, de la plus ancienne à la plus récente.
+        """
+        # Import différé: NumPy n'est chargé qu'à l'ouverture du journal
+        import numpy as np
+        
+        with self.lock:
+            fcntl.flock(self.fd, fcntl.LOCK_SH)
+            try:
+                _, cursor = ALERT_HISTORY_HEADER.unpack_from(self.map, 0)
+                
+                # Vue NumPy de l'anneau: le filtrage sur les horodatages est un masque vectorisé
+                table = np.frombuffer(self.map, dtype=ALERT_HISTORY_DTYPE, count=self.slots,
+                                      offset=ALERT_HISTORY_HEADER.size)
+                order = np.arange(cursor - min(cursor, self.slots), cursor) % self.slots
+                selected = order[table["timestamp"][order] >= since]
+                keys = table["key"][selected].tobytes()
+                timestamps = table["timestamp"][selected].tolist()
+                del table  # Libère la vue avant une éventuelle fermeture du mmap
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+        
+        return [(keys[i * DRONE_KEY_SIZE:(i + 1) * DRONE_KEY_SIZE], timestamp) for i, timestamp in enumerate(timestamps)]
+    
+    def close(self):
+        """
+        Écrit les pages modifiées sur disque et libère la projection.
+        """
+        with self.lock:
+            if not self.map.closed:
+                self.map.flush()
+                self.map.close()
+                os.close(self.fd)
+
+class SmtpConnection:
+    """
+    Connexion SMTP authentifiée conservée dans le pool de FalconAlert.
+    """
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.last_used = time.monotonic()
+        self.sent_count = 0
+    
+    def close(self):
+        """
+        Termine la session SMTP, sans erreur si le serveur l'a déjà fermée.
+        """
+        import smtplib
+        
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+
 class FalconAlert:
     """
     Classe pour envoyer des alertes lors de la détection de drones.
@@ -31,7 +209,23 @@ class FalconAlert:
         Initialise le gestionnaire d'alertes.
         """
         self.config = self._load_config(config_file)
-        self.alert_history = []
+        
+        # Historique des alertes pour la limitation: dernière alerte par drone (entrées expirées après
+        # same_drone_seconds) et horodatages des alertes de la dernière heure, dans l'ordre d'envoi
+        self.last_alert_times = {}
+        self.alert_expiry = deque()
+        self.recent_alerts = deque()
+        
+        # Journal persistant: les alertes encore dans les fenêtres de limitation sont rechargées au démarrage
+        self.history = None
+        if self.config["history"]["enabled"]:
+            try:
+                self.history = AlertHistoryRing(os.path.expanduser(self.config["history"]["path"]),
+                                                self.config["history"]["slots"])
+                self.load_history()
+            except (OSError, ValueError) as e:
+                logging.error(f"Erreur lors de l'ouverture de l'historique des alertes: {str(e)}")
+                self.history = None
         
         # Initialise le chiffreur pour les communications sécurisées
         if self.config.get("encryption_key"):
@@ -43,6 +237,111 @@ class FalconAlert:
                 self.cipher = None
         else:
             self.cipher = None
+        
+        # En-têtes de l'API fusionnés une seule fois (la configuration n'est plus modifiée à chaque envoi)
+        self.api_headers = dict(self.config["api"]["headers"])
+        if self.config["api"]["key"]:
+            self.api_headers["Authorization"] = f"Bearer {self.config['api']['key']}"
+        
+        # Session HTTP partagée, créée seulement si les alertes API sont activées
+        self.http = self.open_http_session() if self.config["api"]["enabled"] else None
+        
+        # En-tête Syslog précalculé: nom d'hôte et priorité (facility * 8 + sévérité) pour chaque sévérité
+        self.syslog_hostname = socket.gethostname()
+        facility = self.config["siem"]["facility"]
+        self.syslog_priorities = {severity: facility * 8 + severity for severity in range(8)}
+        
+        # Socket Syslog unique, réutilisé pour toutes les alertes (bloquant et non connecté: un refus
+        # ICMP du serveur ne fait pas échouer l'alerte suivante)
+        self.syslog_addr = (self.config["siem"]["syslog_server"], self.config["siem"]["syslog_port"])
+        self.syslog_sock = None
+        if self.config["siem"]["enabled"]:
+            try:
+                self.syslog_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            except OSError as e:
+                logging.error(f"Erreur lors de l'ouverture du socket Syslog: {str(e)}")
+        
+        # Pool de connexions SMTP réutilisées d'une alerte à l'autre, fermées après idle_timeout secondes d'inactivité
+        self.smtp_pool = queue.LifoQueue(maxsize=self.config["email"]["pool_size"])
+        self.smtp_stop = threading.Event()
+        self.smtp_reaper = None
+        if self.config["email"]["enabled"]:
+            self.smtp_reaper = threading.Thread(target=self.reap_smtp_connections, name="falcon-smtp-reaper", daemon=True)
+            self.smtp_reaper.start()
+        
+        # Exécuteur des envois: email, API et Syslog partent en parallèle
+        self.dispatcher = ThreadPoolExecutor(max_workers=3, thread_name_prefix="falcon-alert")
+        
+        # File des alertes API, envoyées par lots (un seul POST pour plusieurs alertes)
+        self.api_queue = deque(maxlen=self.config["api"]["queue_max"])
+        self.api_lock = threading.Lock()
+        self.api_wakeup = threading.Event()
+        self.api_stop = False
+        self.api_flusher = None
+        if self.config["api"]["enabled"]:
+            self.api_flusher = threading.Thread(target=self.flush_api_alerts, name="falcon-api-flush", daemon=True)
+            self.api_flusher.start()
+    
+    def open_http_session(self):
+        """
+        Crée la session HTTP partagée: les connexions (et sessions TLS) sont réutilisées d'une alerte à l'autre.
+        Les POST ne sont rejoués que sur échec de connexion, jamais après réception par le serveur.
+        """
+        # Import différé: requests n'est chargé que par les processus qui envoient des alertes API
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        http = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        )
+        http.mount("https://", adapter)
+        http.mount("http://", adapter)
+        return http
+    
+    def close(self):
+        """
+        Attend la fin des envois en cours, envoie les alertes API restantes et ferme les connexions HTTP
+        conservées par la session.
+        """
+        self.dispatcher.shutdown(wait=True)
+        if self.api_flusher is not None:
+            self.api_stop = True
+            self.api_wakeup.set()
+            self.api_flusher.join()
+            self.api_flusher = None
+        if self.http is not None:
+            self.http.close()
+            self.http = None
+        if self.smtp_reaper is not None:
+            self.smtp_stop.set()
+            self.smtp_reaper.join()
+            self.smtp_reaper = None
+        while True:
+            try:
+                self.smtp_pool.get_nowait().close()
+            except queue.Empty:
+                break
+        if self.syslog_sock is not None:
+            self.syslog_sock.close()
+            self.syslog_sock = None
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+    
+    def __del__(self):
+        dispatcher = getattr(self, "dispatcher", None)
+        if dispatcher is not None:
+            dispatcher.shutdown(wait=False)
+        http = getattr(self, "http", None)
+        if http is not None:
+            http.close()
+        syslog_sock = getattr(self, "syslog_sock", None)
+        if syslog_sock is not None:
+            syslog_sock.close()
             
     def _load_config(self, config_file=None):
         """
@@ -55,13 +354,19 @@ class FalconAlert:
                 "port": 587,
                 "username": "user@example.com",
                 "password": "",
-                "recipients": ["admin@example.com"]
+                "recipients": ["admin@example.com"],
+                "pool_size": 2,         # Connexions SMTP conservées ouvertes
+                "max_per_conn": 100,    # Messages envoyés avant de renouveler une connexion
+                "idle_timeout": 60      # Secondes d'inactivité avant fermeture d'une connexion
             },
             "api": {
                 "enabled": False,
                 "url": "https://api.example.com/incidents",
                 "key": "",
-                "headers": {"Content-Type": "application/json"}
+                "headers": {"Content-Type": "application/json"},
+                "batch_max": 50,           # Alertes maximum par requête
+                "flush_interval_ms": 200,  # Délai maximum avant l'envoi d'un lot incomplet
+                "queue_max": 1000          # Alertes conservées en attente d'envoi
             },
             "siem": {
                 "enabled": False,
@@ -73,6 +378,11 @@ class FalconAlert:
                 "same_drone_seconds": 300,  # 5 minutes entre alertes pour le même drone
                 "max_alerts_per_hour": 20    # Limite les alertes par heure
             },
+            "history": {
+                "enabled": True,
+                "path": "~/.falcon-defender/alert_history.bin",
+                "slots": 32768  # 1 Mo d'enregistrements de 32 octets
+            },
             "encryption_key": None
         }
         
@@ -101,39 +411,142 @@ class FalconAlert:
         """
         Vérifie si une alerte peut être envoyée selon les règles de limitation.
         """
-        current_time = datetime.now()
+        current_time = time.monotonic()
+        self.expire_alerts(current_time)
         
         # Vérifie si une alerte a déjà été envoyée pour ce drone récemment
-        for alert in self.alert_history:
-            if alert["drone_id"] == drone_id:
-                time_diff = (current_time - alert["timestamp"]).total_seconds()
-                if time_diff < self.config["throttling"]["same_drone_seconds"]:
-                    logging.info(f"Alerte pour le drone {drone_id} limitée (dernière il y a {time_diff:.1f}s)")
-                    return False
+        last_time = self.last_alert_times.get(drone_key(drone_id))
+        if last_time is not None:
+            time_diff = current_time - last_time
+            logging.info(f"Alerte pour le drone {drone_id} limitée (dernière il y a {time_diff:.1f}s)")
+            return False
         
         # Vérifie le nombre total d'alertes dans la dernière heure
-        one_hour_ago = current_time.timestamp() - 3600
-        recent_alerts = [a for a in self.alert_history if a["timestamp"].timestamp() > one_hour_ago]
-        
-        if len(recent_alerts) >= self.config["throttling"]["max_alerts_per_hour"]:
-            logging.warning(f"Limite d'alertes par heure atteinte ({len(recent_alerts)})")
+        if len(self.recent_alerts) >= self.config["throttling"]["max_alerts_per_hour"]:
+            logging.warning(f"Limite d'alertes par heure atteinte ({len(self.recent_alerts)})")
             return False
         
         return True
     
+    def expire_alerts(self, current_time):
+        """
+        Retire de l'historique les alertes sorties des fenêtres de limitation (coût amorti constant).
+        """
+        same_drone_seconds = self.config["throttling"]["same_drone_seconds"]
+        while self.alert_expiry and current_time - self.alert_expiry[0][0] >= same_drone_seconds:
+            timestamp, key = self.alert_expiry.popleft()
+            if self.last_alert_times.get(key) == timestamp:
+                del self.last_alert_times[key]
+        
+        while self.recent_alerts and current_time - self.recent_alerts[0] > 3600:
+            self.recent_alerts.popleft()
+    
     def record_alert(self, drone_id, alert_type):
         """
-        Enregistre une alerte dans l'historique.
+        Enregistre une alerte dans l'historique (et dans le journal persistant).
         """
-        self.alert_history.append({
-            "drone_id": drone_id,
-            "type": alert_type,
-            "timestamp": datetime.now()
-        })
+        key = drone_key(drone_id)
+        current_time = time.monotonic()
+        self.last_alert_times[key] = current_time
+        self.alert_expiry.append((current_time, key))
+        self.recent_alerts.append(current_time)
         
-        # Nettoie l'historique des alertes anciennes (> 24h)
-        one_day_ago = datetime.now().timestamp() - 86400
-        self.alert_history = [a for a in self.alert_history if a["timestamp"].timestamp() > one_day_ago]
+        if self.history is not None:
+            self.history.append(key, time.time(), ALERT_TYPES.get(alert_type, 0))
+    
+    def load_history(self):
+        """
+        Reconstruit l'historique de limitation à partir du journal persistant
+        (horodatages convertis de l'heure système vers l'horloge monotone).
+        """
+        window = max(3600, self.config["throttling"]["same_drone_seconds"])
+        wall_now = time.time()
+        monotonic_now = time.monotonic()
+        
+        for key, timestamp in self.history.replay(wall_now - window):
+            current_time = monotonic_now - (wall_now - timestamp)
+            self.last_alert_times[key] = current_time
+            self.alert_expiry.append((current_time, key))
+            self.recent_alerts.append(current_time)
+        
+        self.expire_alerts(monotonic_now)
+    
+    def open_smtp_connection(self):
+        """
+        Ouvre une nouvelle session SMTP (STARTTLS puis authentification).
+        """
+        # Import différé: smtplib n'est chargé que par les processus qui envoient des alertes email
+        import smtplib
+        
+        smtp = smtplib.SMTP(self.config["email"]["server"], self.config["email"]["port"], timeout=30)
+        try:
+            smtp.starttls()
+            if self.config["email"]["username"] and self.config["email"]["password"]:
+                smtp.login(self.config["email"]["username"], self.config["email"]["password"])
+        except Exception:
+            smtp.close()
+            raise
+        return SmtpConnection(smtp)
+    
+    def checkout_smtp_connection(self):
+        """
+        Retourne une connexion SMTP saine du pool (vérifiée par NOOP), ou en ouvre une nouvelle.
+        Les connexions ayant atteint max_per_conn messages ou inactives depuis trop longtemps sont fermées.
+        """
+        import smtplib
+        
+        while True:
+            try:
+                conn = self.smtp_pool.get_nowait()
+            except queue.Empty:
+                return self.open_smtp_connection()
+            
+            if (conn.sent_count >= self.config["email"]["max_per_conn"]
+                    or time.monotonic() - conn.last_used > self.config["email"]["idle_timeout"]):
+                conn.close()
+                continue
+            
+            try:
+                if conn.smtp.noop()[0] == 250:
+                    return conn
+            except (smtplib.SMTPException, OSError):
+                pass
+            conn.close()
+    
+    def checkin_smtp_connection(self, conn):
+        """
+        Remet une connexion dans le pool après un envoi réussi, ou la ferme si le pool est plein.
+        """
+        conn.last_used = time.monotonic()
+        try:
+            self.smtp_pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+    
+    def reap_smtp_connections(self):
+        """
+        Thread de maintenance: ferme (QUIT) les connexions SMTP inactives depuis plus de idle_timeout secondes.
+        """
+        idle_timeout = self.config["email"]["idle_timeout"]
+        
+        while not self.smtp_stop.wait(idle_timeout / 2):
+            kept = []
+            while True:
+                try:
+                    conn = self.smtp_pool.get_nowait()
+                except queue.Empty:
+                    break
+                if time.monotonic() - conn.last_used > idle_timeout:
+                    conn.close()
+                else:
+                    kept.append(conn)
+            
+            # Remet les connexions les plus récentes en dernier (sommet de la pile LIFO)
+            for conn in reversed(kept):
+                try:
+                    self.smtp_pool.put_nowait(conn)
+                except queue.Full:
+                    conn.close()
     
     def send_email_alert(self, subject, body, recipients=None):
         """
@@ -143,6 +556,9 @@ class FalconAlert:
             logging.info("Alertes email désactivées dans la configuration")
             return False
         
+        from email.mime.multipart import MIMEMultipart
+        from email.mime.text import MIMEText
+        
         try:
             # Prépare le message
             msg = MIMEMultipart()
@@ -153,17 +569,15 @@ class FalconAlert:
             # Ajoute le corps du message
             msg.attach(MIMEText(body, "plain"))
             
-            # Connexion au serveur SMTP
-            server = smtplib.SMTP(self.config["email"]["server"], self.config["email"]["port"])
-            server.starttls()
-            
-            # Authentification
-            if self.config["email"]["username"] and self.config["email"]["password"]:
-                server.login(self.config["email"]["username"], self.config["email"]["password"])
-            
-            # Envoi du message
-            server.send_message(msg)
-            server.quit()
+            # Envoi sur une connexion du pool (nouvelle session seulement si aucune n'est réutilisable)
+            conn = self.checkout_smtp_connection()
+            try:
+                conn.smtp.send_message(msg)
+            except Exception:
+                conn.close()
+                raise
+            conn.sent_count += 1
+            self.checkin_smtp_connection(conn)
             
             logging.info(f"Alerte email envoyée: {subject}")
             return True
@@ -174,44 +588,91 @@ class FalconAlert:
     
     def send_api_alert(self, data):
         """
-        Envoie une alerte à une API externe.
+        Place une alerte (dictionnaire ou JSON déjà sérialisé) dans la file d'envoi vers l'API externe.
+        Le thread d'envoi la transmet avec le prochain lot.
         """
         if not self.config["api"]["enabled"]:
             logging.info("Alertes API désactivées dans la configuration")
             return False
         
+        if not isinstance(data, bytes):
+            data = dumps_json(data)
+        
+        with self.api_lock:
+            if len(self.api_queue) == self.api_queue.maxlen:
+                logging.warning("File des alertes API pleine, l'alerte la plus ancienne est abandonnée")
+            self.api_queue.append(data)
+            if len(self.api_queue) >= self.config["api"]["batch_max"]:
+                self.api_wakeup.set()
+        
+        return True
+    
+    def flush_api_alerts(self):
+        """
+        Thread d'envoi: vide la file des alertes API par lots de batch_max, dès qu'un lot est complet
+        ou au plus tard toutes les flush_interval_ms millisecondes.
+        """
+        batch_max = self.config["api"]["batch_max"]
+        interval = self.config["api"]["flush_interval_ms"] / 1000
+        
+        while True:
+            self.api_wakeup.wait(interval)
+            self.api_wakeup.clear()
+            stopping = self.api_stop
+            
+            while True:
+                with self.api_lock:
+                    batch = [self.api_queue.popleft() for _ in range(min(batch_max, len(self.api_queue)))]
+                if not batch:
+                    break
+                self.post_api_batch(batch)
+            
+            if stopping:
+                return
+    
+    def post_api_batch(self, batch):
+        """
+        Envoie un lot d'alertes à l'API externe en une seule requête.
+        """
         try:
-            # Prépare les données
-            payload = json.dumps(data)
+            # Assemble les alertes déjà sérialisées (le lot entier est chiffré en une fois)
+            payload = b'{"alerts":[' + b','.join(batch) + b']}'
             
             # Chiffre si nécessaire
             if self.cipher:
                 payload = self.cipher.encrypt_to_base64(payload)
             
-            # Prépare les en-têtes
-            headers = self.config["api"]["headers"]
-            if self.config["api"]["key"]:
-                headers["Authorization"] = f"Bearer {self.config['api']['key']}"
-            
-            # Envoie la requête
-            response = requests.post(
+            # Envoie la requête sur une connexion du pool
+            response = self.http.post(
                 self.config["api"]["url"],
                 data=payload,
-                headers=headers,
+                headers=self.api_headers,
                 timeout=10
             )
             
             if response.ok:
-                logging.info(f"Alerte API envoyée: {response.status_code}")
+                logging.info(f"Lot de {len(batch)} alerte(s) API envoyé: {response.status_code}")
                 return True
             else:
-                logging.error(f"Erreur lors de l'envoi de l'alerte API: {response.status_code} {response.text}")
+                logging.error(f"Erreur lors de l'envoi du lot d'alertes API: {response.status_code} {response.text}")
                 return False
                 
         except Exception as e:
-            logging.error(f"Erreur lors de l'envoi de l'alerte API: {str(e)}")
+            logging.error(f"Erreur lors de l'envoi du lot d'alertes API: {str(e)}")
             return False
     
+    def format_syslog(self, message, severity):
+        """
+        Formate un message Syslog RFC 5424 (horodatage UTC à la microseconde).
+        """
+        now = time.time()
+        t = time.gmtime(now)
+        timestamp = "%04d-%02d-%02dT%02d:%02d:%02d.%06dZ" % (
+            t.tm_year, t.tm_mon, t.tm_mday, t.tm_hour, t.tm_min, t.tm_sec, int(now % 1 * 1000000))
+        
+        syslog_msg = f"<{self.syslog_priorities[severity]}>1 {timestamp} {self.syslog_hostname} falcon-defender - - - {message}"
+        return syslog_msg.encode('utf-8')
+    
     def send_syslog_alert(self, message, severity=5):  # 5 = Notice
         """
         Envoie une alerte à un serveur Syslog (pour intégration SIEM).
@@ -220,21 +681,12 @@ class FalconAlert:
             logging.info("Alertes Syslog désactivées dans la configuration")
             return False
         
+        if self.syslog_sock is None:
+            logging.error("Socket Syslog indisponible, alerte non envoyée")
+            return False
+        
         try:
-            # Format Syslog RFC 5424
-            priority = (self.config["siem"]["facility"] * 8) + severity
-            timestamp = datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%fZ")
-            hostname = socket.gethostname()
-            
-            # Format du message
-            syslog_msg = f"<{priority}>1 {timestamp} {hostname} falcon-defender - - - {message}"
-            
-            # Envoi au serveur Syslog
-            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
-                sock.sendto(
-                    syslog_msg.encode('utf-8'),
-                    (self.config["siem"]["syslog_server"], self.config["siem"]["syslog_port"])
-                )
+            self.syslog_sock.sendto(self.format_syslog(message, severity), self.syslog_addr)
             
             logging.info(f"Alerte Syslog envoyée: {message[:50]}...")
             return True
@@ -243,6 +695,20 @@ class FalconAlert:
             logging.error(f"Erreur lors de l'envoi de l'alerte Syslog: {str(e)}")
             return False
     
+    def dispatch(self, sends):
+        """
+        Exécute les envois [(fonction, arguments)] en parallèle et attend qu'ils soient tous terminés:
+        la latence d'une alerte est celle du canal le plus lent et non la somme des canaux.
+        """
+        if len(sends) == 1:
+            send, args = sends[0]
+            send(*args)
+            return
+        
+        futures = [self.dispatcher.submit(send, *args) for send, args in sends]
+        for future in futures:
+            future.result()
+    
     def alert_drone_detection(self, drone_data):
         """
         Envoie des alertes pour une détection de drone.
@@ -254,41 +720,34 @@ class FalconAlert:
         
         # Prépare les données d'alerte
         timestamp = datetime.now().isoformat()
-        alert_data = {
-            "type": "drone_detection",
-            "timestamp": timestamp,
-            "drone": drone_data,
-            "location": {
-                "lat": drone_data.get("position", {}).get("lat"),
-                "lon": drone_data.get("position", {}).get("lon"),
-                "alt": drone_data.get("position", {}).get("alt")
-            },
-            "severity": "info"
+        position = drone_data.get("position", {})
+        location = {
+            "lat": position.get("lat"),
+            "lon": position.get("lon"),
+            "alt": position.get("alt")
         }
         
+        sends = []
+        
         # Email
         if self.config["email"]["enabled"]:
             subject = f"[FALCON] Détection de drone - {drone_id}"
-            body = f"""
-Alerte Falcon-Defender: Détection de drone
-
-ID: {drone_id}
-Timestamp: {timestamp}
-Type: {drone_data.get('type', 'Unknown')}
-Position: {alert_data['location']}
-
-Ceci est une alerte automatique générée par Falcon-Defender.
-"""
-            self.send_email_alert(subject, body)
+            body = DETECTION_EMAIL_BODY.format(drone_id=drone_id, timestamp=timestamp,
+                                               drone_type=drone_data.get('type', 'Unknown'), location=location)
+            sends.append((self.send_email_alert, (subject, body)))
         
         # API
         if self.config["api"]["enabled"]:
-            self.send_api_alert(alert_data)
+            payload = DETECTION_JSON % (timestamp.encode(), dumps_json(drone_data), dumps_json(location))
+            sends.append((self.send_api_alert, (payload,)))
         
         # Syslog
         if self.config["siem"]["enabled"]:
-            message = f"FALCON-DEFENDER-ALERT: drone={drone_id} type=detection position={alert_data['location']}"
-            self.send_syslog_alert(message)
+            message = f"FALCON-DEFENDER-ALERT: drone={drone_id} type=detection position={location}"
+            sends.append((self.send_syslog_alert, (message,)))
+        
+        if sends:
+            self.dispatch(sends)
         
         # Enregistre l'alerte
         self.record_alert(drone_id, "detection")
@@ -305,45 +764,37 @@ Ceci est une alerte automatique générée par Falcon-Defender.
         
         # Prépare les données d'alerte
         timestamp = datetime.now().isoformat()
-        alert_data = {
-            "type": "geofence_violation",
-            "timestamp": timestamp,
-            "drone": drone_data,
-            "location": {
-                "lat": drone_data.get("position", {}).get("lat"),
-                "lon": drone_data.get("position", {}).get("lon"),
-                "alt": drone_data.get("position", {}).get("alt")
-            },
-            "geofence": geofence_data,
-            "severity": "warning"
+        position = drone_data.get("position", {})
+        location = {
+            "lat": position.get("lat"),
+            "lon": position.get("lon"),
+            "alt": position.get("alt")
         }
         
+        sends = []
+        
         # Email
         if self.config["email"]["enabled"]:
             subject = f"[FALCON] ALERTE Violation de zone - {drone_id}"
-            body = f"""
-ALERTE Falcon-Defender: Violation de zone interdite
-
-ID: {drone_id}
-Timestamp: {timestamp}
-Type: {drone_data.get('type', 'Unknown')}
-Position: {alert_data['location']}
-Zone: {geofence_data['zone_name']} ({geofence_data['zone_type']})
-Distance: {geofence_data['distance']:.1f}m
-
-Ceci est une alerte automatique générée par Falcon-Defender.
-Action requise: Vérifiez la situation et prenez les mesures appropriées.
-"""
-            self.send_email_alert(subject, body)
+            body = GEOFENCE_EMAIL_BODY.format(drone_id=drone_id, timestamp=timestamp,
+                                              drone_type=drone_data.get('type', 'Unknown'), location=location,
+                                              zone_name=geofence_data['zone_name'], zone_type=geofence_data['zone_type'],
+                                              distance=geofence_data['distance'])
+            sends.append((self.send_email_alert, (subject, body)))
         
         # API
         if self.config["api"]["enabled"]:
-            self.send_api_alert(alert_data)
+            payload = GEOFENCE_JSON % (timestamp.encode(), dumps_json(drone_data), dumps_json(location),
+                                       dumps_json(geofence_data))
+            sends.append((self.send_api_alert, (payload,)))
         
         # Syslog
         if self.config["siem"]["enabled"]:
             message = f"FALCON-DEFENDER-ALERT: drone={drone_id} type=geofence_violation zone={geofence_data['zone_name']} severity=warning"
-            self.send_syslog_alert(message, severity=4)  # Warning
+            sends.append((self.send_syslog_alert, (message, 4)))  # Warning
+        
+        if sends:
+            self.dispatch(sends)
         
         # Enregistre l'alerte
         self.record_alert(f"{drone_id}_geofence", "geofence")
@@ -360,46 +811,36 @@ Action requise: Vérifiez la situation et prenez les mesures appropriées.
         
         # Prépare les données d'alerte
         timestamp = datetime.now().isoformat()
-        alert_data = {
-            "type": "countermeasure",
-            "timestamp": timestamp,
-            "drone": drone_data,
-            "action": action,
-            "result": result,
-            "location": {
-                "lat": drone_data.get("position", {}).get("lat"),
-                "lon": drone_data.get("position", {}).get("lon"),
-                "alt": drone_data.get("position", {}).get("alt")
-            },
-            "severity": "critical"
+        position = drone_data.get("position", {})
+        location = {
+            "lat": position.get("lat"),
+            "lon": position.get("lon"),
+            "alt": position.get("alt")
         }
         
+        sends = []
+        
         # Email
         if self.config["email"]["enabled"]:
             subject = f"[FALCON] URGENT Contre-mesure activée - {drone_id}"
-            body = f"""
-ALERTE URGENTE Falcon-Defender: Contre-mesure activée
-
-ID: {drone_id}
-Timestamp: {timestamp}
-Type: {drone_data.get('type', 'Unknown')}
-Position: {alert_data['location']}
-Action: {action}
-Résultat: {'Succès' if result else 'Échec'}
-
-Ceci est une alerte automatique générée par Falcon-Defender.
-Une contre-mesure a été activée et requiert une attention immédiate.
-"""
-            self.send_email_alert(subject, body)
+            body = COUNTERMEASURE_EMAIL_BODY.format(drone_id=drone_id, timestamp=timestamp,
+                                                    drone_type=drone_data.get('type', 'Unknown'), location=location,
+                                                    action=action, outcome='Succès' if result else 'Échec')
+            sends.append((self.send_email_alert, (subject, body)))
         
         # API
         if self.config["api"]["enabled"]:
-            self.send_api_alert(alert_data)
+            payload = COUNTERMEASURE_JSON % (timestamp.encode(), dumps_json(drone_data), dumps_json(action),
+                                             dumps_json(result), dumps_json(location))
+            sends.append((self.send_api_alert, (payload,)))
         
         # Syslog
         if self.config["siem"]["enabled"]:
             message = f"FALCON-DEFENDER-ALERT: drone={drone_id} type=countermeasure action={action} result={'success' if result else 'failure'} severity=critical"
-            self.send_syslog_alert(message, severity=2)  # Critical
+            sends.append((self.send_syslog_alert, (message, 2)))  # Critical
+        
+        if sends:
+            self.dispatch(sends)
         
         # Enregistre l'alerte
         self.record_alert(f"{drone_id}_action_{action}", "countermeasure")
@@ -412,12 +853,15 @@ def send_alert(alert_type, data, config_file=None):
     """
     alerter = FalconAlert(config_file)
     
-    if alert_type == "detection":
-        return alerter.alert_drone_detection(data)
-    elif alert_type == "geofence":
-        return alerter.alert_geofence_violation(data["drone"], data["geofence"])
-    elif alert_type == "countermeasure":
-        return alerter.alert_countermeasure(data["drone"], data["action"], data["result"])
-    else:
-        logging.error(f"Type d'alerte inconnu: {alert_type}")
-        return False
\ No newline at end of file
+    try:
+        if alert_type == "detection":
+            return alerter.alert_drone_detection(data)
+        elif alert_type == "geofence":
+            return alerter.alert_geofence_violation(data["drone"], data["geofence"])
+        elif alert_type == "countermeasure":
+            return alerter.alert_countermeasure(data["drone"], data["action"], data["result"])
+        else:
+            logging.error(f"Type d'alerte inconnu: {alert_type}")
+            return False
+    finally:
+        alerter.close()
\ No newline at end of file
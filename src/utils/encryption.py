@@ -3,9 +3,8 @@
 # Falcon-Defender - Module de chiffrement et sécurité
 #
 
-import base64
-import hashlib
-import hmac
+import binascii
+import functools
 import json
 import logging
 import os
@@ -13,17 +12,18 @@ import time
 from datetime import datetime, timedelta
 
 try:
-    from cryptography.fernet import Fernet
-    from cryptography.hazmat.primitives import hashes, serialization
-    from cryptography.hazmat.primitives.asymmetric import padding, rsa
-    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
-    from cryptography.hazmat.backends import default_backend
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 except ImportError:
     logging.error("Le module cryptography est requis.")
     logging.error("Installez-le avec: pip install cryptography")
     raise
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 class AESEncryptor:
     """
     Classe pour le chiffrement et déchiffrement AES-GCM.
@@ -33,7 +33,9 @@ class AESEncryptor:
         Initialise un chiffreur AES-GCM avec une clé donnée ou générée aléatoirement.
         """
         self.key = key or os.urandom(32)  # AES-256 (32 octets)
-        self.backend = default_backend()
+        
+        # Instance AEAD réutilisée: chaque opération est un seul appel à OpenSSL (AES-NI)
+        self.aead = AESGCM(self.key)
     
     def encrypt(self, plaintext):
         """
@@ -46,61 +48,48 @@ class AESEncryptor:
         # Génère un vecteur d'initialisation aléatoire
         iv = os.urandom(12)  # 96 bits recommandé pour GCM
         
-        # Crée le chiffreur
-        cipher = Cipher(
-            algorithms.AES(self.key),
-            modes.GCM(iv),
-            backend=self.backend
-        )
-        encryptor = cipher.encryptor()
-        
-        # Chiffre les données
-        ciphertext = encryptor.update(plaintext) + encryptor.finalize()
+        # Chiffre les données (AESGCM retourne le texte chiffré suivi du tag de 16 octets)
+        sealed = self.aead.encrypt(iv, plaintext, None)
         
         # Retourne IV, texte chiffré et tag d'authentification
-        return (iv, ciphertext, encryptor.tag)
+        return (iv, sealed[:-16], sealed[-16:])
     
     def decrypt(self, iv, ciphertext, tag):
         """
         Déchiffre les données avec AES-GCM.
+        Lève cryptography.exceptions.InvalidTag si les données ont été altérées.
         """
-        # Crée le déchiffreur
-        cipher = Cipher(
-            algorithms.AES(self.key),
-            modes.GCM(iv, tag),
-            backend=self.backend
-        )
-        decryptor = cipher.decryptor()
-        
-        # Déchiffre les données
-        plaintext = decryptor.update(ciphertext) + decryptor.finalize()
-        
-        return plaintext
+        return self.aead.decrypt(iv, ciphertext + tag, None)
     
     def encrypt_to_base64(self, plaintext):
         """
         Chiffre et encode en Base64 pour faciliter le stockage/transmission.
+        Format: iv (12 octets) + tag (16 octets) + texte chiffré.
         """
-        iv, ciphertext, tag = self.encrypt(plaintext)
+        if isinstance(plaintext, str):
+            plaintext = plaintext.encode('utf-8')
+        
+        iv = os.urandom(12)
+        sealed = self.aead.encrypt(iv, plaintext, None)
         
         # Concatène les éléments et encode en Base64
-        combined = iv + tag + ciphertext
-        return base64.b64encode(combined).decode('utf-8')
+        combined = iv + sealed[-16:] + sealed[:-16]
+        return binascii.b2a_base64(combined, newline=False).decode('ascii')
     
     def decrypt_from_base64(self, encoded_data):
         """
         Décode de Base64 et déchiffre.
         """
         # Décode de Base64
-        combined = base64.b64decode(encoded_data)
+        combined = binascii.a2b_base64(encoded_data)
         
-        # Extrait les composants
+        # Extrait les composants et remet le tag en fin de texte chiffré, comme l'attend AESGCM
         iv = combined[:12]
         tag = combined[12:28]  # 16 octets pour le tag GCM
         ciphertext = combined[28:]
         
         # Déchiffre
-        plaintext = self.decrypt(iv, ciphertext, tag)
+        plaintext = self.aead.decrypt(iv, ciphertext + tag, None)
         
         # Retourne en texte si c'était du texte à l'origine
         try:
@@ -117,6 +106,7 @@ class TokenManager:
         Initialise avec une clé secrète donnée ou générée.
         """
         self.secret_key = secret_key or os.urandom(32)
+        self.encryptor = AESEncryptor(self.secret_key)
     
     def generate_token(self, user_id, expiry_hours=24):
         """
@@ -130,22 +120,14 @@ class TokenManager:
             "iat": datetime.utcnow().timestamp()
         }
         
-        # Sérialise en JSON
-        payload_json = json.dumps(payload)
-        
-        # Chiffre avec AES
-        encryptor = AESEncryptor(self.secret_key)
-        encrypted_token = encryptor.encrypt_to_base64(payload_json)
+        # Sérialise en JSON (bytes avec orjson, chiffrés sans réencodage)
+        if orjson is not None:
+            payload_json = orjson.dumps(payload)
+        else:
+            payload_json = json.dumps(payload)
         
-        # Ajoute une signature HMAC
-        signature = hmac.new(
-            self.secret_key,
-            encrypted_token.encode('utf-8'),
-            hashlib.sha256
-        ).hexdigest()
-        
-        # Combine le jeton et la signature
-        return f"{encrypted_token}.{signature}"
+        # Chiffre avec AES-GCM: le tag d'authentification protège déjà le jeton contre toute altération
+        return self.encryptor.encrypt_to_base64(payload_json)
     
     def validate_token(self, token):
         """
@@ -153,26 +135,19 @@ class TokenManager:
         Retourne les données du jeton si valide, None sinon.
         """
         try:
-            # Sépare le jeton et la signature
-            encrypted_token, signature = token.split('.')
-            
-            # Vérifie la signature
-            expected_sig = hmac.new(
-                self.secret_key,
-                encrypted_token.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest()
+            # Les jetons émis avec une signature HMAC (".signature") restent acceptés:
+            # seul le texte chiffré est nécessaire, authentifié par le tag GCM
+            encrypted_token = token.split('.', 1)[0]
             
-            if not hmac.compare_digest(expected_sig, signature):
-                logging.warning("Signature de jeton invalide")
+            # Déchiffre le jeton (InvalidTag si le jeton a été altéré ou émis avec une autre clé)
+            try:
+                payload_json = self.encryptor.decrypt_from_base64(encrypted_token)
+            except InvalidTag:
+                logging.warning("Jeton invalide ou altéré")
                 return None
             
-            # Déchiffre le jeton
-            encryptor = AESEncryptor(self.secret_key)
-            payload_json = encryptor.decrypt_from_base64(encrypted_token)
-            
             # Désérialise le JSON
-            payload = json.loads(payload_json)
+            payload = orjson.loads(payload_json) if orjson is not None else json.loads(payload_json)
             
             # Vérifie l'expiration
             if payload["exp"] < time.time():
@@ -214,12 +189,25 @@ def verify_authorization(key_data):
         logging.error(f"Erreur lors de la vérification d'autorisation: {str(e)}")
         return False
 
+# Clé de chiffrement des logs utilisée quand aucune clé n'est fournie: générée une fois par processus
+LOG_KEY = os.urandom(32)
+
+# Chiffreurs partagés par clé: l'instance AESGCM n'est créée qu'une fois pour chaque clé utilisée
+@functools.lru_cache(maxsize=16)
+def get_encryptor(key):
+    return AESEncryptor(key)
+
 # Fonction pour chiffrer les logs sensibles
 def encrypt_log_entry(log_entry, key=None):
     """
     Chiffre une entrée de log pour la stocker de manière sécurisée.
+    Sans clé, LOG_KEY est utilisée (à conserver pour pouvoir déchiffrer).
     """
-    encryptor = AESEncryptor(key)
+    encryptor = get_encryptor(bytes(key or LOG_KEY))
+    
+    # orjson sérialise aussi les datetime (sans fuseau: considérés en UTC)
+    if orjson is not None:
+        return encryptor.encrypt_to_base64(orjson.dumps(log_entry, option=orjson.OPT_NAIVE_UTC))
     return encryptor.encrypt_to_base64(json.dumps(log_entry))
 
 # Fonction pour déchiffrer les logs
@@ -227,10 +215,10 @@ def decrypt_log_entry(encrypted_entry, key):
     """
     Déchiffre une entrée de log stockée.
     """
-    encryptor = AESEncryptor(key)
+    encryptor = get_encryptor(bytes(key))
     try:
         decrypted = encryptor.decrypt_from_base64(encrypted_entry)
-        return json.loads(decrypted)
+        return orjson.loads(decrypted) if orjson is not None else json.loads(decrypted)
     except Exception as e:
         logging.error(f"Erreur lors du déchiffrement du log: {str(e)}")
         return None
\ No newline at end of file
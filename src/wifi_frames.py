@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Décodage des trames WiFi brutes (radiotap + 802.11) pour Falcon-Defender
+Module entièrement annoté pour pouvoir être compilé avec mypyc (voir install.sh)
+"""
+
+import struct
+from typing import Dict, Optional, Tuple, Union
+
+Buffer = Union[bytes, memoryview]
+
+# Champs radiotap précédant le signal en dBm: (alignement, taille) pour TSFT, Flags, Rate, Channel, FHSS, dBm_AntSignal
+RADIOTAP_FIELDS: Tuple[Tuple[int, int], ...] = ((8, 8), (1, 1), (1, 1), (2, 4), (1, 2), (1, 1))
+RADIOTAP_HEADER = struct.Struct("<BBHI")  # it_version, it_pad, it_len, it_present
+RADIOTAP_FLAG_FCS = 0x10
+
+# Trames de gestion 802.11 retenues: beacon et probe response
+DOT11_SUBTYPES: Tuple[int, ...] = (5, 8)
+DOT11_IE_OFFSET = 36  # En-tête 802.11 (24 octets) + champs fixes du beacon (12 octets)
+
+def parse_ies(buf: Buffer, offset: int, end: int) -> Dict[int, Buffer]:
+    """Parcourt la chaîne d'éléments d'information (tag, longueur, valeur) en un dictionnaire {tag: valeur}"""
+    ies: Dict[int, Buffer] = {}
+
+    while offset + 2 <= end:
+        tag = buf[offset]
+        length = buf[offset + 1]
+        ies[tag] = buf[offset + 2:min(offset + 2 + length, end)]
+        offset += 2 + length
+
+    return ies
+
+def parse_radiotap_header(frame: Buffer) -> Optional[Tuple[int, int, int]]:
+    """Lit l'en-tête radiotap et retourne (longueur, drapeaux, signal en dBm), signal à 0 si le champ est absent"""
+    version, _, radiotap_len, present = RADIOTAP_HEADER.unpack_from(frame, 0)
+    if version != 0:
+        return None
+
+    # Saute les mots "present" étendus (bit 31)
+    offset = 8
+    word = present
+    while word & 0x80000000 and offset + 4 <= radiotap_len:
+        word = int.from_bytes(frame[offset:offset + 4], "little")
+        offset += 4
+
+    flags = 0
+    signal_strength = 0
+    for bit, (align, size) in enumerate(RADIOTAP_FIELDS):
+        if not present & (1 << bit):
+            continue
+        offset = (offset + align - 1) & ~(align - 1)
+        if bit == 1:
+            flags = frame[offset]
+        elif bit == 5:
+            signal_strength = frame[offset] - 256 if frame[offset] > 127 else frame[offset]
+        offset += size
+
+    return radiotap_len, flags, signal_strength
+
+def parse_radiotap_frame(frame: Buffer) -> Optional[Tuple[str, int, int, int]]:
+    """Décode une trame radiotap + 802.11 et retourne (ssid, bssid, canal, signal) pour un beacon ou une probe response,
+    le BSSID étant un entier 48 bits"""
+    if len(frame) < 8:
+        return None
+
+    header = parse_radiotap_header(frame)
+    if header is None:
+        return None
+    radiotap_len, flags, signal_strength = header
+
+    end = len(frame) - 4 if flags & RADIOTAP_FLAG_FCS else len(frame)
+    if end - radiotap_len < DOT11_IE_OFFSET:
+        return None
+
+    # Trame de gestion (type 0) de sous-type beacon ou probe response
+    frame_control = frame[radiotap_len]
+    if frame_control & 0x0c or frame_control >> 4 not in DOT11_SUBTYPES:
+        return None
+
+    bssid = int.from_bytes(frame[radiotap_len + 10:radiotap_len + 16], "big")
+    ies = parse_ies(frame, radiotap_len + DOT11_IE_OFFSET, end)
+
+    ssid = bytes(ies.get(0, b"")).decode('utf-8', errors='ignore')
+    channel = ies[3][0] if ies.get(3) else 0
+
+    return ssid, bssid, channel, signal_strength
@@ -0,0 +1,41 @@
+import base64
+import os
+
+import pytest
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from src.utils.encryption import AESEncryptor, TokenManager
+
+def test_encrypt_round_trip():
+    """Test le chiffrement puis déchiffrement d'un texte"""
+    encryptor = AESEncryptor(os.urandom(32))
+    iv, ciphertext, tag = encryptor.encrypt("drone détecté")
+    assert len(iv) == 12 and len(tag) == 16
+    assert encryptor.decrypt(iv, ciphertext, tag) == "drone détecté".encode('utf-8')
+    assert encryptor.decrypt_from_base64(encryptor.encrypt_to_base64("alerte")) == "alerte"
+
+def test_base64_wire_format():
+    """Test la compatibilité du format iv + tag + texte chiffré avec les données déjà stockées"""
+    key = os.urandom(32)
+    iv = os.urandom(12)
+    encryptor = Cipher(algorithms.AES(key), modes.GCM(iv)).encryptor()
+    ciphertext = encryptor.update(b"journal") + encryptor.finalize()
+    encoded = base64.b64encode(iv + encryptor.tag + ciphertext).decode('utf-8')
+    assert AESEncryptor(key).decrypt_from_base64(encoded) == "journal"
+
+def test_tampered_data_rejected():
+    """Test le rejet d'un texte chiffré altéré"""
+    encryptor = AESEncryptor(os.urandom(32))
+    combined = bytearray(base64.b64decode(encryptor.encrypt_to_base64("alerte")))
+    combined[-1] ^= 1
+    with pytest.raises(InvalidTag):
+        encryptor.decrypt_from_base64(base64.b64encode(bytes(combined)))
+
+def test_token_round_trip():
+    """Test la génération et la validation d'un jeton"""
+    manager = TokenManager(os.urandom(32))
+    token = manager.generate_token("operateur")
+    assert manager.validate_token(token)["user_id"] == "operateur"
+    assert "." not in token
+    assert TokenManager(os.urandom(32)).validate_token(token) is None
@@ -0,0 +1,33 @@
+import struct
+
+from src.wifi_frames import parse_ies, parse_radiotap_frame
+
+def build_frame(ssid, bssid, channel, signal, subtype=8, fcs=False):
+    """Construit une trame radiotap (Flags, dBm_AntSignal) + beacon 802.11"""
+    radiotap = struct.pack("<BBHIBb", 0, 0, 10, (1 << 1) | (1 << 5), 0x10 if fcs else 0, signal)
+    address = bytes.fromhex(bssid.replace(":", ""))
+    dot11 = struct.pack("<BBH", subtype << 4, 0, 0) + b"\xff" * 6 + address + address + b"\x00\x00"
+    body = b"\x00" * 12 + bytes([0, len(ssid)]) + ssid + b"\x01\x02\x82\x84" + bytes([3, 1, channel])
+    return radiotap + dot11 + body + (b"\x00" * 4 if fcs else b"")
+
+def test_parse_beacon():
+    """Test le décodage d'un beacon"""
+    frame = build_frame(b"DJI-1234", "60:60:1f:aa:bb:cc", 6, -42)
+    assert parse_radiotap_frame(frame) == ("DJI-1234", 0x60601faabbcc, 6, -42)
+    assert parse_radiotap_frame(memoryview(frame)) == ("DJI-1234", 0x60601faabbcc, 6, -42)
+
+def test_parse_probe_response_with_fcs():
+    """Test une probe response suivie d'un FCS"""
+    frame = build_frame(b"Skydio-X", "f0:f0:02:00:00:01", 11, -70, subtype=5, fcs=True)
+    assert parse_radiotap_frame(frame) == ("Skydio-X", 0xf0f002000001, 11, -70)
+
+def test_ignore_other_frames():
+    """Test le rejet des trames qui ne sont ni des beacons ni des probe responses"""
+    assert parse_radiotap_frame(build_frame(b"x", "00:11:22:33:44:55", 1, -50, subtype=4)) is None
+    assert parse_radiotap_frame(b"\x00" * 4) is None
+
+def test_parse_ies_truncated():
+    """Test un élément d'information tronqué en fin de trame"""
+    ies = parse_ies(b"\x00\x03abc\x03\x05\x01", 0, 8)
+    assert bytes(ies[0]) == b"abc"
+    assert bytes(ies[3]) == b"\x01"